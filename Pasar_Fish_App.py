@@ -1,19 +1,32 @@
+import atexit
 import base64
+import functools
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
+from datetime import datetime, timedelta
 from urllib.parse import quote
 import json
 import os
+import uuid
+import assets
+import instrumentation
+import question_bank
+import share_cards
+from analytics_store import SOURCE_COLUMNS, TIME_BIN, AggregateStore, quantile_from_bins
+from fish_types import FISH_IMAGES, FISH_NAMES
+from quiz_state import RESULTS_STEP, QuizState
+from response_schema import AGE_OPTIONS, COUNTRY_OPTIONS, GENDER_OPTIONS, OCCUPATION_OPTIONS, REFERRAL_OPTIONS, RESPONSE_COLUMNS, normalize_responses
+from share_cards import APP_URL
+from sheets_io import (
+    PRIORITY_ANALYTICS, PRIORITY_RESPONSES, SHEETS_READS_PER_MINUTE, SHEETS_WRITES_PER_MINUTE,
+    OutboxWriter, ResponseOutbox, WorksheetCache, appended_row, column_values_after, connect_client, ensure_header,
+    rate_limiter
+)
+from snapshot import ResponseSnapshot, SnapshotSheetLoader
 
-def get_image_base64(image_path):
-    """Convert image to base64 for HTML display"""
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
+# Time every step of this rerun (finished at the bottom of the script)
+metrics = instrumentation.registry()
+metrics.begin_rerun()
 
 # Set page config
 st.set_page_config(
@@ -23,293 +36,172 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""
-    <style>
-    /* Force content to fit viewport */
-    .main .block-container {
-        max-height: 100vh;
-        overflow-y: auto;
-        padding: 1vh 2vw;
-    }
-    
-    /* Scale everything to viewport */
-    .main {
-        padding: 1vh 2vw;
-        max-width: 100vw;
-    }
-    
-    /* Question container fits screen */
-    .question-container {
-        background-color: #f8f9fa;
-        padding: 2vh 2vw;
-        border-radius: 10px;
-        margin: 1vh 0;
-        max-height: 80vh;
-        overflow: visible;
-    }
-    
-    /* Images scale to screen */
-    img {
-        max-width: 100vw !important;
-        max-height: 40vh !important;
-        width: auto !important;
-        height: auto !important;
-        object-fit: contain !important;
-        margin: 1vh auto !important;
-        display: block !important;
-    }
+# Font Awesome for the brand icons
+FONT_AWESOME_URL = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.2/css/all.min.css"
 
-    /* Results page fish image - larger */
-    .result-fish-image {
-        max-width: 90vw !important;
-        max-height: 70vh !important;  /* Much larger for results */
-        width: auto !important;
-        height: auto !important;
-        object-fit: contain !important;
-        margin: 2vh auto !important;
-        display: block !important;
-    }
-    
-    /* Responsive text sizing */
-    h1 {
-        font-size: clamp(1.5rem, 4vw, 2.5rem) !important;
-    }
-    
-    h3 {
-        font-size: clamp(1rem, 3vw, 1.5rem) !important;
-    }
-    
-    h4 {
-        font-size: clamp(0.9rem, 2.5vw, 1.2rem) !important;
-    }
-    
-    p, .stMarkdown {
-        font-size: clamp(0.85rem, 2vw, 1rem) !important;
-    }
-    
-    /* Button sizing */
-    .stButton>button {
-        font-size: clamp(0.9rem, 2.5vw, 1.1rem) !important;
-        padding: 1vh 2vw !important;
-    }
-    
-    /* Radio buttons and inputs */
-    .stRadio, .stSelectbox {
-        font-size: clamp(0.85rem, 2vw, 1rem) !important;
-    }
-    
-    /* Reduce spacing between elements */
-    .stMarkdown {
-        margin-bottom: 0.5vh !important;
-    }
-    
-    /* Progress bar */
-    .stProgress {
-        height: 1vh !important;
-    }
-    
-    /* Responsive breakpoints */
-    @media (max-height: 800px) {
-        /* Smaller screens - compress more */
-        .question-container {
-            padding: 1.5vh 2vw;
-        }
-        img {
-            max-height: 30vh !important;
-        }
-    }
-    
-    @media (max-height: 600px) {
-        /* Very small screens - ultra compact */
-        .question-container {
-            padding: 1vh 1.5vw;
-        }
-        img {
-            max-height: 25vh !important;
-        }
-        h1 {
-            font-size: 1.3rem !important;
-        }
-    }
-    
-    @media (min-height: 1000px) {
-        /* Large screens - more breathing room */
-        img {
-            max-height: 50vh !important;
-        }
-    }
+@st.cache_resource
+def load_head_assets():
+    """Content-hashed static URL for web/app.css, published once per process"""
+    return assets.publish_head_assets()
 
-    /* Reverse button order on mobile - Next on top, Previous below */
-    @media (max-width: 768px) {
-        div[data-testid="stHorizontalBlock"] {
-            display: flex !important;
-            flex-direction: column-reverse !important;
-        }
-        
-        div[data-testid="column"] {
-            width: 100% !important;
-        }
-        
-        /* Hide middle column */
-        div[data-testid="stHorizontalBlock"] > div[data-testid="column"]:nth-child(2) {
-            display: none !important;
-        }
-        
-        /* Add spacing between buttons */
-        .stButton {
-            margin-bottom: 0.5rem !important;
-        }
-    }
-    
-    /* Aggressive space removal */
-    .main .block-container {
-        padding-top: 0.5rem !important;
-        padding-bottom: 1rem !important;
-    }
-    
-    /* Remove all top margins and padding */
-    h1, h2, h3 {
-        margin-top: 0 !important;
-        padding-top: 0 !important;
-    }
-    
-    /* Tighten up the title specifically */
-    .main .block-container > div:first-child {
-        padding-top: 0 !important;
-    }
-    
-    /* Remove Streamlit's default top spacing */
-    .stApp > header {
-        height: 0rem;
-    }
+@metrics.timed('inject_css')
+def inject_global_assets():
+    """Load the global CSS and Font Awesome into the page, once per browser session.
+    
+    The first render gets them inline, so it's styled straight away, plus a loader
+    that copies the cached stylesheet into <head>, which outlives reruns - so later
+    reruns send none of it. If static/ couldn't be written the CSS is inlined on
+    every rerun instead.
+    """
+    if st.session_state.get('global_assets_injected'):
+        return
+    st.markdown(assets.inline_head_html(stylesheets=[FONT_AWESOME_URL]), unsafe_allow_html=True)
+    urls = load_head_assets()
+    if urls:
+        st.html(assets.head_loader_html(urls, stylesheets=[FONT_AWESOME_URL]), unsafe_allow_javascript=True)
+        st.session_state.global_assets_injected = True
+
+inject_global_assets()
+
+def get_setting(key, default):
+    """Read an optional setting from st.secrets, falling back when there is no secrets file"""
+    try:
+        return st.secrets.get(key, default)
+    except FileNotFoundError:
+        return default
+
+@st.cache_resource
+def load_scoring_engine():
+    """Load the compiled 12-bit answer lookup table (rebuilt if the workbook changed)"""
+    return question_bank.load_engine('Updated_combinations.xlsx', 'Updated_combinations.qbank')
+
+@st.cache_resource
+def load_asset_manifest():
+    """Content-hashed static URLs for every image, built once per process"""
+    return assets.startup_manifest()
+
+@st.cache_resource
+@metrics.timed('image_encode')
+def get_image_base64(image_path):
+    """Convert image to base64 for HTML display - fallback when static serving isn't available"""
+    with open(image_path, "rb") as img_file:
+        return base64.b64encode(img_file.read()).decode()
+
+# Google Sheets connection
+@st.cache_resource
+def get_worksheet_cache():
+    """Process-wide cache of spreadsheet/worksheet handles (10 minute TTL), behind the shared Sheets rate limiter.
+    
+    The connection settings are read here, on the script thread. The client is only
+    made when first needed - possibly on the outbox writer's thread - so connecting
+    never touches st.secrets, and a failure is raised to the caller.
+    """
+    limiter = rate_limiter()
+    limiter.configure(
+        read_per_minute=get_setting("sheets_reads_per_minute", SHEETS_READS_PER_MINUTE),
+        write_per_minute=get_setting("sheets_writes_per_minute", SHEETS_WRITES_PER_MINUTE)
+    )
+    connect = functools.partial(
+        connect_client,
+        backend=get_setting("sheets_backend", "google"),
+        credentials=get_setting("gcp_service_account", None),
+        fake_options=get_setting("fake_sheets", {})
+    )
+    return WorksheetCache(connect, ttl=600, limiter=limiter)
+
+def get_sheet_name():
+    return get_setting("sheet_name", "MBTI_Survey_Responses")
+
+def run_on_worksheet(operation, tab=None, create=None, kind='read', priority=PRIORITY_ANALYTICS):
+    """Run operation(worksheet) against the survey spreadsheet using cached handles.
+    
+    operation is one 'read' or 'write' request; it waits for Sheets quota behind
+    higher-priority callers and is retried on 429/5xx errors. Script thread only -
+    the outbox writer gets its own binding from get_response_writer().
+    """
+    return get_worksheet_cache().run(get_sheet_name(), tab, operation, create, kind=kind, priority=priority)
+
+def ensure_response_header(run):
+    """Give the responses sheet a header naming every RESPONSE_COLUMNS column.
     
-    /* Compact everything at the top */
-    section[data-testid="stAppViewContainer"] > div:first-child {
-        padding-top: 0 !important;
-    }
+    Sheets set up before Response_ID was added have no header cell for it,
+    which get_all_records and the snapshot loader need.
+    """
+    run(lambda worksheet: ensure_header(worksheet, RESPONSE_COLUMNS), kind='write')
+
+@metrics.timed('sheets.append_responses')
+def append_response_rows(run, rows, maybe_written=False, after_row=None):
+    """Append a batch of response rows (called from the outbox writer); returns the sheet row it ended at"""
+    pending = rows
+    if maybe_written:
+        # Response_ID is the last column - skip rows an unconfirmed earlier attempt already wrote.
+        # That attempt came after the last confirmed append, so only the rows below it are read.
+        written = set(run(lambda worksheet: column_values_after(worksheet, len(rows[0]), after_row)))
+        pending = [row for row in rows if row[-1] not in written]
+    if not pending:
+        return None
+    return appended_row(run(lambda worksheet: worksheet.append_rows(pending), kind='write'))
+
+@st.cache_resource
+def get_response_writer():
+    """Process-wide outbox writer: responses hit local disk first, then Sheets in batches.
     
-    /* Remove extra space above progress bar */
-    .stProgress {
-        margin-top: 0.25rem !important;
-        margin-bottom: 0.5rem !important;
-    }
+    The worksheet cache and sheet name are bound here, on the script thread, so the
+    writer thread never reads st.secrets; its failures are logged and retried.
+    """
+    sheets, sheet_name = get_worksheet_cache(), get_sheet_name()
     
-    /* Tighten caption spacing */
-    .stCaption {
-        margin-top: 0 !important;
-        margin-bottom: 0.5rem !important;
-    }
+    def run(operation, kind='read'):
+        return sheets.run(sheet_name, None, operation, kind=kind, priority=PRIORITY_RESPONSES)
     
-    /* Remove space above horizontal rules */
-    hr {
-        margin-top: 0.5rem !important;
-        margin-bottom: 1rem !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    outbox = ResponseOutbox(get_setting("outbox_path", ".pasarfish/outbox.sqlite3"))
+    return OutboxWriter(functools.partial(append_response_rows, run), outbox,
+                        prepare=functools.partial(ensure_response_header, run), batch_size=50, flush_interval=5.0)
 
-# JavaScript to detect and adjust to screen size
-st.markdown("""
-    <script>
-    // Detect screen size and adjust zoom
-    function adjustToScreen() {
-        const screenHeight = window.innerHeight;
-        const screenWidth = window.innerWidth;
-        
-        // Calculate optimal zoom level
-        let zoomLevel = 1;
-        
-        if (screenHeight < 700) {
-            zoomLevel = 0.85;  // Small screens - zoom out
-        } else if (screenHeight < 900) {
-            zoomLevel = 0.95;  // Medium screens - slight zoom out
-        } else if (screenHeight > 1200) {
-            zoomLevel = 1.1;   // Large screens - zoom in slightly
-        }
-        
-        // Apply zoom
-        document.body.style.zoom = zoomLevel;
-        
-        // Log for debugging
-        console.log('Screen: ' + screenWidth + 'x' + screenHeight + ', Zoom: ' + zoomLevel);
-    }
-    
-    // Run on load and resize
-    window.addEventListener('load', adjustToScreen);
-    window.addEventListener('resize', adjustToScreen);
-    </script>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def get_aggregate_store():
+    """Process-wide dashboard aggregates, updated on every submission and persisted locally"""
+    store = AggregateStore(get_setting("aggregates_path", ".pasarfish/aggregates.json"))
+    atexit.register(store.flush)
+    return store
 
-# Add Font Awesome for brand icons
-st.markdown("""
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.2/css/all.min.css">
-    """, unsafe_allow_html=True)
+@metrics.timed('save_response')
+def save_to_google_sheets(data):
+    """Record survey response in the local outbox; it reaches Google Sheets in the background"""
+    saved = get_response_writer().submit(list(data.values()), data['Response_ID'])
+    if saved:
+        get_aggregate_store().add(data)
+    return saved
 
-# Load the data
-@st.cache_data
-def load_mbti_data():
-    df = pd.read_excel('Updated_combinations.xlsx')
-    return df
+@st.cache_resource
+def get_response_snapshot():
+    """Local month-partitioned Parquet copy of the responses sheet"""
+    return ResponseSnapshot(get_setting("snapshot_path", ".pasarfish/snapshot"))
 
-# Google Sheets connection
 @st.cache_resource
-def get_gsheet_connection():
-    """Connect to Google Sheets using service account credentials"""
-    try:
-        # Load credentials from Streamlit secrets
-        credentials_dict = st.secrets["gcp_service_account"]
-        
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        
-        credentials = Credentials.from_service_account_info(
-            credentials_dict,
-            scopes=scopes
-        )
-        
-        client = gspread.authorize(credentials)
-        return client
-    except Exception as e:
-        st.error(f"Error connecting to Google Sheets: {e}")
-        return None
+def get_response_loader():
+    """Syncs new sheet rows into the local snapshot (only rows past its cursor are fetched)"""
+    options = load_scoring_engine().options
+    return SnapshotSheetLoader(get_response_snapshot(), normalize=lambda df: normalize_responses(df, options))
 
-def save_to_google_sheets(data):
-    """Save survey response to Google Sheets"""
+def sync_responses():
+    """Pull new rows from Google Sheets into the local snapshot; False (after a warning) if that failed"""
     try:
-        client = get_gsheet_connection()
-        if client is None:
-            return False
-            
-        # Open the spreadsheet by name (you'll need to create this)
-        sheet_name = st.secrets.get("sheet_name", "MBTI_Survey_Responses")
-        spreadsheet = client.open(sheet_name)
-        worksheet = spreadsheet.sheet1
-        
-        # Append the data
-        worksheet.append_row(list(data.values()))
+        with metrics.span('sheets.sync'):
+            run_on_worksheet(get_response_loader().sync, priority=PRIORITY_ANALYTICS)
         return True
     except Exception as e:
-        st.error(f"Error saving to Google Sheets: {e}")
+        # Offline or over quota - what's already in the snapshot is still usable
+        st.warning(f"Couldn't sync new responses from Google Sheets, showing the local copy: {e}")
         return False
 
-def load_responses_from_sheets():
-    """Load all responses from Google Sheets for analytics"""
+def load_responses_from_sheets(columns=None, start=None, end=None, sync=True):
+    """Sync new responses from Google Sheets (unless sync=False), then read the requested columns/date range from the local snapshot"""
+    if sync:
+        sync_responses()
     try:
-        client = get_gsheet_connection()
-        if client is None:
-            return None
-            
-        sheet_name = st.secrets.get("sheet_name", "MBTI_Survey_Responses")
-        spreadsheet = client.open(sheet_name)
-        worksheet = spreadsheet.sheet1
-        
-        # Get all records
-        data = worksheet.get_all_records()
-        if data:
-            return pd.DataFrame(data)
-        return None
+        with metrics.span('snapshot.load'):
+            return get_response_snapshot().load(columns=columns, start=start, end=end, normalize=get_response_loader().normalize)
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
@@ -382,6 +274,9 @@ questions = {
     }
 }
 
+# Answer letters of each question, in QUESTION_IDS order (what the quiz state's answer bits index)
+QUESTION_OPTIONS = tuple(tuple(questions[q_id]['options']) for q_id in question_bank.QUESTION_IDS)
+
 # MBTI type descriptions
 mbti_descriptions = {
     'ISTJ': 'The Inspector - Practical, fact-minded, and reliable',
@@ -402,265 +297,153 @@ mbti_descriptions = {
     'ENTJ': 'The Commander - Bold, imaginative, and strong-willed'
 }
 
-# Fish image mapping - NEW DICTIONARY (ADD THIS)
-fish_images = {
-    'ISTJ': 'images/Malabar_Red_Snapper.jpg',
-    'ISFJ': 'images/Anchovy.jpg',
-    'INFJ': 'images/Brownbanded_Bamboo_Shark.jpg',
-    'INTJ': 'images/Diamond_Trevally.jpg',
-    'ISTP': 'images/Unicorn_Leatherjacket.jpg',
-    'ISFP': 'images/Barramundi.jpg',
-    'INFP': 'images/Bombay_Duck.jpg',
-    'INTP': 'images/Whitespotted_Whipray.jpg',
-    'ESTP': 'images/Narrow_Based Spanish Mackerel.jpg',
-    'ESFP': 'images/Black_Promfret.jpg',
-    'ENFP': 'images/Yellowtail_Fusilier.jpg',
-    'ENTP': 'images/Indian_Mackerel.jpg',
-    'ESTJ': 'images/Wolf_Herring.jpg',
-    'ESFJ': 'images/Yellowtail_Croaker.jpg',
-    'ENFJ': 'images/Longtailed_Tuna.jpg',
-    'ENTJ': 'images/Giant_Grouper.jpg'
-}
-
-# Fish names mapping - extracted from filenames
-fish_names = {
-    'ISTJ': 'Malabar Red Snapper',
-    'ISFJ': 'Anchovy',
-    'INFJ': 'Brownbanded Bamboo Shark',
-    'INTJ': 'Diamond Trevally',
-    'ISTP': 'Unicorn Leatherjacket',
-    'ISFP': 'Barramundi',
-    'INFP': 'Bombay Duck',
-    'INTP': 'Whitespotted Whipray',
-    'ESTP': 'Narrow-Based Spanish Mackerel',
-    'ESFP': 'Black Pomfret',
-    'ENFP': 'Yellowtail Fusilier',
-    'ENTP': 'Indian Mackerel',
-    'ESTJ': 'Wolf Herring',
-    'ESFJ': 'Yellowtail Croaker',
-    'ENFJ': 'Longtailed Tuna',
-    'ENTJ': 'Giant Grouper'
-}
-
-# List of countries for dropdown
-countries = [
-    "", "Afghanistan", "Albania", "Algeria", "Andorra", "Angola", "Antigua and Barbuda", "Argentina", 
-    "Armenia", "Australia", "Austria", "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados", 
-    "Belarus", "Belgium", "Belize", "Benin", "Bhutan", "Bolivia", "Bosnia and Herzegovina", "Botswana", 
-    "Brazil", "Brunei", "Bulgaria", "Burkina Faso", "Burundi", "Cabo Verde", "Cambodia", "Cameroon", 
-    "Canada", "Central African Republic", "Chad", "Chile", "China", "Colombia", "Comoros", "Congo", 
-    "Costa Rica", "Croatia", "Cuba", "Cyprus", "Czech Republic", "Denmark", "Djibouti", "Dominica", 
-    "Dominican Republic", "East Timor", "Ecuador", "Egypt", "El Salvador", "Equatorial Guinea", "Eritrea", 
-    "Estonia", "Eswatini", "Ethiopia", "Fiji", "Finland", "France", "Gabon", "Gambia", "Georgia", 
-    "Germany", "Ghana", "Greece", "Grenada", "Guatemala", "Guinea", "Guinea-Bissau", "Guyana", "Haiti", 
-    "Honduras", "Hungary", "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel", "Italy", 
-    "Jamaica", "Japan", "Jordan", "Kazakhstan", "Kenya", "Kiribati", "Korea North", "Korea South", "Kosovo", 
-    "Kuwait", "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Lesotho", "Liberia", "Libya", "Liechtenstein", 
-    "Lithuania", "Luxembourg", "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali", "Malta", 
-    "Marshall Islands", "Mauritania", "Mauritius", "Mexico", "Micronesia", "Moldova", "Monaco", "Mongolia", 
-    "Montenegro", "Morocco", "Mozambique", "Myanmar", "Namibia", "Nauru", "Nepal", "Netherlands", 
-    "New Zealand", "Nicaragua", "Niger", "Nigeria", "North Macedonia", "Norway", "Oman", "Pakistan", 
-    "Palau", "Palestine", "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines", "Poland", 
-    "Portugal", "Qatar", "Romania", "Russia", "Rwanda", "Saint Kitts and Nevis", "Saint Lucia", 
-    "Saint Vincent and the Grenadines", "Samoa", "San Marino", "Sao Tome and Principe", "Saudi Arabia", 
-    "Senegal", "Serbia", "Seychelles", "Sierra Leone", "Singapore", "Slovakia", "Slovenia", 
-    "Solomon Islands", "Somalia", "South Africa", "South Sudan", "Spain", "Sri Lanka", "Sudan", "Suriname", 
-    "Sweden", "Switzerland", "Syria", "Taiwan", "Tajikistan", "Tanzania", "Thailand", "Togo", "Tonga", 
-    "Trinidad and Tobago", "Tunisia", "Turkey", "Turkmenistan", "Tuvalu", "Uganda", "Ukraine", 
-    "United Arab Emirates", "United Kingdom", "United States", "Uruguay", "Uzbekistan", "Vanuatu", 
-    "Vatican City", "Venezuela", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
+# Share icons in display order: (platform, icon class)
+SHARE_PLATFORMS = [
+    ('instagram', 'fab fa-instagram brand-instagram'),
+    ('x', 'fab fa-x-twitter brand-x'),
+    ('linkedin', 'fab fa-linkedin brand-linkedin'),
+    ('whatsapp', 'fab fa-whatsapp brand-whatsapp'),
+    ('telegram', 'fab fa-telegram brand-telegram'),
 ]
 
-def create_share_buttons(mbti_type, share_source="result_page"):
-    """Create social media share buttons - all in white box"""
-    
-    app_url = "https://pasarfishapp-eu7kqgndtsmiy9pwfz9zrr.streamlit.app/"
-    fish_name = fish_names.get(mbti_type, mbti_type)
-    share_text_with_url = "I just discovered I'm a " + fish_name + " 🐟. Take the Pasarfish quiz today to find out which local fish matches your personality!\n" + app_url
+@st.cache_resource
+def load_share_pages():
+    """Landing page URL per fish type that has a share card (built into static/share/ by share_cards.py)"""
+    return share_cards.published_pages()
+
+def share_links(mbti_type, url=APP_URL):
+    """Prefilled share URL for each platform in SHARE_PLATFORMS, sharing url"""
+    fish_name = FISH_NAMES.get(mbti_type, mbti_type)
     share_text = "I just discovered I'm a " + fish_name + " 🐟. Take the Pasarfish quiz today to find out which local fish matches your personality!"
-    
-    x_url = "https://twitter.com/intent/tweet?text=" + quote(share_text_with_url)
-    linkedin_url = "https://www.linkedin.com/sharing/share-offsite/?url=" + quote(app_url)
-    whatsapp_url = "https://wa.me/?text=" + quote(share_text_with_url)
-    telegram_url = "https://t.me/share/url?url=" + quote(app_url) + "&text=" + quote(share_text)
-    
-    st.markdown("""
-        <style>
-        /* Share buttons - responsive layout */
-        .share-container {
-            background-color: white;
-            padding: 2rem;
-            border-radius: 15px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            margin: 2rem auto;
-            max-width: 900px;
-        }
-        
-        .share-icons {
-            display: flex;
-            justify-content: space-around;
-            align-items: center;
-            flex-wrap: wrap;
-            gap: 2rem;
-            padding: 1rem;
-        }
-        
-        /* Mobile: single row, smaller icons, tighter spacing */
-        @media (max-width: 768px) {
-            .share-icons {
-                flex-wrap: nowrap !important;
-                gap: 0.5rem !important;
-                padding: 0.5rem !important;
-                overflow-x: auto;
-                justify-content: space-between;
-            }
-            
-            .share-icons i {
-                font-size: 36px !important;
-            }
-            
-            .share-container {
-                padding: 1rem !important;
-            }
-        }
-        </style>
-        
-        <div class="share-container">
-            <h3 style="text-align: center; color: #333; margin-bottom: 2rem;">📢 Share Your Results!</h3>
-            <div class="share-icons">
-                <div style="text-align: center;">
-                    <a href="https://www.instagram.com/" target="_blank">
-                        <i class="fab fa-instagram" style="font-size: 48px; color: #E4405F;"></i>
-                    </a>
-                </div>
-                <div style="text-align: center;">
-                    <a href=""" + x_url + """ target="_blank">
-                        <i class="fab fa-x-twitter" style="font-size: 48px; color: #000000;"></i>
-                    </a>
-                </div>
-                <div style="text-align: center;">
-                    <a href=""" + linkedin_url + """ target="_blank">
-                        <i class="fab fa-linkedin" style="font-size: 48px; color: #0077B5;"></i>
-                    </a>
-                </div>
-                <div style="text-align: center;">
-                    <a href=""" + whatsapp_url + """ target="_blank">
-                        <i class="fab fa-whatsapp" style="font-size: 48px; color: #25D366;"></i>
-                    </a>
-                </div>
-                <div style="text-align: center;">
-                    <a href=""" + telegram_url + """ target="_blank">
-                        <i class="fab fa-telegram" style="font-size: 48px; color: #0088cc;"></i>
+    share_text_with_url = share_text + "\n" + url
+    return {
+        'instagram': "https://www.instagram.com/",
+        'x': "https://twitter.com/intent/tweet?text=" + quote(share_text_with_url),
+        'linkedin': "https://www.linkedin.com/sharing/share-offsite/?url=" + quote(url),
+        'whatsapp': "https://wa.me/?text=" + quote(share_text_with_url),
+        'telegram': "https://t.me/share/url?url=" + quote(url) + "&text=" + quote(share_text),
+    }
+
+def share_buttons_html(links):
+    """Share box markup - all in white box"""
+    icons = "".join(f"""
+                <div>
+                    <a href="{links[platform]}" target="_blank">
+                        <i class="{icon}"></i>
                     </a>
-                </div>
+                </div>""" for platform, icon in SHARE_PLATFORMS)
+    return f"""
+        <div class="share-container">
+            <h3>📢 Share Your Results!</h3>
+            <div class="share-icons">{icons}
             </div>
-            <div style="text-align: center; margin-top: 1rem; color: #666;">
+            <div class="share-hint">
                 💡 Click on the icons to share!
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """
+
+def result_fish_html(manifest, mbti_type):
+    """The "Your Fish!" heading and fish image of a result page"""
+    heading = "<h2 style='text-align: center;'>🎉 Your Fish!</h2>"
+    fish_image_path = FISH_IMAGES.get(mbti_type)
+    
+    fish_html = assets.picture_html(
+        manifest,
+        fish_image_path,
+        sizes="90vw",
+        alt=FISH_NAMES.get(mbti_type, mbti_type),
+        css_class="result-fish-image"
+    ) if fish_image_path else None
+    
+    if fish_html:
+        # Display the fish image at full width, served from static/
+        return heading + fish_html
+    if fish_image_path and os.path.exists(fish_image_path):
+        # Display the fish image at full width
+        return heading + f'<img src="data:image/png;base64,{get_image_base64(fish_image_path)}" class="result-fish-image" />'
+    # Fallback if image doesn't exist
+    description = mbti_descriptions.get(mbti_type, 'No description available')
+    return heading + f"""
+        <div class="result-box">
+            <h1 style="color: #4CAF50; margin-bottom: 0.5rem;">{mbti_type}</h1>
+            <h3 style="color: #555; margin-top: 0;">{description}</h3>
+            <p style="color: #888;">Fish image not found. Please upload: {fish_image_path}</p>
+        </div>
+        """
+
+@st.cache_resource
+@metrics.timed('result_bundles')
+def load_result_bundles():
+    """Result page pieces for all 16 types, built once per process: {type: {fish_html, image_url, share_links, share_html}}"""
+    manifest = load_asset_manifest()
+    # Share the fish's landing page where there is one, so link previews show its card
+    share_pages = load_share_pages()
+    bundles = {}
+    for mbti_type in question_bank.MBTI_TYPES:
+        links = share_links(mbti_type, share_pages.get(mbti_type, APP_URL))
+        fish_image_path = FISH_IMAGES.get(mbti_type)
+        bundles[mbti_type] = {
+            'fish_html': result_fish_html(manifest, mbti_type),
+            'image_url': assets.image_url(manifest, fish_image_path) if fish_image_path else None,
+            'share_links': links,
+            'share_html': share_buttons_html(links),
+        }
+    return bundles
+
+@metrics.timed('create_share_buttons')
+def create_share_buttons(mbti_type):
+    """Create social media share buttons (markup pre-rendered per fish type)"""
+    st.markdown(load_result_bundles()[mbti_type]['share_html'], unsafe_allow_html=True)
     
+@metrics.timed('show_follow_section')
 def show_follow_section():
     """Display Follow Pasar Fish section - reusable across all pages"""
     st.markdown("""
-        <div style="background-color: white; padding: 2rem; border-radius: 15px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); margin: 2rem auto; max-width: 900px;">
-            <div style="text-align: center; margin-bottom: 2rem;">
-                <h3 style="color: #333; margin-bottom: 0.5rem;">🌐 Follow Pasarfish!</h3>
-                <p style="color: #666;">Stay connected with us for more fishy adventures:</p>
+        <div class="follow-container">
+            <div class="follow-header">
+                <h3>🌐 Follow Pasarfish!</h3>
+                <p>Stay connected with us for more fishy adventures:</p>
             </div>
-            <div style="display: flex; justify-content: space-around; align-items: center; flex-wrap: wrap; gap: 2rem;">
-                <div style="text-align: center; padding: 1rem;">
-                    <a href="https://pasarfish.com" target="_blank" style="text-decoration: none; display: flex; flex-direction: column; align-items: center; gap: 5px;">
-                        <i class="fas fa-globe" style="font-size: 48px; color: #4CAF50;"></i>
-                        <span style="font-size: 14px; color: #4A90E2; font-weight: bold;">Pasarfish.com</span>
+            <div class="follow-icons">
+                <div>
+                    <a href="https://pasarfish.com" target="_blank">
+                        <i class="fas fa-globe brand-web"></i>
+                        <span>Pasarfish.com</span>
                     </a>
                 </div>
-                <div style="text-align: center; padding: 1rem;">
-                    <a href="https://instagram.com/pasarfishsg" target="_blank" style="text-decoration: none; display: flex; flex-direction: column; align-items: center; gap: 5px;">
-                        <i class="fab fa-instagram" style="font-size: 48px; color: #E4405F;"></i>
-                        <span style="font-size: 14px; color: #4A90E2; font-weight: bold;">@Pasarfishsg</span>
+                <div>
+                    <a href="https://instagram.com/pasarfishsg" target="_blank">
+                        <i class="fab fa-instagram brand-instagram"></i>
+                        <span>@Pasarfishsg</span>
                     </a>
                 </div>
-                <div style="text-align: center; padding: 1rem;">
-                    <a href="https://linkedin.com/company/pasarfish" target="_blank" style="text-decoration: none; display: flex; flex-direction: column; align-items: center; gap: 5px;">
-                        <i class="fab fa-linkedin" style="font-size: 48px; color: #0077B5;"></i>
-                        <span style="font-size: 14px; color: #4A90E2; font-weight: bold;">@Pasarfish</span>
+                <div>
+                    <a href="https://linkedin.com/company/pasarfish" target="_blank">
+                        <i class="fab fa-linkedin brand-linkedin"></i>
+                        <span>@Pasarfish</span>
                     </a>
                 </div>
-                <div style="text-align: center; padding: 1rem;">
-                    <a href="https://www.facebook.com/p/Pasarfishsg-61568193013803/" target="_blank" style="text-decoration: none; display: flex; flex-direction: column; align-items: center; gap: 5px;">
-                        <i class="fab fa-facebook" style="font-size: 48px; color: #1877F2;"></i>
-                        <span style="font-size: 14px; color: #4A90E2; font-weight: bold;">@Pasarfishsg</span>
+                <div>
+                    <a href="https://www.facebook.com/p/Pasarfishsg-61568193013803/" target="_blank">
+                        <i class="fab fa-facebook brand-facebook"></i>
+                        <span>@Pasarfishsg</span>
                     </a>
                 </div>
             </div>
         </div>
     """, unsafe_allow_html=True)
     
-def track_click(click_type, platform, mbti_type=None, source=None):
-    """Track button clicks (shares and follows) to Google Sheets"""
-    try:
-        client = get_gsheet_connection()
-        if client is None:
-            return
-            
-        sheet_name = st.secrets.get("sheet_name", "MBTI_Survey_Responses")
-        spreadsheet = client.open(sheet_name)
-        
-        # Try to get or create the 'Clicks' worksheet
-        try:
-            clicks_sheet = spreadsheet.worksheet("Clicks")
-        except:
-            # Create it if it doesn't exist
-            clicks_sheet = spreadsheet.add_worksheet(title="Clicks", rows="10000", cols="6")
-            clicks_sheet.append_row(["Timestamp", "Click_Type", "Platform", "MBTI_Type", "Source", "User_Session"])
-        
-        # Add click data
-        import uuid
-        session_id = st.session_state.get('session_id', str(uuid.uuid4()))
-        if 'session_id' not in st.session_state:
-            st.session_state.session_id = session_id
-            
-        click_data = [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            click_type,  # "share" or "follow"
-            platform,    # "instagram", "facebook", "linkedin", etc.
-            mbti_type if mbti_type else "N/A",
-            source if source else "unknown",
-            session_id
-        ]
-        clicks_sheet.append_row(click_data)
-    except Exception as e:
-        # Silently fail to not disrupt user experience
-        pass
-
 def initialize_session_state():
-    """Initialize session state variables"""
-    if 'current_step' not in st.session_state:
-        st.session_state.current_step = 0  # 0 = demographics, 1-12 = questions, 13 = results
-    if 'answers' not in st.session_state:
-        st.session_state.answers = {}
-    if 'demographics' not in st.session_state:
-        st.session_state.demographics = {}
-    if 'survey_complete' not in st.session_state:
-        st.session_state.survey_complete = False
-    if 'mbti_result' not in st.session_state:
-        st.session_state.mbti_result = None
-    
-    # Time tracking
-    if 'start_time' not in st.session_state:
-        st.session_state.start_time = datetime.now()
-    if 'question_start_times' not in st.session_state:
-        st.session_state.question_start_times = {}
-    if 'question_durations' not in st.session_state:
-        st.session_state.question_durations = {}
-    if 'page_start_time' not in st.session_state:
-        st.session_state.page_start_time = datetime.now()
+    """This session's quiz state, created on the first visit"""
+    if 'quiz' not in st.session_state:
+        st.session_state.quiz = QuizState(QUESTION_OPTIONS)
+    return st.session_state.quiz
 
 def show_progress():
     """Display progress bar"""
     total_steps = 13  # 1 demographics + 12 questions
-    current = st.session_state.current_step
+    current = st.session_state.quiz.step
     
     # Skip progress bar on demographics page (step 0)
     if current == 0:
@@ -674,6 +457,7 @@ def show_progress():
     else:
         st.caption("✅ Complete!")
 
+@metrics.timed('page.demographics')
 def demographics_page():
     """Show demographics collection page"""
     
@@ -682,12 +466,7 @@ def demographics_page():
         <h1 style="text-align: center;">🐟 Which Local Fish Are You? </h1>
     """, unsafe_allow_html=True)
     
-    # Function to convert image to base64
-    def get_image_base64(image_path):
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    
-    # Find and encode the image
+    # Find the logo image
     image_path = None
     if os.path.exists('Pasar Fish.png'):
         image_path = 'Pasar Fish.png'
@@ -699,14 +478,24 @@ def demographics_page():
         image_path = 'images/Pasar Fish.jpg'
     
     if image_path:
-        img_base64 = get_image_base64(image_path)
-        img_extension = 'png' if image_path.endswith('.png') else 'jpeg'
+        # Served by URL from static/ so the browser caches it; inline base64 only as a fallback
+        with metrics.span('image_html'):
+            logo_html = assets.picture_html(
+                load_asset_manifest(),
+                image_path,
+                sizes="(max-width: 768px) 90vw, 700px",
+                alt="Pasar Fish",
+                style="max-width: 100%; height: auto; border-radius: 10px;"
+            )
+            if logo_html is None:
+                img_extension = 'png' if image_path.endswith('.png') else 'jpeg'
+                logo_html = f"""<img src="data:image/{img_extension};base64,{get_image_base64(image_path)}"
+                         style="max-width: 100%; height: auto; border-radius: 10px;"
+                         alt="Pasar Fish">"""
         
         st.markdown(f"""
             <div style="background-color: white; padding: 2rem; border-radius: 15px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); margin: 2rem auto; max-width: 700px; text-align: center;">
-                <img src="data:image/{img_extension};base64,{img_base64}" 
-                     style="max-width: 100%; height: auto; border-radius: 10px;" 
-                     alt="Pasar Fish">
+                {logo_html}
             </div>
         """, unsafe_allow_html=True)
     
@@ -716,9 +505,10 @@ def demographics_page():
         <h4 style="text-align: center;">Let's start with a few details about you.</h4>
     """, unsafe_allow_html=True)
     
-    # Track page start time (only set once per page load)
-    if 'demographics_start_time' not in st.session_state:
-        st.session_state.demographics_start_time = datetime.now()
+    # Time the form from when it's first shown
+    quiz = st.session_state.quiz
+    if not quiz.clock_started('demographics'):
+        quiz.start_clock('demographics')
     
     st.markdown("---")
     st.markdown("### 🌎 Demographics")
@@ -728,13 +518,13 @@ def demographics_page():
     with col1:
         age = st.selectbox(
             "Age Range *",
-            ["Select an option", "Under 18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"],
+            ["Select an option"] + AGE_OPTIONS,
             key="age_select"
         )
         
         gender = st.selectbox(
             "Gender *",
-            ["Select an option", "Male", "Female", "Non-binary", "Other", "Prefer not to say"],
+            ["Select an option"] + GENDER_OPTIONS,
             key="gender_select"
         )
     
@@ -742,19 +532,19 @@ def demographics_page():
         # Searchable country dropdown
         country = st.selectbox(
             "Country (optional)",
-            countries,
+            COUNTRY_OPTIONS,
             key="country_input"
         )
         
         occupation = st.selectbox(
             "Occupation *",
-            ["Select an option", "Student", "Professional", "Self-employed", "Retired", "Unemployed", "Other"],
+            ["Select an option"] + OCCUPATION_OPTIONS,
             key="occupation_select"
         )
     
     referral_source = st.selectbox(
         "How did you hear about this test? *",
-        ["Select an option", "Social Media", "Friend/Family", "Search Engine", "Website/Blog", "Other"],
+        ["Select an option"] + REFERRAL_OPTIONS,
         key="referral_select"
     )
     
@@ -791,40 +581,74 @@ def demographics_page():
                 st.error("❌ Please provide consent to proceed with the survey")
                 return
             
-            # Calculate time spent on demographics
-            demographics_duration = (datetime.now() - st.session_state.demographics_start_time).total_seconds()
-            
-            # Save demographics (including consent)
-            st.session_state.demographics = {
-                'age': age,
-                'gender': gender,
-                'country': country if country else "Not specified",
-                'occupation': occupation,
-                'referral_source': referral_source,
-                'pdpa_consent': 'Yes',  # Only saved if they checked it
-                'demographics_time': round(demographics_duration, 2)
-            }
+            # Save demographics and time spent on them (consent is implied by getting here)
+            quiz.stop_clock('demographics')
+            quiz.set_demographics(age, gender, country, occupation, referral_source)
             
             # Set start time for first question
-            st.session_state.question_start_times['Q1'] = datetime.now()
-            st.session_state.current_step = 1
+            quiz.start_clock('Q1')
+            quiz.step = 1
             st.rerun()
+    
+    # Warm the browser cache with the first question's image while the form is filled in
+    prefetch = assets.prefetch_html(load_asset_manifest(), [questions['Q1']['image']], sizes=QUESTION_IMAGE_SIZES)
+    if prefetch:
+        st.markdown(prefetch, unsafe_allow_html=True)
             
     # Add follow section at bottom
     st.markdown("<br><br>", unsafe_allow_html=True)
     show_follow_section()
     
-def question_page(question_num):
-    """Show individual question page"""
+# Rendered width of question art, for picking an image variant
+QUESTION_IMAGE_SIZES = "(max-width: 768px) 90vw, 60vw"
+
+@metrics.timed('page.question')
+def question_page():
+    """Show the question flow - the chrome around it is only sent on full reruns"""
+    # Compact title
+    st.markdown(f'<h2 style="text-align: center; margin: 0.5rem 0;font-weight: 800;">🐟 Which Local Fish Are You?</h2>', unsafe_allow_html=True)
+    
+    question_fragment()
+    
+    # Add follow section at bottom of every question page
+    st.markdown("<br>", unsafe_allow_html=True)
+    show_follow_section()
+
+@st.fragment
+def question_fragment():
+    """Current question, answer and navigation.
+    
+    Picking an answer or clicking Previous/Next reruns only this fragment, so the
+    global CSS, the sidebar, the title and the follow section stay as
+    the browser already has them. Only Get Results reruns the whole page.
+    """
+    with metrics.fragment('rerun.question_fragment'):
+        question_step(st.session_state.quiz.step)
+
+def leave_question(question_num, step):
+    """on_click for Previous (step=-1) / Next (step=1): record this question's answer and time, then move"""
+    q_id = f'Q{question_num}'
+    quiz = st.session_state.quiz
+    answer = st.session_state.get(f"radio_{q_id}")
+    if answer is not None:
+        quiz.set_answer(q_id, answer)
+    
+    # Record time spent on current question - going back only records it the first time
+    quiz.stop_clock(q_id, overwrite=step > 0)
+    
+    # (Re)start the clock on the question being moved to
+    quiz.start_clock(f'Q{question_num + step}')
+    quiz.step += step
+
+def question_step(question_num):
+    """Show individual question"""
     q_id = f'Q{question_num}'
     q_data = questions[q_id]
+    quiz = st.session_state.quiz
     
     # Set start time for this question if not already set
-    if q_id not in st.session_state.question_start_times:
-        st.session_state.question_start_times[q_id] = datetime.now()
-    
-    # Compact title
-    st.markdown(f'<h2 style="text-align: center; margin: 0.5rem 0;font-weight: 800;">🐟 Which Local Fish Are You?</h2>', unsafe_allow_html=True)
+    if not quiz.clock_started(q_id):
+        quiz.start_clock(q_id)
     
     show_progress()
     
@@ -841,7 +665,19 @@ def question_page(question_num):
         if q_data['image'].startswith('http'):
             st.markdown(f'<img src="{q_data["image"]}" style="max-width: 100%; max-height: 30vh; display: block; margin: 0.5rem auto; border-radius: 10px;" />', unsafe_allow_html=True)
         else:
-            if os.path.exists(q_data['image']):
+            # Serve a pre-sized AVIF/WebP variant picked by the browser for its viewport
+            with metrics.span('image_html'):
+                picture = assets.picture_html(
+                    load_asset_manifest(),
+                    q_data['image'],
+                    sizes=QUESTION_IMAGE_SIZES,
+                    alt=q_id,
+                    style="max-width: 100%; max-height: 30vh; display: block; margin: 0.5rem auto; border-radius: 10px;",
+                    fetchpriority="high"
+                )
+            if picture:
+                st.markdown(picture, unsafe_allow_html=True)
+            elif os.path.exists(q_data['image']):
                 # Use columns to center and constrain
                 col1, col2, col3 = st.columns([1, 3, 1])
                 with col2:
@@ -852,7 +688,7 @@ def question_page(question_num):
     # Answer options - compact
     st.markdown("### Choose one:")
     
-    current_answer = st.session_state.answers.get(q_id)
+    current_answer = quiz.answer(q_id)
     
     answer = st.radio(
         "Select your answer:",
@@ -863,7 +699,7 @@ def question_page(question_num):
         label_visibility="collapsed"
     )
     
-    st.session_state.answers[q_id] = answer
+    quiz.set_answer(q_id, answer)
     
     st.markdown("---")
     
@@ -874,126 +710,100 @@ def question_page(question_num):
     # Desktop order: Previous (left), empty (middle), Next (right)
     # Mobile will stack: Next, Previous (via CSS reordering)
     
+    # Previous/Next move in their on_click callback, so the fragment rerun the click
+    # triggers already renders the new question - no second st.rerun() needed
     with col1:
         if question_num > 1:
-            if st.button("⬅️ Previous", use_container_width=True, key="prev_btn"):
-                # Record time spent on current question before going back
-                if q_id in st.session_state.question_start_times:
-                    duration = (datetime.now() - st.session_state.question_start_times[q_id]).total_seconds()
-                    # Only update if this is the first time recording or going back
-                    if q_id not in st.session_state.question_durations:
-                        st.session_state.question_durations[q_id] = round(duration, 2)
-                
-                st.session_state.current_step -= 1
-                prev_q_id = f'Q{question_num - 1}'
-                # Reset start time for previous question
-                st.session_state.question_start_times[prev_q_id] = datetime.now()
-                st.rerun()
+            st.button("⬅️ Previous", use_container_width=True, key="prev_btn",
+                      on_click=leave_question, args=(question_num, -1))
     
     with col3:
         if question_num < 12:
-            if st.button("Next ➡️", use_container_width=True, type="primary", key="next_btn"):
-                # Record time spent on current question
-                if q_id in st.session_state.question_start_times:
-                    duration = (datetime.now() - st.session_state.question_start_times[q_id]).total_seconds()
-                    st.session_state.question_durations[q_id] = round(duration, 2)
-                
-                # Set start time for next question
-                next_q_id = f'Q{question_num + 1}'
-                st.session_state.question_start_times[next_q_id] = datetime.now()
-                
-                st.session_state.current_step += 1
-                st.rerun()
+            st.button("Next ➡️", use_container_width=True, type="primary", key="next_btn",
+                      on_click=leave_question, args=(question_num, 1))
         else:
             if st.button("🎯 Get Results", use_container_width=True, type="primary", key="results_btn"):
                 # Record time spent on final question
-                if q_id in st.session_state.question_start_times:
-                    duration = (datetime.now() - st.session_state.question_start_times[q_id]).total_seconds()
-                    st.session_state.question_durations[q_id] = round(duration, 2)
+                quiz.stop_clock(q_id)
                 
                 calculate_and_save_result()
+                # The results page replaces the whole layout, so this one reruns the full script
                 st.rerun()
                 
-    # Add follow section at bottom of every question page
-    st.markdown("<br>", unsafe_allow_html=True)
-    show_follow_section()
-    
+    # Warm the browser cache with the next (then previous) question's image while this one is read
+    neighbours = [f'Q{n}' for n in (question_num + 1, question_num - 1) if f'Q{n}' in questions]
+    prefetch = assets.prefetch_html(
+        load_asset_manifest(),
+        [questions[n]['image'] for n in neighbours],
+        sizes=QUESTION_IMAGE_SIZES
+    )
+    if prefetch:
+        st.markdown(prefetch, unsafe_allow_html=True)
+    
+def build_survey_data(demographics, answers, question_times, total_time, mbti_type, dimensions):
+    """One responses-sheet row, in RESPONSE_COLUMNS order"""
+    return {
+        'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'Age': demographics['age'],
+        'Gender': demographics['gender'],
+        'Country': demographics['country'],
+        'Occupation': demographics['occupation'],
+        'Referral_Source': demographics['referral_source'],
+        'Demographics_Time': demographics.get('demographics_time', 0),
+        **answers,  # Add all Q1-Q12 answers
+        **question_times,  # Add all Q1_Time through Q12_Time
+        'Total_Survey_Time': round(total_time, 2),
+        **dimensions,
+        'MBTI_Type': mbti_type,
+        'Response_ID': str(uuid.uuid4())  # Lets outbox retries skip rows already written
+    }
+
 def calculate_and_save_result():
     """Calculate MBTI result and save to Google Sheets"""
     try:
-        df = load_mbti_data()
+        engine = load_scoring_engine()
     except FileNotFoundError:
         st.error("⚠️ Excel file 'Updated_combinations.xlsx' not found.")
         return
     
-    # Look up MBTI type
-    mask = pd.Series([True] * len(df))
-    for q_id, answer in st.session_state.answers.items():
-        mask &= (df[q_id] == answer)
+    quiz = st.session_state.quiz
+    answers = quiz.answers()
     
-    result = df[mask]
+    # Look up MBTI type
+    with metrics.span('scoring'):
+        result = engine.lookup(answers)
     
-    if len(result) > 0:
-        mbti_type = result.iloc[0]['MBTI Type']
+    if result is not None:
+        mbti_type, dimensions = result
         
         # Calculate total survey time
-        total_time = (datetime.now() - st.session_state.start_time).total_seconds()
+        total_time = quiz.elapsed()
         
-        # Get individual question times (with defaults for any missing)
-        question_times = {}
-        for i in range(1, 13):
-            q_id = f'Q{i}'
-            question_times[f'{q_id}_Time'] = st.session_state.question_durations.get(q_id, 0)
-        
-        # Prepare data for Google Sheets
-        survey_data = {
-            'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'Age': st.session_state.demographics['age'],
-            'Gender': st.session_state.demographics['gender'],
-            'Country': st.session_state.demographics['country'],
-            'Occupation': st.session_state.demographics['occupation'],
-            'Referral_Source': st.session_state.demographics['referral_source'],
-            'Demographics_Time': st.session_state.demographics.get('demographics_time', 0),
-            **st.session_state.answers,  # Add all Q1-Q12 answers
-            **question_times,  # Add all Q1_Time through Q12_Time
-            'Total_Survey_Time': round(total_time, 2),
-            'E_I': result.iloc[0]['E/I'],
-            'S_N': result.iloc[0]['S/N'],
-            'T_F': result.iloc[0]['T/F'],
-            'J_P': result.iloc[0]['J/P'],
-            'MBTI_Type': mbti_type
-        }
+        # Prepare data for Google Sheets (questions never timed count as 0)
+        survey_data = build_survey_data(
+            quiz.demographics, answers, quiz.question_times(),
+            total_time, mbti_type, dimensions
+        )
         
         # Save to Google Sheets
         saved = save_to_google_sheets(survey_data)
         
-        # Store result
-        st.session_state.mbti_result = {
-            'type': mbti_type,
-            'dimensions': {
-                'E_I': result.iloc[0]['E/I'],
-                'S_N': result.iloc[0]['S/N'],
-                'T_F': result.iloc[0]['T/F'],
-                'J_P': result.iloc[0]['J/P']
-            },
-            'saved': saved,
-            'total_time': round(total_time, 2),
-            'question_times': question_times
-        }
-        st.session_state.survey_complete = True
-        st.session_state.current_step = 13
+        # Store result and move to the results page
+        quiz.set_result(mbti_type, saved, total_time)
 
+@metrics.timed('page.results')
 def show_results():
     """Display survey results"""
-    if not st.session_state.mbti_result:
+    quiz = st.session_state.quiz
+    result = quiz.result
+    if not result:
         st.error("No results available")
         return
     
-    mbti_type = st.session_state.mbti_result['type']
-    dimensions = st.session_state.mbti_result['dimensions']
-    saved = st.session_state.mbti_result['saved']
-    total_time = st.session_state.mbti_result.get('total_time', 0)
-    description = mbti_descriptions.get(mbti_type, 'No description available')
+    mbti_type = result['type']
+    saved = result['saved']
+    total_time = result['total_time']
+    bundle = load_result_bundles()[mbti_type]
     
     st.title("🐟 Which Local Fish Are You?")
     
@@ -1012,39 +822,15 @@ def show_results():
     
     st.info(f"⏱️ Completed in: {time_str}")
     
-    st.markdown("<h2 style='text-align: center;'>🎉 Your Fish!</h2>", unsafe_allow_html=True)
-
-    # Display fish image instead of MBTI type text
-    fish_image_path = fish_images.get(mbti_type)
-
-    if fish_image_path and os.path.exists(fish_image_path):
-        # Display the fish image at full width
-        st.markdown(f'<img src="data:image/png;base64,{get_image_base64(fish_image_path)}" class="result-fish-image" />', unsafe_allow_html=True)
-    else:
-        # Fallback if image doesn't exist
-        st.markdown(f"""
-        <div class="result-box">
-            <h1 style="color: #4CAF50; margin-bottom: 0.5rem;">{mbti_type}</h1>
-            <h3 style="color: #555; margin-top: 0;">{description}</h3>
-            <p style="color: #888;">Fish image not found. Please upload: {fish_image_path}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Heading and fish image, pre-rendered per type
+    st.markdown(bundle['fish_html'], unsafe_allow_html=True)
 
     # Retake button - smaller and centered
     col1, col2, col3 = st.columns([1.5, 1, 1.5])
     with col2:
         if st.button("🔄 Retake Quiz", use_container_width=True):
             # Reset everything
-            st.session_state.current_step = 0
-            st.session_state.answers = {}
-            st.session_state.demographics = {}
-            st.session_state.survey_complete = False
-            st.session_state.mbti_result = None
-            st.session_state.start_time = datetime.now()
-            st.session_state.question_start_times = {}
-            st.session_state.question_durations = {}
-            if 'demographics_start_time' in st.session_state:
-                del st.session_state.demographics_start_time
+            quiz.reset()
             st.rerun()
     
     # Share buttons
@@ -1058,18 +844,86 @@ def show_results():
     
 def survey_page():
     """Main survey page controller"""
-    initialize_session_state()
+    quiz = initialize_session_state()
     
     # Route to appropriate page based on current step
-    if st.session_state.current_step == 0:
+    if quiz.step == 0:
         demographics_page()
-    elif 1 <= st.session_state.current_step <= 12:
-        question_page(st.session_state.current_step)
-    elif st.session_state.current_step == 13:
+    elif 1 <= quiz.step < RESULTS_STEP:
+        question_page()
+    elif quiz.step == RESULTS_STEP:
         show_results()
 
+# Seconds between checks that the dashboard aggregates still match the sheet
+AGGREGATE_CHECK_INTERVAL = 60
+
+def outbox_responses():
+    """Responses submitted here that haven't reached the sheet yet, as survey_data dicts"""
+    outbox = get_response_writer().outbox
+    return [dict(zip(RESPONSE_COLUMNS, row)) for _, _, row, _, _ in outbox.undelivered(outbox.undelivered_count())]
+
+@metrics.timed('rebuild_aggregates')
+def rebuild_aggregates_from_sheets(sync=True):
+    """Recompute the aggregate store from every raw row in the responses sheet, plus this replica's unsent ones"""
+    # Only the columns the aggregates use (plus older names for the type column)
+    df = load_responses_from_sheets(columns=SOURCE_COLUMNS + ['MBTI Type', 'mbti_type'], sync=sync)
+    if df is None:
+        return False
+    
+    # Older sheets may name the type column differently
+    for column in ['MBTI Type', 'mbti_type']:
+        if 'MBTI_Type' not in df.columns and column in df.columns:
+            df = df.rename(columns={column: 'MBTI_Type'})
+    if 'MBTI_Type' not in df.columns:
+        st.error("⚠️ MBTI_Type column not found in data. Please check your Google Sheets column names.")
+        st.write("Available columns:", df.columns.tolist())
+        return False
+    
+    state = get_response_snapshot().state
+    get_aggregate_store().rebuild_from_frame(df, load_scoring_engine().options, source=state and state['generation'],
+                                             extra_rows=outbox_responses())
+    return True
+
+def reconcile_aggregates(store):
+    """Rebuild the aggregates if they've drifted from the sheet.
+    
+    Submissions are counted as they're made, but only on the replica that took them,
+    and edited or deleted sheet rows (or an old aggregates file) aren't seen at all.
+    Every AGGREGATE_CHECK_INTERVAL seconds the snapshot is synced, and the store is
+    rebuilt unless it was built from the same snapshot generation and holds exactly
+    the sheet's rows plus the ones still in this replica's outbox.
+    """
+    if not store.due_for_check(AGGREGATE_CHECK_INTERVAL):
+        return
+    if not sync_responses():
+        return
+    state = get_response_snapshot().state
+    if state is None:
+        return
+    if not store.in_sync(state['generation'], state['cursor'] + get_response_writer().outbox.undelivered_count()):
+        with st.spinner("Updating statistics from Google Sheets..."):
+            rebuild_aggregates_from_sheets(sync=False)
+
+def counts_series(counts, sort=True):
+    """Turn a {value: count} dict into a Series ordered like value_counts()"""
+    series = pd.Series(counts, dtype=None if counts else 'int64')
+    return series.sort_values(ascending=False, kind='stable') if sort else series
+
+def fish_crosstab(store, row_field):
+    """row_field x Fish_Name count table, shaped like pd.crosstab"""
+    table = pd.DataFrame(store.crosstab(row_field, 'MBTI_Type')).T.fillna(0).astype('int64')
+    table = table.rename(columns=FISH_NAMES)
+    return table.sort_index().sort_index(axis=1)
+
+def format_duration(seconds):
+    return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+
+@metrics.timed('page.analytics')
 def analytics_page():
     """Analytics dashboard page"""
+    # Plotly is only needed here - importing it lazily keeps it off the quiz's cold start
+    import plotly.express as px
+    import plotly.graph_objects as go
     
     st.markdown(
         """
@@ -1081,44 +935,46 @@ def analytics_page():
         unsafe_allow_html=True
     )
 
-    # Load data from Google Sheets
-    with st.spinner("Loading analytics data..."):
-        df = load_responses_from_sheets()
+    store = get_aggregate_store()
+    
+    # Aggregates are kept up to date on every submission, and rebuilt from the sheet when asked,
+    # when empty, or when they no longer match it
+    rebuild = st.button("🔄 Rebuild statistics from Google Sheets")
+    if rebuild or store.rows == 0:
+        with st.spinner("Loading analytics data..."):
+            if not rebuild_aggregates_from_sheets() and rebuild:
+                return
+    else:
+        reconcile_aggregates(store)
     
-    if df is None or len(df) == 0:
+    if store.rows == 0:
         st.info("📭 No quiz responses yet. Share your fish quiz to start collecting data! 🐟")
         return
-
-    # Map MBTI types to fish names - ADD THIS SECTION HERE
-    if 'MBTI_Type' in df.columns:
-        df['Fish_Name'] = df['MBTI_Type'].map(fish_names)
-    elif 'MBTI Type' in df.columns:
-        df['Fish_Name'] = df['MBTI Type'].map(fish_names)
-    elif 'mbti_type' in df.columns:
-        df['Fish_Name'] = df['mbti_type'].map(fish_names)
-    else:
-        st.error("⚠️ MBTI_Type column not found in data. Please check your Google Sheets column names.")
-        st.write("Available columns:", df.columns.tolist())
-        return
+    
+    total = store.rows
+    type_counts_by_mbti = counts_series(store.counts('MBTI_Type'))
+    
+    # Each chart's time (building the figure plus sending it) is recorded as chart.<name>
+    chart = metrics.laps('chart')
     
     # Overview metrics
     st.markdown("## 📈 Overview")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Responses", len(df))
+        st.metric("Total Responses", total)
     
     with col2:
-        unique_types = df['MBTI_Type'].nunique()
+        unique_types = len(type_counts_by_mbti)
         st.metric("Unique Fish Types", unique_types)
     
     with col3:
-        most_common_mbti = df['MBTI_Type'].mode()[0] if len(df) > 0 else "N/A"
-        most_common_fish = fish_names.get(most_common_mbti, most_common_mbti)
+        most_common_mbti = type_counts_by_mbti.index[0] if len(type_counts_by_mbti) > 0 else "N/A"
+        most_common_fish = FISH_NAMES.get(most_common_mbti, most_common_mbti)
         st.metric("Most Common Fish", most_common_fish)
     
     with col4:
-        today_responses = len(df[pd.to_datetime(df['Timestamp']).dt.date == datetime.now().date()])
+        today_responses = store.counts('Date').get(datetime.now().strftime('%Y-%m-%d'), 0)
         st.metric("Today's Responses", today_responses)
     
     st.markdown("---")
@@ -1130,7 +986,7 @@ def analytics_page():
     
     with col1:
         # Pie chart with fish names - using extended color palette
-        type_counts = df['Fish_Name'].value_counts()
+        type_counts = type_counts_by_mbti.rename(index=FISH_NAMES)
         
         # Create a color palette with 16+ distinct colors
         colors = px.colors.qualitative.Light24  # Has 24 colors
@@ -1143,6 +999,7 @@ def analytics_page():
         )
         fig_pie.update_traces(textposition='inside', textinfo='percent+label')
         st.plotly_chart(fig_pie, use_container_width=True)
+        chart('fish_types_pie')
     
     with col2:
         # Bar chart with fish names
@@ -1156,6 +1013,7 @@ def analytics_page():
         )
         fig_bar.update_xaxes(tickangle=-45)
         st.plotly_chart(fig_bar, use_container_width=True)
+        chart('fish_types_bar')
     
     st.markdown("---")
     
@@ -1166,7 +1024,7 @@ def analytics_page():
     
     with col1:
         # Age distribution
-        age_counts = df['Age'].value_counts()
+        age_counts = counts_series(store.counts('Age'))
         fig_age = px.bar(
             x=age_counts.index,
             y=age_counts.values,
@@ -1176,10 +1034,11 @@ def analytics_page():
             color_continuous_scale='Blues'
         )
         st.plotly_chart(fig_age, use_container_width=True)
+        chart('age')
     
     with col2:
         # Gender distribution
-        gender_counts = df['Gender'].value_counts()
+        gender_counts = counts_series(store.counts('Gender'))
         fig_gender = px.pie(
             values=gender_counts.values,
             names=gender_counts.index,
@@ -1187,10 +1046,11 @@ def analytics_page():
             hole=0.3
         )
         st.plotly_chart(fig_gender, use_container_width=True)
+        chart('gender')
     
     # Occupation
     st.markdown("### 💼 Occupation Distribution")
-    occupation_counts = df['Occupation'].value_counts()
+    occupation_counts = counts_series(store.counts('Occupation'))
     fig_occupation = px.bar(
         x=occupation_counts.index,
         y=occupation_counts.values,
@@ -1200,13 +1060,14 @@ def analytics_page():
         color_continuous_scale='Greens'
     )
     st.plotly_chart(fig_occupation, use_container_width=True)
+    chart('occupation')
     
     st.markdown("---")
     
     # Timeline
     st.markdown("## 📅 Response Timeline")
-    df['Date'] = pd.to_datetime(df['Timestamp']).dt.date
-    daily_counts = df.groupby('Date').size().reset_index(name='Responses')
+    daily_counts = counts_series(store.counts('Date'), sort=False).sort_index()
+    daily_counts = daily_counts.rename_axis('Date').reset_index(name='Responses')
     
     fig_timeline = px.line(
         daily_counts,
@@ -1225,11 +1086,12 @@ def analytics_page():
     )
     
     st.plotly_chart(fig_timeline, use_container_width=True)
+    chart('timeline')
     st.markdown("---")
     
     # Referral Source
     st.markdown("## 🔗 Referral Sources")
-    referral_counts = df['Referral_Source'].value_counts()
+    referral_counts = counts_series(store.counts('Referral_Source'))
     fig_referral = px.bar(
         x=referral_counts.index,
         y=referral_counts.values,
@@ -1239,14 +1101,16 @@ def analytics_page():
         color_continuous_scale='Purples'
     )
     st.plotly_chart(fig_referral, use_container_width=True)
+    chart('referral')
 
     st.markdown("---")
     
     # Time Analytics Section
     st.markdown("## ⏱️ Time Analytics")
     
-    # Check if time columns exist in the data
-    time_cols_exist = 'Total_Survey_Time' in df.columns
+    # Check if time data exists
+    time_stats = store.time_stats()
+    time_cols_exist = time_stats['count'] > 0
     
     if time_cols_exist:
         # Overall time statistics
@@ -1255,48 +1119,56 @@ def analytics_page():
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_time = df['Total_Survey_Time'].mean()
-            st.metric("Average Time", f"{int(avg_time // 60)}m {int(avg_time % 60)}s")
+            avg_time = time_stats['sum'] / time_stats['count']
+            st.metric("Average Time", format_duration(avg_time))
         
         with col2:
-            median_time = df['Total_Survey_Time'].median()
-            st.metric("Median Time", f"{int(median_time // 60)}m {int(median_time % 60)}s")
+            median_time = quantile_from_bins(time_stats['bins'], 0.5)
+            st.metric("Median Time (approx.)", format_duration(median_time),
+                      help=f"Estimated from completion times grouped into {TIME_BIN}-second bins")
         
         with col3:
-            min_time = df['Total_Survey_Time'].min()
-            st.metric("Fastest", f"{int(min_time // 60)}m {int(min_time % 60)}s")
+            min_time = time_stats['min']
+            st.metric("Fastest", format_duration(min_time))
         
         with col4:
-            max_time = df['Total_Survey_Time'].max()
-            st.metric("Slowest", f"{int(max_time // 60)}m {int(max_time % 60)}s")
+            max_time = time_stats['max']
+            st.metric("Slowest", format_duration(max_time))
         
         # Distribution of completion times
         st.markdown("### 📈 Completion Time Distribution")
         col1, col2 = st.columns(2)
         
         with col1:
-            # Histogram
-            fig_hist = px.histogram(
-                df,
-                x='Total_Survey_Time',
-                nbins=20,
+            # Histogram (pre-binned in TIME_BIN second buckets)
+            fig_hist = px.bar(
+                x=[start + TIME_BIN / 2 for start in time_stats['bins']],
+                y=list(time_stats['bins'].values()),
                 title="Distribution of Total Survey Time",
-                labels={'Total_Survey_Time': 'Time (seconds)', 'count': 'Number of Responses'},
+                labels={'x': 'Time (seconds)', 'y': 'Number of Responses'},
                 color_discrete_sequence=['#4CAF50']
             )
-            fig_hist.update_layout(showlegend=False)
+            fig_hist.update_traces(width=TIME_BIN)
+            fig_hist.update_layout(showlegend=False, bargap=0)
             st.plotly_chart(fig_hist, use_container_width=True)
+            chart('time_histogram')
         
         with col2:
-            # Box plot
-            fig_box = px.box(
-                df,
-                y='Total_Survey_Time',
-                title="Survey Time Box Plot",
-                labels={'Total_Survey_Time': 'Time (seconds)'},
-                color_discrete_sequence=['#2196F3']
-            )
+            # Box plot from binned quartiles (the fences and mean are exact)
+            fig_box = go.Figure(go.Box(
+                name='Total_Survey_Time',
+                q1=[quantile_from_bins(time_stats['bins'], 0.25)],
+                median=[median_time],
+                q3=[quantile_from_bins(time_stats['bins'], 0.75)],
+                lowerfence=[min_time],
+                upperfence=[max_time],
+                mean=[avg_time],
+                marker_color='#2196F3'
+            ))
+            fig_box.update_layout(title="Survey Time Box Plot (approx. quartiles)", yaxis_title='Time (seconds)')
             st.plotly_chart(fig_box, use_container_width=True)
+            st.caption(f"Median and quartiles are estimated from {TIME_BIN}-second bins; min, max and mean are exact.")
+            chart('time_box')
         
     else:
         st.info("⏱️ Time tracking data not available for this dataset.")
@@ -1311,7 +1183,7 @@ def analytics_page():
     with col1:
         # Age vs Fish Type
         st.markdown("### Age Distribution by Fish Type")
-        age_fish_crosstab = pd.crosstab(df['Age'], df['Fish_Name'])
+        age_fish_crosstab = fish_crosstab(store, 'Age')
         fig_age_fish = px.imshow(
             age_fish_crosstab,
             labels=dict(x="Fish Type", y="Age Range", color="Count"),
@@ -1321,11 +1193,12 @@ def analytics_page():
         )
         fig_age_fish.update_xaxes(tickangle=-45)
         st.plotly_chart(fig_age_fish, use_container_width=True)
+        chart('age_fish')
     
     with col2:
         # Gender vs Fish Type
         st.markdown("### Gender Distribution by Fish Type")
-        gender_fish_crosstab = pd.crosstab(df['Gender'], df['Fish_Name'])
+        gender_fish_crosstab = fish_crosstab(store, 'Gender')
         fig_gender_fish = px.imshow(
             gender_fish_crosstab,
             labels=dict(x="Fish Type", y="Gender", color="Count"),
@@ -1335,10 +1208,11 @@ def analytics_page():
         )
         fig_gender_fish.update_xaxes(tickangle=-45)
         st.plotly_chart(fig_gender_fish, use_container_width=True)
+        chart('gender_fish')
     
     # Occupation vs Fish Type
     st.markdown("### Occupation Distribution by Fish Type")
-    occupation_fish_crosstab = pd.crosstab(df['Occupation'], df['Fish_Name'])
+    occupation_fish_crosstab = fish_crosstab(store, 'Occupation')
     fig_occ_fish = px.imshow(
         occupation_fish_crosstab,
         labels=dict(x="Fish Type", y="Occupation", color="Count"),
@@ -1348,18 +1222,20 @@ def analytics_page():
     )
     fig_occ_fish.update_xaxes(tickangle=-45)
     st.plotly_chart(fig_occ_fish, use_container_width=True)
+    chart('occupation_fish')
     
     st.markdown("---")
     
     # 2. GEOGRAPHIC ANALYSIS
     st.markdown("## 🌍 Geographic Distribution")
     
-    if 'Country' in df.columns and df['Country'].notna().sum() > 0:
+    all_country_counts = counts_series(store.counts('Country'))
+    if len(all_country_counts) > 0:
         col1, col2 = st.columns(2)
         
         with col1:
             # Top countries
-            country_counts = df['Country'].value_counts().head(10)
+            country_counts = all_country_counts.head(10)
             fig_countries = px.bar(
                 x=country_counts.values,
                 y=country_counts.index,
@@ -1370,13 +1246,14 @@ def analytics_page():
                 color_continuous_scale='Teal'
             )
             st.plotly_chart(fig_countries, use_container_width=True)
+            chart('countries')
         
         with col2:
             # Fish type by top countries
-            top_countries = df['Country'].value_counts().head(5).index
-            df_top_countries = df[df['Country'].isin(top_countries)]
-            
-            country_fish = pd.crosstab(df_top_countries['Country'], df_top_countries['Fish_Name'])
+            top_countries = all_country_counts.head(5).index
+            country_fish = fish_crosstab(store, 'Country')
+            country_fish = country_fish.loc[country_fish.index.isin(top_countries)]
+            country_fish = country_fish.loc[:, country_fish.sum() > 0]
             fig_country_fish = px.imshow(
                 country_fish,
                 labels=dict(x="Fish Type", y="Country", color="Count"),
@@ -1386,6 +1263,7 @@ def analytics_page():
             )
             fig_country_fish.update_xaxes(tickangle=-45)
             st.plotly_chart(fig_country_fish, use_container_width=True)
+            chart('country_fish')
     
     st.markdown("---")
     
@@ -1397,8 +1275,8 @@ def analytics_page():
     with col1:
         # Completion time by referral source
         st.markdown("### Avg Completion Time by Source")
-        if 'Total_Survey_Time' in df.columns:
-            time_by_source = df.groupby('Referral_Source')['Total_Survey_Time'].mean().sort_values(ascending=False)
+        if time_cols_exist:
+            time_by_source = counts_series(store.mean_time_by_source())
             fig_source_time = px.bar(
                 x=time_by_source.values,
                 y=time_by_source.index,
@@ -1409,11 +1287,15 @@ def analytics_page():
                 color_continuous_scale='Oranges'
             )
             st.plotly_chart(fig_source_time, use_container_width=True)
+            chart('source_time')
     
     with col2:
         # Fish type diversity by referral source
         st.markdown("### Fish Type Diversity by Source")
-        source_diversity = df.groupby('Referral_Source')['Fish_Name'].nunique().sort_values(ascending=False)
+        source_diversity = counts_series({
+            source: sum(1 for count in by_type.values() if count > 0)
+            for source, by_type in store.crosstab('Referral_Source', 'MBTI_Type').items()
+        })
         fig_source_div = px.bar(
             x=source_diversity.values,
             y=source_diversity.index,
@@ -1424,21 +1306,20 @@ def analytics_page():
             color_continuous_scale='Viridis'
         )
         st.plotly_chart(fig_source_div, use_container_width=True)
+        chart('source_diversity')
     
     st.markdown("---")
     
     # 4. RESPONSE PATTERNS OVER TIME
     st.markdown("## 📅 Temporal Patterns")
     
-    if 'Timestamp' in df.columns:
-        df['Hour'] = pd.to_datetime(df['Timestamp']).dt.hour
-        df['DayOfWeek'] = pd.to_datetime(df['Timestamp']).dt.day_name()
-        
+    hour_counts = store.counts('Hour')
+    if hour_counts:
         col1, col2 = st.columns(2)
         
         with col1:
             # Hourly distribution
-            hourly_counts = df['Hour'].value_counts().sort_index()
+            hourly_counts = counts_series({int(hour): count for hour, count in hour_counts.items()}, sort=False).sort_index()
             fig_hourly = px.line(
                 x=hourly_counts.index,
                 y=hourly_counts.values,
@@ -1447,11 +1328,12 @@ def analytics_page():
                 markers=True
             )
             st.plotly_chart(fig_hourly, use_container_width=True)
+            chart('hourly')
         
         with col2:
             # Day of week distribution
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_counts = df['DayOfWeek'].value_counts().reindex(day_order, fill_value=0)
+            day_counts = counts_series(store.counts('DayOfWeek'), sort=False).reindex(day_order, fill_value=0)
             fig_dow = px.bar(
                 x=day_counts.index,
                 y=day_counts.values,
@@ -1461,6 +1343,7 @@ def analytics_page():
                 color_continuous_scale='Plasma'
             )
             st.plotly_chart(fig_dow, use_container_width=True)
+            chart('day_of_week')
     
     st.markdown("---")
     
@@ -1474,14 +1357,17 @@ def analytics_page():
     
     popular_answers = []
     for q in question_cols:
-        if q in df.columns:
-            mode_val = df[q].mode()[0] if len(df[q].mode()) > 0 else 'N/A'
-            mode_pct = (df[q] == mode_val).sum() / len(df) * 100
+        answer_counts = store.counts(q)
+        if answer_counts:
+            # Ties go to the alphabetically first answer, like Series.mode()
+            mode_count = max(answer_counts.values())
+            mode_val = min(answer for answer, count in answer_counts.items() if count == mode_count)
+            mode_pct = mode_count / total * 100
             popular_answers.append({
                 'Question': q,
                 'Most Common Answer': mode_val,
                 'Percentage': f'{mode_pct:.1f}%',
-                'Count': (df[q] == mode_val).sum()
+                'Count': mode_count
             })
     
     popular_df = pd.DataFrame(popular_answers)
@@ -1497,6 +1383,7 @@ def analytics_page():
         hover_data=['Most Common Answer', 'Percentage']
     )
     st.plotly_chart(fig_popular, use_container_width=True)
+    chart('popular_answers')
     
     # Show table
     st.dataframe(popular_df, use_container_width=True)
@@ -1507,14 +1394,14 @@ def analytics_page():
     st.markdown("## 🧬 Dimension Correlations")
     
     # Create dimension combinations analysis
-    if all(col in df.columns for col in ['E_I', 'S_N', 'T_F', 'J_P']):
+    if store.counts('E_I') and store.counts('T_F'):
         st.markdown("### Combined Dimension Patterns")
         
         col1, col2 = st.columns(2)
         
         with col1:
             # E/I vs S/N
-            ei_sn = pd.crosstab(df['E_I'], df['S_N'])
+            ei_sn = pd.DataFrame(store.crosstab('E_I', 'S_N')).T.fillna(0).astype('int64').sort_index().sort_index(axis=1)
             fig_ei_sn = px.imshow(
                 ei_sn,
                 labels=dict(x="S/N", y="E/I", color="Count"),
@@ -1523,10 +1410,11 @@ def analytics_page():
                 text_auto=True
             )
             st.plotly_chart(fig_ei_sn, use_container_width=True)
+            chart('ei_sn')
         
         with col2:
             # T/F vs J/P
-            tf_jp = pd.crosstab(df['T_F'], df['J_P'])
+            tf_jp = pd.DataFrame(store.crosstab('T_F', 'J_P')).T.fillna(0).astype('int64').sort_index().sort_index(axis=1)
             fig_tf_jp = px.imshow(
                 tf_jp,
                 labels=dict(x="J/P", y="T/F", color="Count"),
@@ -1535,23 +1423,75 @@ def analytics_page():
                 text_auto=True
             )
             st.plotly_chart(fig_tf_jp, use_container_width=True)
+            chart('tf_jp')
     
-    # Download data option
+    # Download data option - the only section that needs the raw rows
     st.markdown("---")
     st.markdown("## 💾 Export Data")
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Full Dataset (CSV)",
-        data=csv,
-        file_name=f"mbti_survey_data_{datetime.now().strftime('%Y%m%d')}.csv",
-        mime="text/csv"
-    )
+    dates = sorted(store.counts('Date'))
+    date_range = ()
+    if dates:
+        first_date = datetime.strptime(dates[0], '%Y-%m-%d').date()
+        last_date = datetime.strptime(dates[-1], '%Y-%m-%d').date()
+        date_range = st.date_input("Responses submitted between", value=(first_date, last_date))
+    if st.button("📦 Prepare Full Dataset"):
+        # Full range selected -> no filter, so undated rows and ones newer than the aggregates are included
+        start = end = None
+        if len(date_range) == 2 and tuple(date_range) != (first_date, last_date):
+            start, end = date_range[0], date_range[1] + timedelta(days=1)
+        with st.spinner("Loading responses..."):
+            df = load_responses_from_sheets(start=start, end=end)
+        if df is not None:
+            df['Fish_Name'] = df['MBTI_Type'].map(FISH_NAMES) if 'MBTI_Type' in df.columns else None
+            csv = df.to_csv(index=False)
+            st.download_button(
+                label="📥 Download Full Dataset (CSV)",
+                data=csv,
+                file_name=f"mbti_survey_data_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
 
     # Follow section at bottom
     st.markdown("<br>", unsafe_allow_html=True)
     show_follow_section()
 
+@st.cache_resource
+def configure_metrics():
+    """Apply the metrics export settings once per process"""
+    metrics.configure(
+        textfile=get_setting("metrics_textfile", None),
+        log=get_setting("metrics_log", False),
+        export_interval=get_setting("metrics_export_interval", 15.0)
+    )
+    return metrics
+
+def show_metrics_panel():
+    """Sidebar breakdown of this session's previous rerun plus the process-wide timings (metrics_panel = true)"""
+    if not get_setting("metrics_panel", False):
+        return
+    with st.sidebar.expander("⏱️ Performance"):
+        last_rerun = st.session_state.get('last_rerun_spans')
+        if last_rerun:
+            st.caption("Previous rerun (ms)")
+            steps = pd.DataFrame(last_rerun, columns=['Step', 'ms'])
+            steps['ms'] = (steps['ms'] * 1000).round(1)
+            st.dataframe(steps, hide_index=True, use_container_width=True)
+        summary = metrics.summary()
+        if summary:
+            st.caption("All sessions since start (ms)")
+            st.dataframe(pd.DataFrame.from_dict(summary, orient='index'), use_container_width=True)
+        st.download_button(
+            "📥 Prometheus metrics",
+            data=metrics.prometheus_text(),
+            file_name="pasarfish_metrics.prom",
+            mime="text/plain"
+        )
+
 def main():
+    configure_metrics()
+    # Build all 16 result pages on the process's first rerun rather than on someone's Get Results
+    load_result_bundles()
+    
     # Sidebar navigation
     st.sidebar.title("🧭 Navigation")
     page = st.sidebar.radio(
@@ -1574,6 +1514,14 @@ def main():
         survey_page()
     else:
         analytics_page()
+    
+    show_metrics_panel()
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # Also runs when st.rerun() cuts the script short, so button clicks are timed too
+        last_rerun_spans = metrics.end_rerun()
+        if get_setting("metrics_panel", False):
+            st.session_state.last_rerun_spans = last_rerun_spans
@@ -0,0 +1,397 @@
+"""Materialized aggregates for the analytics dashboard.
+
+Instead of re-running value_counts/crosstab/groupby over every response on
+each dashboard view, the counts are kept up to date as responses are
+submitted and persisted to a small JSON file. They can always be rebuilt from
+the raw rows in the responses sheet, and in_sync() tells when they need to be:
+another replica's submissions, edited or deleted rows and a stale file all
+show up as a different source or row count.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from question_bank import DIMENSION_KEYS, MBTI_TYPES, QUESTION_IDS, TABLE_SIZE
+from response_schema import TIMESTAMP_FORMAT
+
+# Single-column counts (all keys are stored as strings)
+COUNT_FIELDS = [
+    'MBTI_Type', 'E_I', 'S_N', 'T_F', 'J_P',
+    'Age', 'Gender', 'Occupation', 'Country', 'Referral_Source',
+    'Date', 'Hour', 'DayOfWeek',
+] + QUESTION_IDS
+
+# Two-column counts: {row value: {column value: count}}
+CROSS_FIELDS = [
+    ('Age', 'MBTI_Type'),
+    ('Gender', 'MBTI_Type'),
+    ('Occupation', 'MBTI_Type'),
+    ('Country', 'MBTI_Type'),
+    ('Referral_Source', 'MBTI_Type'),
+    ('E_I', 'S_N'),
+    ('T_F', 'J_P'),
+]
+
+# Raw response columns the aggregates are computed from (Date/Hour/DayOfWeek derive from Timestamp)
+SOURCE_COLUMNS = [field for field in COUNT_FIELDS if field not in ('Date', 'Hour', 'DayOfWeek')] + [
+    'Timestamp', 'Total_Survey_Time',
+]
+
+# Total_Survey_Time histogram bin width, in seconds
+TIME_BIN = 10
+
+
+def cross_key(row_field, col_field):
+    return f'{row_field}|{col_field}'
+
+
+def empty_aggregates():
+    return {
+        'rows': 0,
+        'source': None,     # what the last rebuild read (the snapshot generation), for in_sync()
+        'counts': {field: {} for field in COUNT_FIELDS},
+        'cross': {cross_key(*pair): {} for pair in CROSS_FIELDS},
+        # Total_Survey_Time running stats, plus per-referral sums for averages
+        'time': {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'bins': {}},
+        'time_by_source': {},
+    }
+
+
+def derive_time_fields(row):
+    """Date / Hour / DayOfWeek strings from the row's Timestamp (None if unparseable)"""
+    try:
+        ts = datetime.strptime(str(row.get('Timestamp', '')), TIMESTAMP_FORMAT)
+    except ValueError:
+        return {'Date': None, 'Hour': None, 'DayOfWeek': None}
+    return {'Date': ts.strftime('%Y-%m-%d'), 'Hour': str(ts.hour), 'DayOfWeek': ts.strftime('%A')}
+
+
+def _bump(counter, key, amount=1):
+    counter[key] = counter.get(key, 0) + amount
+
+
+def _blank(value):
+    """True for None, '' and NaN/NaT (missing values in a typed frame)"""
+    return value is None or value == '' or value != value
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AggregateStore:
+    """Counts by type, dimension, demographic, day, hour and referral source"""
+
+    def __init__(self, path=None, save_interval=5.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        self._checked_at = None     # time.monotonic() of the last due_for_check() that returned True
+        self.data = self._load()
+
+    def _load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return empty_aggregates()
+
+    def save(self):
+        """Atomically write the aggregates to disk"""
+        if not self.path:
+            return
+        with self._lock:
+            payload = json.dumps(self.data)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+    def _add(self, data, row):
+        values = {field: row.get(field) for field in COUNT_FIELDS}
+        values.update(derive_time_fields(row))
+
+        data['rows'] += 1
+        for field in COUNT_FIELDS:
+            if not _blank(values[field]):
+                _bump(data['counts'][field], str(values[field]))
+        for row_field, col_field in CROSS_FIELDS:
+            row_value, col_value = values[row_field], values[col_field]
+            if _blank(row_value) or _blank(col_value):
+                continue
+            _bump(data['cross'][cross_key(row_field, col_field)].setdefault(str(row_value), {}), str(col_value))
+
+        total_time = _number(row.get('Total_Survey_Time'))
+        if total_time is not None:
+            stats = data['time']
+            stats['count'] += 1
+            stats['sum'] += total_time
+            stats['min'] = total_time if stats['min'] is None else min(stats['min'], total_time)
+            stats['max'] = total_time if stats['max'] is None else max(stats['max'], total_time)
+            _bump(stats['bins'], str(int(total_time // TIME_BIN)))
+            source = values['Referral_Source']
+            if not _blank(source):
+                by_source = data['time_by_source'].setdefault(str(source), {'count': 0, 'sum': 0.0})
+                by_source['count'] += 1
+                by_source['sum'] += total_time
+
+    def add(self, row):
+        """Fold one survey_data row into the aggregates"""
+        with self._lock:
+            self._add(self.data, row)
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def rebuild(self, rows):
+        """Replace the aggregates with ones recomputed from raw response rows"""
+        data = empty_aggregates()
+        for row in rows:
+            self._add(data, row)
+        self._replace(data)
+
+    def rebuild_from_frame(self, df, options, source=None, extra_rows=()):
+        """Replace the aggregates with ones computed from a response DataFrame in one vectorized pass.
+
+        extra_rows (responses not in df yet, e.g. still in the outbox) are
+        folded in one at a time. source identifies what df was read from.
+        """
+        data = aggregate_frame(df, options, fallback=self._add)
+        for row in extra_rows:
+            self._add(data, row)
+        data['source'] = source
+        self._replace(data)
+
+    def in_sync(self, source, rows):
+        """True if the aggregates were rebuilt from source and hold exactly rows responses since"""
+        return self.data.get('source') == source and self.data['rows'] == rows
+
+    def due_for_check(self, interval):
+        """True at most once every interval seconds (and on the first call) - when to re-check in_sync()"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < interval:
+                return False
+            self._checked_at = now
+            return True
+
+    def _replace(self, data):
+        with self._lock:
+            self.data = data
+            self._dirty = True
+        self.save()
+
+    def flush(self):
+        """Persist any unsaved updates"""
+        if self._dirty:
+            self.save()
+
+    @property
+    def rows(self):
+        return self.data['rows']
+
+    def counts(self, field):
+        """{value: count} for a single column"""
+        return dict(self.data['counts'][field])
+
+    def crosstab(self, row_field, col_field):
+        """{row value: {column value: count}} for a pair in CROSS_FIELDS"""
+        return {k: dict(v) for k, v in self.data['cross'][cross_key(row_field, col_field)].items()}
+
+    def time_stats(self):
+        """Total_Survey_Time count/sum/min/max and {bin start seconds: count}"""
+        stats = self.data['time']
+        bins = {int(k) * TIME_BIN: v for k, v in stats['bins'].items()}
+        return {**stats, 'bins': dict(sorted(bins.items()))}
+
+    def mean_time_by_source(self):
+        return {source: s['sum'] / s['count'] for source, s in self.data['time_by_source'].items() if s['count']}
+
+
+def _codes(series):
+    """Integer codes (-1 = missing or blank) and string labels for one column.
+
+    Factorizes first and stringifies only the unique values, so values that
+    print the same (25 and '25') share one code.
+    """
+    import numpy as np
+    import pandas as pd
+
+    raw_codes, uniques = pd.factorize(series)
+    labels = {}
+    remap = [-1 if str(value) == '' else labels.setdefault(str(value), len(labels)) for value in uniques]
+    # Trailing -1 so factorize's missing sentinel (-1) maps to missing
+    return np.array(remap + [-1], dtype=np.int64)[raw_codes], list(labels)
+
+
+def _count_dict(labels, counts):
+    return {labels[code]: int(count) for code, count in counts.items() if code >= 0 and count}
+
+
+def aggregate_frame(df, options, fallback):
+    """Every dashboard aggregate for a response frame, in AggregateStore.data layout.
+
+    Type, dimension and per-question counts come from a single 16 x 4,096
+    count tensor (MBTI type by packed 12-bit answer pattern). Demographic,
+    date and hour counts, their cross-tabs with type and the time sums come
+    from one groupby over integer-coded columns. Rows that don't fit the
+    tensor (missing answers, unknown type, letters that disagree with the
+    type) are folded in one at a time with fallback(data, row).
+    """
+    import numpy as np
+    import pandas as pd
+    from pandas.api.types import is_datetime64_any_dtype
+
+    data = empty_aggregates()
+    required = ['MBTI_Type', 'Timestamp'] + QUESTION_IDS + DIMENSION_KEYS
+    if len(df) == 0 or any(column not in df.columns for column in required):
+        for row in df.to_dict('records'):
+            fallback(data, row)
+        return data
+
+    # Integer-code type and answers; a row is clean when all of them are known and consistent
+    raw_types, type_labels = _codes(df['MBTI_Type'])
+    type_remap = np.array([MBTI_TYPES.index(t) if t in MBTI_TYPES else -1 for t in type_labels] + [-1])
+    type_codes = type_remap[raw_types]
+    clean = type_codes >= 0
+    pattern = np.zeros(len(df), dtype=np.int64)
+    for i, (q_id, (first, second)) in enumerate(zip(QUESTION_IDS, options)):
+        answer_codes, letters = _codes(df[q_id])
+        is_first = answer_codes == (letters.index(first) if first in letters else -2)
+        is_second = answer_codes == (letters.index(second) if second in letters else -2)
+        clean &= is_first | is_second
+        pattern |= is_second.astype(np.int64) << (len(QUESTION_IDS) - 1 - i)
+    for position, key in enumerate(DIMENSION_KEYS):
+        letter_codes, letters = _codes(df[key])
+        # Code of each type's letter in this column (-2 where the letter never appears)
+        expected = np.array([letters.index(t[position]) if t[position] in letters else -2 for t in MBTI_TYPES])
+        clean &= letter_codes == expected[np.maximum(type_codes, 0)]
+
+    timestamps = df['Timestamp']
+    if not is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps.astype(object), format=TIMESTAMP_FORMAT, errors='coerce')
+    clean &= timestamps.notna().to_numpy()
+
+    rows = df[clean]
+    type_codes, pattern, timestamps = type_codes[clean], pattern[clean], timestamps[clean]
+    data['rows'] = len(rows)
+
+    # 16 x 4096 count tensor -> type, dimension and per-question counts
+    tensor = np.bincount(type_codes * TABLE_SIZE + pattern, minlength=len(MBTI_TYPES) * TABLE_SIZE)
+    tensor = tensor.reshape(len(MBTI_TYPES), TABLE_SIZE)
+    type_counts = tensor.sum(axis=1)
+    pattern_counts = tensor.sum(axis=0)
+    data['counts']['MBTI_Type'] = {t: int(c) for t, c in zip(MBTI_TYPES, type_counts) if c}
+    for position, key in enumerate(DIMENSION_KEYS):
+        letter_counts = {}
+        for t, c in zip(MBTI_TYPES, type_counts):
+            if c:
+                _bump(letter_counts, t[position], int(c))
+        data['counts'][key] = letter_counts
+    for pair in [('E_I', 'S_N'), ('T_F', 'J_P')]:
+        positions = [DIMENSION_KEYS.index(key) for key in pair]
+        table = {}
+        for t, c in zip(MBTI_TYPES, type_counts):
+            if c:
+                _bump(table.setdefault(t[positions[0]], {}), t[positions[1]], int(c))
+        data['cross'][cross_key(*pair)] = table
+    bit_values = np.arange(TABLE_SIZE)
+    for i, (q_id, (first, second)) in enumerate(zip(QUESTION_IDS, options)):
+        second_count = int(pattern_counts[(bit_values >> (len(QUESTION_IDS) - 1 - i)) & 1 == 1].sum())
+        data['counts'][q_id] = {k: v for k, v in ((first, len(rows) - second_count), (second, second_count)) if v}
+
+    # One groupby over coded demographic/time columns, with time sums alongside the counts
+    demographic_fields = ['Age', 'Gender', 'Occupation', 'Country', 'Referral_Source']
+    coded = {'MBTI_Type': type_codes}
+    labels = {'MBTI_Type': MBTI_TYPES}
+    for field in demographic_fields:
+        column = rows[field] if field in rows.columns else pd.Series([None] * len(rows), index=rows.index)
+        coded[field], labels[field] = _codes(column)
+    date_codes, dates = pd.factorize(timestamps.dt.normalize())
+    coded['Date'], labels['Date'] = date_codes, [date.strftime('%Y-%m-%d') for date in dates]
+    coded['Hour'] = timestamps.dt.hour.to_numpy()
+    labels['Hour'] = [str(hour) for hour in range(24)]
+
+    total_time = None
+    if 'Total_Survey_Time' in rows:
+        # float64 sums even when the column was downcast to float32
+        total_time = pd.to_numeric(rows['Total_Survey_Time'], errors='coerce').astype('float64')
+    frame = pd.DataFrame(coded)
+    if total_time is not None:
+        frame['time_sum'] = total_time.fillna(0).to_numpy()
+        frame['time_count'] = total_time.notna().to_numpy().astype(np.int64)
+    else:
+        frame['time_sum'] = 0.0
+        frame['time_count'] = 0
+    frame['rows'] = 1
+    keys = list(coded)
+    grouped = frame.groupby(keys, sort=False).agg(rows=('rows', 'sum'), time_sum=('time_sum', 'sum'),
+                                                   time_count=('time_count', 'sum')).reset_index()
+
+    for field in demographic_fields + ['Date', 'Hour']:
+        data['counts'][field] = _count_dict(labels[field], grouped.groupby(field)['rows'].sum())
+    for row_field, col_field in CROSS_FIELDS:
+        if col_field != 'MBTI_Type':
+            continue
+        table = {}
+        for (row_code, col_code), count in grouped.groupby([row_field, col_field])['rows'].sum().items():
+            if row_code >= 0 and count:
+                table.setdefault(labels[row_field][row_code], {})[labels[col_field][col_code]] = int(count)
+        data['cross'][cross_key(row_field, col_field)] = table
+
+    weekday_counts = {}
+    for date, count in data['counts']['Date'].items():
+        _bump(weekday_counts, datetime.strptime(date, '%Y-%m-%d').strftime('%A'), count)
+    data['counts']['DayOfWeek'] = weekday_counts
+
+    # Completion time stats
+    if total_time is not None and total_time.notna().any():
+        valid_time = total_time.dropna()
+        bins = np.floor(valid_time.to_numpy() / TIME_BIN).astype(np.int64)
+        data['time'] = {
+            'count': int(len(valid_time)),
+            'sum': float(valid_time.sum()),
+            'min': float(valid_time.min()),
+            'max': float(valid_time.max()),
+            'bins': {str(b): int(c) for b, c in zip(*np.unique(bins, return_counts=True))},
+        }
+        by_source = grouped[grouped['Referral_Source'] >= 0].groupby('Referral_Source')[['time_count', 'time_sum']].sum()
+        data['time_by_source'] = {
+            labels['Referral_Source'][code]: {'count': int(r.time_count), 'sum': float(r.time_sum)}
+            for code, r in by_source.iterrows() if r.time_count
+        }
+
+    # Rows that didn't fit the tensor take the per-row path
+    for row in df[~clean].to_dict('records'):
+        fallback(data, row)
+    return data
+
+
+def quantile_from_bins(bins, q):
+    """Approximate quantile of binned values, interpolating within the bin"""
+    total = sum(bins.values())
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for start, count in sorted(bins.items()):
+        if seen + count >= target:
+            return start + TIME_BIN * (target - seen) / count
+        seen += count
+    return max(bins) + TIME_BIN
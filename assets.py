@@ -0,0 +1,332 @@
+"""Responsive image variants for the question and fish art.
+
+The source art in images/ is 0.5-1.1 MB per PNG, far more than a phone
+showing it at 30vh needs. This build step writes AVIF and WebP copies at a
+few widths into static/ (served by Streamlit's static file serving) with
+content-hashed names, plus a manifest the app uses to emit srcset markup.
+
+The manifest and variants are committed, and only this build step writes
+them. The app calls startup_manifest() once per process, which reads the
+manifest; images added or changed since the last build get their original
+published under a content-hashed name in the gitignored static/web/, so
+every image is still fetched by URL and cached by the browser instead of
+being inlined as base64 on each rerun.
+
+The global stylesheet in web/ is published to static/web/ the same way. It
+is inlined on a session's first render (so the page is never unstyled), and
+head_loader_html() copies the cached file into the page's <head> so later
+reruns don't re-send it as markdown.
+
+    python assets.py            # rebuild variants for changed images
+    python assets.py --check    # exit 1 if the manifest is stale
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+
+SOURCE_GLOBS = ['images/*.png', 'images/*.jpg', 'images/*.jpeg']
+STATIC_DIR = 'static'
+VARIANT_DIR = 'img'
+MANIFEST_PATH = os.path.join(STATIC_DIR, 'assets-manifest.json')
+
+# Streamlit serves STATIC_DIR at this URL prefix when enableStaticServing is on
+STATIC_URL = 'app/static/'
+
+WIDTHS = [480, 960, 1440]
+# Best format first - browsers take the first <source> they support
+FORMATS = [('avif', 'image/avif', {'quality': 55}), ('webp', 'image/webp', {'quality': 78, 'method': 6})]
+
+MANIFEST_VERSION = 1
+
+# Everything the app publishes itself at startup goes here (gitignored, never committed)
+RUNTIME_DIR = 'web'
+
+# Global stylesheet, published under a hashed name in static/web/ at startup
+HEAD_SOURCES = {'css': 'web/app.css'}
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def slug(path):
+    """Filesystem- and URL-safe stem for an image path"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', stem)
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'images': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'images': {}}
+    return manifest
+
+
+def source_images():
+    paths = set()
+    for pattern in SOURCE_GLOBS:
+        paths.update(glob.glob(pattern))
+    return sorted(p.replace(os.sep, '/') for p in paths)
+
+
+def publish_original(source, digest, directory=VARIANT_DIR):
+    """Copy the original into static/ under a content-hashed name, returning its path there"""
+    ext = os.path.splitext(source)[1].lower()
+    rel_path = f'{directory}/{slug(source)}.{digest[:10]}{ext}'
+    target = os.path.join(STATIC_DIR, rel_path)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f'{target}.tmp'
+        with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+            dst.write(src.read())
+        os.replace(tmp_path, target)
+    return rel_path
+
+
+def original_entry(source, digest):
+    """Manifest entry with just the original, published to static/web/ (no resized variants)"""
+    from PIL import Image
+
+    with Image.open(source) as original:
+        width, height = original.size
+    return {'sha256': digest, 'width': width, 'height': height, 'variants': {},
+            'original': publish_original(source, digest, RUNTIME_DIR)}
+
+
+def build_variants(source, digest):
+    """Write every width/format variant of one image, returning its manifest entry"""
+    from PIL import Image
+
+    with Image.open(source) as original:
+        original.load()
+        width, height = original.size
+        entry = {'sha256': digest, 'width': width, 'height': height, 'variants': {}}
+
+        widths = [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+        for fmt, _, options in FORMATS:
+            variants = []
+            for target in sorted(set(widths)):
+                resized = original if target == width else original.resize(
+                    (target, round(height * target / width)), Image.LANCZOS
+                )
+                # Name carries the hash of the encoded bytes, so URLs change only when content does
+                tmp_path = os.path.join(STATIC_DIR, VARIANT_DIR, f'.{slug(source)}-{target}.{fmt}.tmp')
+                resized.save(tmp_path, format=fmt.upper(), **options)
+                short_hash = file_digest(tmp_path)[:10]
+                rel_path = f'{VARIANT_DIR}/{slug(source)}-{target}.{short_hash}.{fmt}'
+                os.replace(tmp_path, os.path.join(STATIC_DIR, rel_path))
+                variants.append([target, rel_path])
+            entry['variants'][fmt] = variants
+    return entry
+
+
+def entry_files(entry):
+    """Every static/ path a manifest entry refers to"""
+    files = [rel for variants in entry['variants'].values() for _, rel in variants]
+    if entry.get('original'):
+        files.append(entry['original'])
+    return files
+
+
+def build(force=False, manifest_path=MANIFEST_PATH):
+    """Rebuild variants for new or changed images and prune ones no longer referenced"""
+    os.makedirs(os.path.join(STATIC_DIR, VARIANT_DIR), exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    images = {}
+    for source in source_images():
+        digest = file_digest(source)
+        entry = manifest['images'].get(source)
+        if force or entry is None or entry['sha256'] != digest or not entry['variants'] or not all(
+            os.path.exists(os.path.join(STATIC_DIR, rel)) for rel in entry_files(entry)
+        ):
+            entry = build_variants(source, digest)
+            print(f"built {source}")
+        images[source] = entry
+
+    manifest = {'version': MANIFEST_VERSION, 'images': images}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    referenced = {rel for entry in images.values() for rel in entry_files(entry)}
+    for path in glob.glob(os.path.join(STATIC_DIR, VARIANT_DIR, '*')):
+        rel = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+        if rel not in referenced:
+            os.remove(path)
+    return manifest
+
+
+def is_stale(manifest_path=MANIFEST_PATH):
+    manifest = load_manifest(manifest_path)
+    sources = source_images()
+    if sorted(manifest['images']) != sources:
+        return True
+    return any(manifest['images'][source]['sha256'] != file_digest(source) for source in sources)
+
+
+def startup_manifest(manifest_path=MANIFEST_PATH):
+    """The built manifest, plus hashed originals for images added or changed since the build.
+
+    Read-only as far as the manifest goes: the originals are published to
+    static/web/ and their entries exist only in the returned copy. Changed
+    images lose their (now wrong) resized variants until assets.py is run
+    again. If static/ isn't writable the image is left out and the app falls
+    back to inlining it.
+    """
+    manifest = load_manifest(manifest_path)
+    for source in source_images():
+        digest = file_digest(source)
+        entry = manifest['images'].get(source)
+        if entry is not None and entry['sha256'] == digest and all(
+            os.path.exists(os.path.join(STATIC_DIR, rel)) for rel in entry_files(entry)
+        ):
+            continue
+        try:
+            manifest['images'][source] = original_entry(source, digest)
+        except OSError:
+            manifest['images'].pop(source, None)
+    return manifest
+
+
+def image_url(manifest, source):
+    """Content-hashed static URL for an image (largest fallback variant), or None if it isn't published"""
+    entry = manifest['images'].get(source)
+    if entry is None:
+        return None
+    if entry.get('original'):
+        return f'{STATIC_URL}{entry["original"]}'
+    variants = entry['variants'].get(FORMATS[-1][0])
+    return f'{STATIC_URL}{variants[-1][1]}' if variants else None
+
+
+def picture_html(manifest, source, sizes, alt='', style='', css_class='', fetchpriority=None):
+    """<picture> markup choosing a variant by viewport, or None if the image isn't published"""
+    entry = manifest['images'].get(source)
+    if entry is None:
+        return None
+
+    sources = []
+    fallback = None
+    for fmt, mime, _ in FORMATS:
+        variants = entry['variants'].get(fmt)
+        if not variants:
+            continue
+        srcset = ', '.join(f'{STATIC_URL}{rel} {width}w' for width, rel in variants)
+        sources.append(f'<source type="{mime}" srcset="{srcset}" sizes="{sizes}">')
+        fallback = f'{STATIC_URL}{variants[-1][1]}'
+    if fallback is None:
+        # Published original only (image added since the last build)
+        fallback = image_url(manifest, source)
+        if fallback is None:
+            return None
+
+    class_attr = f' class="{css_class}"' if css_class else ''
+    priority_attr = f' fetchpriority="{fetchpriority}"' if fetchpriority else ''
+    return (
+        f'<picture>{"".join(sources)}'
+        f'<img src="{fallback}" alt="{alt}" width="{entry["width"]}" height="{entry["height"]}"'
+        f'{class_attr} style="{style}" decoding="async"{priority_attr}></picture>'
+    )
+
+
+def prefetch_html(manifest, sources, sizes, limit=2):
+    """Hidden low-priority copies of upcoming images so they're cached before they're shown.
+
+    They use the same srcset/sizes as the visible image, so the browser warms
+    exactly the variant it will pick later, and fetchpriority="low" keeps them
+    behind the image on screen. At most ``limit`` images are prefetched.
+    """
+    pictures = [
+        picture_html(manifest, source, sizes, fetchpriority='low')
+        for source in sources[:limit] if source
+    ]
+    pictures = [picture for picture in pictures if picture]
+    if not pictures:
+        return ''
+    return f'<div aria-hidden="true" style="display: none;">{"".join(pictures)}</div>'
+
+
+def publish_head_assets(sources=HEAD_SOURCES):
+    """Publish the global CSS under a content-hashed name: {kind: static URL}, or None if static/ isn't writable"""
+    try:
+        return {kind: STATIC_URL + publish_original(source, file_digest(source), RUNTIME_DIR)
+                for kind, source in sources.items()}
+    except OSError:
+        return None
+
+
+def head_loader_html(urls, stylesheets=()):
+    """Script that adds the published CSS (and external stylesheets) to <head>, once per page.
+
+    <head> isn't managed by Streamlit, so what's added there survives later
+    reruns even though this element doesn't. It runs after the page has
+    rendered, so send it alongside inline_head_html() on the first render.
+    The stylesheet is fetched rather than linked so it works whatever
+    Content-Type the static server sends, and "force-cache" lets the browser
+    reuse it without revalidating - its name changes whenever its content does.
+    """
+    return f"""<script>
+(function () {{
+    var head = document.head;
+    if (document.getElementById('pasarfish-head')) {{
+        return;
+    }}
+    var marker = document.createElement('meta');
+    marker.id = 'pasarfish-head';
+    head.appendChild(marker);
+    {json.dumps(list(stylesheets))}.forEach(function (href) {{
+        var link = document.createElement('link');
+        link.rel = 'stylesheet';
+        link.href = href;
+        head.appendChild(link);
+    }});
+    fetch({json.dumps(urls['css'])}, {{cache: 'force-cache'}}).then(function (response) {{
+        return response.text();
+    }}).then(function (text) {{
+        var style = document.createElement('style');
+        style.textContent = text;
+        head.appendChild(style);
+    }});
+}})();
+</script>"""
+
+
+def inline_head_html(sources=HEAD_SOURCES, stylesheets=()):
+    """The stylesheet inline - a session's first render, or every rerun when nothing could be published"""
+    with open(sources['css']) as f:
+        css = f.read()
+    links = ''.join(f'<link rel="stylesheet" href="{href}">' for href in stylesheets)
+    return f'<style>{css}</style>{links}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build responsive image variants into static/")
+    parser.add_argument('--check', action='store_true', help="only report whether the variants are up to date")
+    parser.add_argument('--force', action='store_true', help="re-encode every image")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        stale = is_stale()
+        print(f"{MANIFEST_PATH}: {'stale or missing' if stale else 'up to date'}")
+        return 1 if stale else 0
+
+    manifest = build(force=args.force)
+    total = sum(
+        os.path.getsize(os.path.join(STATIC_DIR, rel))
+        for entry in manifest['images'].values() for rel in entry_files(entry)
+    )
+    print(f"{len(manifest['images'])} images, {total / 1024:.0f} KB of variants")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
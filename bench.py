@@ -0,0 +1,356 @@
+"""Micro-benchmarks for the app's hot paths, with saved baselines.
+
+    python bench.py                                     # run and print timings
+    python bench.py --save bench_baseline.json          # record a baseline
+    python bench.py --compare bench_baseline.json       # exit 1 on a >25% slowdown
+    python bench.py --sizes 1000,100000 --filter aggregate
+    python bench.py --imports                           # what importing the app costs
+
+Covered: loading the combinations workbook and the compiled scoring table,
+the answer -> type lookup, get_image_base64, building survey_data, the
+analytics rebuild (typing the frame and aggregating it) on synthetic
+datasets of 1k, 100k and 1M responses, the Sheets append/load paths
+against the in-memory fake_gspread backend (up to 100k rows), and
+analytics_page[n]: the dashboard's whole aggregation on a rebuild - reading
+the local snapshot, rebuilding the store and building every table the page
+draws - up to 100k rows.
+
+--imports runs the app's module import in a fresh interpreter under
+``python -X importtime`` and reports the total and the slowest top-level
+packages - the cost every new replica pays before the first page is drawn.
+
+Each benchmark is timed over several repeats of enough calls to take at
+least --min-time seconds, and the median time per call is compared. Timings
+are only comparable on the same machine, so keep baselines per machine.
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+# The per-row rebuild is only timed up to this size (it's the slow path being replaced)
+ROW_REBUILD_LIMIT = 100000
+
+
+def synthetic_responses(n, engine, seed=0):
+    """Raw responses frame shaped like the sheet (strings and numbers, as loaded), n rows"""
+    import numpy as np
+    import pandas as pd
+
+    from question_bank import DIMENSION_KEYS, MBTI_TYPES, QUESTION_IDS
+    from response_schema import (AGE_OPTIONS, GENDER_OPTIONS, OCCUPATION_OPTIONS, REFERRAL_OPTIONS,
+                                 RESPONSE_COLUMNS)
+
+    rng = np.random.default_rng(seed)
+    bits = rng.integers(0, 2, size=(n, len(QUESTION_IDS)))
+    index = (bits << np.arange(len(QUESTION_IDS) - 1, -1, -1)).sum(axis=1)
+    types = np.array(MBTI_TYPES)[np.frombuffer(engine.table, dtype=np.uint8)[index]]
+
+    start = pd.Timestamp('2026-01-01')
+    frame = {
+        'Timestamp': (start + pd.to_timedelta(rng.integers(0, 300 * 86400, n), unit='s')).strftime('%Y-%m-%d %H:%M:%S'),
+        'Age': rng.choice(AGE_OPTIONS, n),
+        'Gender': rng.choice(GENDER_OPTIONS, n),
+        'Country': rng.choice(['Singapore', 'Malaysia', 'Indonesia', 'Philippines', 'Japan', 'Not specified'], n),
+        'Occupation': rng.choice(OCCUPATION_OPTIONS, n),
+        'Referral_Source': rng.choice(REFERRAL_OPTIONS, n),
+        'Demographics_Time': rng.uniform(5, 60, n).round(2),
+    }
+    for i, (q_id, pair) in enumerate(zip(QUESTION_IDS, engine.options)):
+        frame[q_id] = np.array(pair)[bits[:, i]]
+    for q_id in QUESTION_IDS:
+        frame[f'{q_id}_Time'] = rng.uniform(1, 30, n).round(2)
+    frame['Total_Survey_Time'] = rng.uniform(30, 600, n).round(2)
+    for position, key in enumerate(DIMENSION_KEYS):
+        frame[key] = np.array([t[position] for t in MBTI_TYPES])[np.frombuffer(engine.table, dtype=np.uint8)[index]]
+    frame['MBTI_Type'] = types
+    frame['Response_ID'] = [f'{value:032x}' for value in rng.integers(0, 2**63, n)]
+    return pd.DataFrame(frame, columns=RESPONSE_COLUMNS)
+
+
+def analytics_aggregation(app, snapshot, options):
+    """What analytics_page does with the data on a rebuild, minus the charts.
+
+    Reads the aggregate columns from the local snapshot, rebuilds the store
+    in one pass (as rebuild_aggregates_from_sheets does) and builds every
+    count series, cross-tab and time statistic the page draws from it.
+    """
+    import pandas as pd
+
+    from analytics_store import COUNT_FIELDS, SOURCE_COLUMNS, AggregateStore, quantile_from_bins
+    from response_schema import normalize_responses
+
+    df = snapshot.load(columns=SOURCE_COLUMNS + ['MBTI Type', 'mbti_type'],
+                       normalize=lambda frame: normalize_responses(frame, options))
+    store = AggregateStore(None)
+    store.rebuild_from_frame(df, options, source=snapshot.state['generation'])
+
+    tables = [app.counts_series(store.counts(field)) for field in COUNT_FIELDS]
+    tables += [app.fish_crosstab(store, field) for field in ['Age', 'Gender', 'Occupation', 'Country']]
+    tables += [pd.DataFrame(store.crosstab(*pair)).T.fillna(0) for pair in [('E_I', 'S_N'), ('T_F', 'J_P')]]
+    tables.append(app.counts_series(store.mean_time_by_source()))
+    time_stats = store.time_stats()
+    tables += [quantile_from_bins(time_stats['bins'], q) for q in (0.25, 0.5, 0.75)]
+    return tables
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """(median, min) seconds per call of func()"""
+    func()  # warm-up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    # Slow benchmarks get fewer repeats
+    repeat = repeat if elapsed < 1.0 else max(3, repeat // 2)
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples), min(samples), number
+
+
+def benchmarks(sizes, wanted=lambda name: True):
+    """Yield (name, func) pairs - set-up happens lazily, and is skipped for sizes with nothing wanted"""
+    import itertools
+    import random
+
+    # Outside `streamlit run` every st call and cached call logs a bare-mode warning
+    logging.disable(logging.WARNING)
+
+    import pandas as pd
+
+    import fake_gspread
+    import Pasar_Fish_App as app
+    import question_bank
+    from analytics_store import AggregateStore, aggregate_frame
+    from response_schema import normalize_responses
+    from sheets_io import IncrementalSheetLoader, WorksheetCache
+    from snapshot import ResponseSnapshot, SnapshotSheetLoader
+
+    # The baseline the compiled table replaced: parsing the workbook with openpyxl
+    yield 'read_workbook', lambda: pd.read_excel('Updated_combinations.xlsx')
+    yield 'load_scoring_engine.cold', lambda: question_bank.load_engine(
+        'Updated_combinations.xlsx', 'Updated_combinations.qbank')
+
+    engine = question_bank.load_engine('Updated_combinations.xlsx', 'Updated_combinations.qbank')
+    rng = random.Random(0)
+    answer_sets = [
+        {q_id: rng.choice(pair) for q_id, pair in zip(question_bank.QUESTION_IDS, engine.options)}
+        for _ in range(1024)
+    ]
+    answers = itertools.cycle(answer_sets)
+    yield 'lookup', lambda: engine.lookup(next(answers))
+
+    image = app.FISH_IMAGES['ESTJ']
+    yield 'get_image_base64.cold', lambda: (app.get_image_base64.clear(), app.get_image_base64(image))
+    yield 'get_image_base64.cached', lambda: app.get_image_base64(image)
+
+    demographics = {'age': '18-24', 'gender': 'Female', 'country': 'Singapore', 'occupation': 'Student',
+                    'referral_source': 'Friend/Family', 'demographics_time': 12.5}
+    question_times = {f'{q_id}_Time': 3.2 for q_id in question_bank.QUESTION_IDS}
+    mbti_type, dimensions = engine.lookup(answer_sets[0])
+    yield 'build_survey_data', lambda: app.build_survey_data(
+        demographics, answer_sets[0], question_times, 184.25, mbti_type, dimensions)
+
+    for n in sizes:
+        if not any(wanted(f'{name}[{n}]') for name in ['normalize_responses', 'aggregate_frame', 'rebuild_per_row']):
+            continue
+        raw = synthetic_responses(n, engine)
+        yield f'normalize_responses[{n}]', lambda: normalize_responses(raw, engine.options)
+        typed = normalize_responses(raw, engine.options)
+        store = AggregateStore(None)
+        yield f'aggregate_frame[{n}]', lambda: aggregate_frame(typed, engine.options, store._add)
+        if n <= ROW_REBUILD_LIMIT:
+            records = raw.to_dict('records')
+            yield f'rebuild_per_row[{n}]', lambda: store.rebuild(records)
+
+    # Sheets-bound paths against a zero-latency fake backend, so only our side is timed
+    backend = fake_gspread.FakeServer()
+    cache = WorksheetCache(lambda: fake_gspread.FakeClient(backend))
+    row = list(app.build_survey_data(demographics, answer_sets[0], question_times, 184.25,
+                                     mbti_type, dimensions).values())
+    yield 'sheets.append_row', lambda: cache.run('Bench', None, lambda worksheet: worksheet.append_rows([row]))
+
+    for n in sizes:
+        if n > ROW_REBUILD_LIMIT or not any(wanted(f'{name}[{n}]') for name in ['sheets.full_load', 'sheets.refresh']):
+            continue
+        raw = synthetic_responses(n, engine)
+        worksheet = fake_gspread.FakeClient(backend).create(f'Bench {n}')._worksheets[0]
+        worksheet.append_rows([list(raw.columns)] + raw.astype(str).values.tolist())
+        normalize = lambda df: normalize_responses(df, engine.options)
+        yield f'sheets.full_load[{n}]', lambda: IncrementalSheetLoader(normalize).refresh(worksheet)
+        loader = IncrementalSheetLoader(normalize)
+        loader.refresh(worksheet)
+        yield f'sheets.refresh[{n}]', lambda: loader.refresh(worksheet)
+
+    for n in sizes:
+        if n > ROW_REBUILD_LIMIT or not wanted(f'analytics_page[{n}]'):
+            continue
+        raw = synthetic_responses(n, engine)
+        worksheet = fake_gspread.FakeClient(backend).create(f'Dashboard {n}')._worksheets[0]
+        worksheet.append_rows([list(raw.columns)] + raw.astype(str).values.tolist())
+        snapshot_dir = tempfile.mkdtemp(prefix='pasarfish-bench-')
+        atexit.register(shutil.rmtree, snapshot_dir, True)
+        snapshot = ResponseSnapshot(snapshot_dir)
+        SnapshotSheetLoader(snapshot, normalize=lambda df: normalize_responses(df, engine.options)).refresh(worksheet)
+        yield f'analytics_page[{n}]', lambda: analytics_aggregation(app, snapshot, engine.options)
+
+
+def run(sizes, name_filter=None, min_time=0.2, repeat=5):
+    results = {}
+    wanted = (lambda name: name_filter in name) if name_filter else (lambda name: True)
+    for name, func in benchmarks(sizes, wanted):
+        if not wanted(name):
+            continue
+        median, best, number = measure(func, min_time, repeat)
+        results[name] = {'median_s': median, 'min_s': best, 'number': number}
+        print(f"{name:<36} {format_seconds(median):>10}  (min {format_seconds(best)}, {number} calls/repeat)")
+    return results
+
+
+def import_profile(module='Pasar_Fish_App', top=15):
+    """Import module in a fresh interpreter under -X importtime.
+
+    Returns {'total_s', 'packages': [(package, seconds)], 'loaded': set of
+    module names}, where packages are what module imports directly, grouped
+    by top-level package, slowest first.
+    """
+    code = f"import logging; logging.disable(logging.WARNING); import {module}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    total, packages, loaded = 0.0, {}, set()
+    pending = []    # (depth, name, seconds) not yet claimed by a parent - children are printed first
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name, seconds = name.strip(), int(cumulative) / 1e6
+        loaded.add(name)
+        children = []
+        while pending and pending[-1][0] > depth:
+            child = pending.pop()
+            if child[0] == depth + 1:
+                children.append(child)
+        if name == module:
+            total = seconds
+            for _, child, child_seconds in children:
+                package = child.split('.')[0]
+                packages[package] = packages.get(package, 0) + child_seconds
+        pending.append((depth, name, seconds))
+    ranked = sorted(packages.items(), key=lambda item: -item[1])
+    return {'total_s': total, 'packages': ranked[:top], 'loaded': loaded}
+
+
+def print_import_profile(profile, watch=('plotly.express', 'gspread', 'google.oauth2')):
+    print(f"Importing the app: {format_seconds(profile['total_s'])}\n")
+    for package, seconds in profile['packages']:
+        print(f"  {package:<32} {format_seconds(seconds):>10}")
+    loaded = {package for package in watch
+              if any(name == package or name.startswith(package + '.') for name in profile['loaded'])}
+    print("\nDeferred until first use: " + (', '.join(p for p in watch if p not in loaded) or 'none'))
+    print("Loaded at import:         " + (', '.join(p for p in watch if p in loaded) or 'none'))
+
+
+def format_seconds(seconds):
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def environment():
+    import numpy as np
+    import pandas as pd
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline and return the names that slowed down past threshold"""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"{name:<36} {'-':>10} {format_seconds(current['median_s']):>10}      new")
+            continue
+        change = current['median_s'] / before['median_s'] - 1
+        flag = '  REGRESSION' if change > threshold else ''
+        print(f"{name:<36} {format_seconds(before['median_s']):>10} {format_seconds(current['median_s']):>10} "
+              f"{change:>+7.0%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated synthetic dataset sizes for the analytics benchmarks")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds per repeat")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help="write the results as a baseline JSON file")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a baseline and fail on slowdowns")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown vs the baseline median before --compare fails (0.25 = 25%%)")
+    parser.add_argument('--imports', action='store_true', help="profile importing the app instead")
+    args = parser.parse_args(argv)
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+
+    if args.imports:
+        print_import_profile(import_profile())
+        return 0
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    results = run(sizes, args.filter, args.min_time, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=1, sort_keys=True)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            return 1
+        print(f"\nNo slowdowns beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
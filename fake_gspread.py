@@ -0,0 +1,351 @@
+"""Deterministic in-process stand-in for the subset of gspread the app uses.
+
+Lets the app run without Google credentials - for load tests, benchmarks
+and local profiling - by setting ``sheets_backend = "fake"`` in
+secrets.toml. Every client in a process shares one in-memory set of
+spreadsheets, so rows written by one session are visible to the others, as
+with the real service.
+
+Supported: ``Client.open``, ``Spreadsheet.sheet1`` / ``worksheet`` /
+``worksheets`` / ``add_worksheet``, and ``Worksheet.append_row`` /
+``append_rows`` / ``update`` / ``add_cols`` / ``get_all_values`` /
+``get_all_records`` / ``col_values`` / ``batch_get``. Errors are gspread's own exception types, so the app's
+retry and stale-handle handling runs unchanged.
+
+Latency, random failures, the per-minute request quotas and the
+spreadsheet size limit are all configurable. Random draws come from one
+seeded generator, so the same sequence of calls gets the same latencies
+and failures on every run:
+
+    sheets_backend = "fake"
+
+    [fake_sheets]
+    seed = 1
+    latency = 0.15          # mean seconds per call (exponentially distributed)
+    error_rate = 0.01       # chance a call fails with a 503
+    read_quota = 300        # read requests per minute before 429s (0 = unlimited)
+    write_quota = 300       # write requests per minute before 429s
+    max_cells = 10000000    # cells per spreadsheet, as in Google Sheets
+    max_rows = 0            # rows per worksheet (0 = only max_cells applies)
+    auto_create = true      # open() creates missing spreadsheets instead of raising
+"""
+
+import collections
+import json
+import random
+import threading
+import time
+
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 26
+
+# Limits of the real service
+SHEETS_MAX_CELLS = 10000000
+SHEETS_QUOTA_PER_MINUTE = 300
+QUOTA_WINDOW = 60.0
+
+# Requests that count against the write quota - everything else is a read
+WRITE_METHODS = {'add_worksheet', 'add_cols', 'append_rows', 'update'}
+
+_STATUS = {400: 'INVALID_ARGUMENT', 404: 'NOT_FOUND', 429: 'RESOURCE_EXHAUSTED', 503: 'UNAVAILABLE'}
+
+
+class _Response:
+    """Just enough of requests.Response for gspread's APIError"""
+
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = json.dumps({'error': {'code': status_code, 'message': message,
+                                          'status': _STATUS.get(status_code, 'UNKNOWN')}})
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def api_error(status_code, message):
+    from gspread.exceptions import APIError
+    return APIError(_Response(status_code, message))
+
+
+def _cell(value):
+    return '' if value is None else str(value)
+
+
+def _trim(row):
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+class FakeServer:
+    """Spreadsheets held in memory, plus the simulated latency, failure and quota settings.
+
+    ``clock`` and ``sleep`` can be swapped for fakes to make quota windows
+    and latency independent of wall time.
+    """
+
+    def __init__(self, seed=0, latency=0.0, error_rate=0.0, read_quota=0, write_quota=0,
+                 max_cells=SHEETS_MAX_CELLS, max_rows=0, auto_create=True, clock=time.monotonic, sleep=time.sleep):
+        self.lock = threading.RLock()
+        self.clock = clock
+        self.sleep = sleep
+        self.spreadsheets = {}
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.read_quota = read_quota
+        self.write_quota = write_quota
+        self.max_cells = max_cells
+        self.max_rows = max_rows
+        self.auto_create = auto_create
+        self.reset()
+
+    def configure(self, **settings):
+        """Update settings from a secrets table (unknown keys are rejected); a new seed restarts the generator"""
+        known = {'seed', 'latency', 'error_rate', 'read_quota', 'write_quota', 'max_cells', 'max_rows', 'auto_create'}
+        unknown = set(settings) - known
+        if unknown:
+            raise ValueError(f"Unknown fake_sheets settings: {sorted(unknown)}")
+        with self.lock:
+            for name, value in settings.items():
+                setattr(self, name, bool(value) if name == 'auto_create' else type(getattr(self, name))(value))
+            if 'seed' in settings:
+                self.random = random.Random(self.seed)
+
+    def reset(self):
+        """Drop every spreadsheet and counter, and restart the random generator from the seed"""
+        with self.lock:
+            self.spreadsheets.clear()
+            self.random = random.Random(self.seed)
+            self.calls = collections.Counter()
+            self.errors = collections.Counter()
+            self._recent = {'read': collections.deque(), 'write': collections.deque()}
+
+    def _over_quota(self, kind):
+        quota = self.write_quota if kind == 'write' else self.read_quota
+        if not quota:
+            return False
+        recent = self._recent[kind]
+        now = self.clock()
+        while recent and recent[0] <= now - QUOTA_WINDOW:
+            recent.popleft()
+        if len(recent) >= quota:
+            return True
+        recent.append(now)
+        return False
+
+    def call(self, method):
+        """Account for one API request: sleep for the simulated latency, maybe fail"""
+        kind = 'write' if method in WRITE_METHODS else 'read'
+        with self.lock:
+            self.calls[method] += 1
+            delay = self.random.expovariate(1.0 / self.latency) if self.latency else 0.0
+            failed = self.random.random() < self.error_rate
+            error = None
+            if self._over_quota(kind):
+                error = api_error(429, f"Quota exceeded for quota metric '{kind.title()} requests' "
+                                       f"and limit '{kind.title()} requests per minute per user'")
+            elif failed:
+                error = api_error(503, f"Simulated failure in {method}")
+            if error is not None:
+                self.errors[error.code] += 1
+        if delay:
+            self.sleep(delay)
+        if error is not None:
+            raise error
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    @property
+    def total_errors(self):
+        return sum(self.errors.values())
+
+
+_server = FakeServer()
+
+
+def server():
+    """The process-wide fake backend"""
+    return _server
+
+
+class FakeClient:
+    def __init__(self, backend=None):
+        self.backend = backend or _server
+
+    def open(self, title):
+        """Open a spreadsheet by title (created with an empty Sheet1 on first use if auto_create is on)"""
+        from gspread.exceptions import SpreadsheetNotFound
+
+        self.backend.call('open')
+        with self.backend.lock:
+            spreadsheet = self.backend.spreadsheets.get(title)
+            if spreadsheet is None:
+                if not self.backend.auto_create:
+                    raise SpreadsheetNotFound(title)
+                spreadsheet = self.create(title)
+            return spreadsheet
+
+    def create(self, title):
+        """Add an empty spreadsheet with a default Sheet1, without counting an API call"""
+        with self.backend.lock:
+            spreadsheet = FakeSpreadsheet(self.backend, title)
+            spreadsheet._add('Sheet1', DEFAULT_ROWS, DEFAULT_COLS)
+            self.backend.spreadsheets[title] = spreadsheet
+            return spreadsheet
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, title):
+        self.backend = backend
+        self.title = title
+        self._worksheets = []
+
+    def _add(self, title, rows, cols):
+        worksheet = FakeWorksheet(self, title, int(rows), int(cols))
+        self._worksheets.append(worksheet)
+        return worksheet
+
+    def cell_count(self):
+        return sum(worksheet.row_count * worksheet.col_count for worksheet in self._worksheets)
+
+    @property
+    def sheet1(self):
+        self.backend.call('sheet1')
+        return self._worksheets[0]
+
+    def worksheet(self, title):
+        from gspread.exceptions import WorksheetNotFound
+
+        self.backend.call('worksheet')
+        for worksheet in self._worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise WorksheetNotFound(title)
+
+    def worksheets(self):
+        self.backend.call('worksheets')
+        return list(self._worksheets)
+
+    def add_worksheet(self, title, rows, cols):
+        self.backend.call('add_worksheet')
+        with self.backend.lock:
+            if any(worksheet.title == title for worksheet in self._worksheets):
+                raise api_error(400, f'A sheet with the name "{title}" already exists.')
+            if self.cell_count() + int(rows) * int(cols) > self.backend.max_cells:
+                raise api_error(400, f"This action would increase the number of cells in the workbook "
+                                     f"above the limit of {self.backend.max_cells} cells.")
+            return self._add(title, rows, cols)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows, cols):
+        self.spreadsheet = spreadsheet
+        self.backend = spreadsheet.backend
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._rows = []
+
+    def _values(self):
+        with self.backend.lock:
+            return [list(row) for row in self._rows]
+
+    def append_row(self, values, value_input_option='RAW'):
+        return self.append_rows([values], value_input_option)
+
+    def append_rows(self, values, value_input_option='RAW'):
+        """Append after the last row with data, growing the grid like the API (within the size limits)"""
+        from gspread.utils import rowcol_to_a1
+
+        self.backend.call('append_rows')
+        new_rows = [_trim(_cell(value) for value in row) for row in values]
+        with self.backend.lock:
+            row_count = max(self.row_count, len(self._rows) + len(new_rows))
+            col_count = max([self.col_count] + [len(row) for row in new_rows])
+            if self.backend.max_rows and len(self._rows) + len(new_rows) > self.backend.max_rows:
+                raise api_error(400, f"Range exceeds grid limits: worksheet '{self.title}' is limited to "
+                                     f"{self.backend.max_rows} rows.")
+            cells = self.spreadsheet.cell_count() - self.row_count * self.col_count + row_count * col_count
+            if cells > self.backend.max_cells:
+                raise api_error(400, f"This action would increase the number of cells in the workbook "
+                                     f"above the limit of {self.backend.max_cells} cells.")
+            first = len(self._rows) + 1
+            self._rows.extend(new_rows)
+            self.row_count, self.col_count = row_count, col_count
+        return {'updates': {'updatedRange': f"'{self.title}'!A{first}:"
+                                            f"{rowcol_to_a1(first + len(new_rows) - 1, col_count)}",
+                            'updatedRows': len(new_rows)}}
+
+    def add_cols(self, cols):
+        self.backend.call('add_cols')
+        with self.backend.lock:
+            if self.spreadsheet.cell_count() + self.row_count * int(cols) > self.backend.max_cells:
+                raise api_error(400, f"This action would increase the number of cells in the workbook "
+                                     f"above the limit of {self.backend.max_cells} cells.")
+            self.col_count += int(cols)
+
+    def update(self, values=None, range_name=None, value_input_option='RAW'):
+        """Overwrite the cells from the top-left of range_name (the grid isn't grown)"""
+        from gspread.utils import a1_range_to_grid_range
+
+        self.backend.call('update')
+        grid = a1_range_to_grid_range(range_name)
+        top, left = grid.get('startRowIndex', 0), grid.get('startColumnIndex', 0)
+        with self.backend.lock:
+            if top + len(values) > self.row_count or left + max(map(len, values)) > self.col_count:
+                raise api_error(400, f"Range ({self.title}!{range_name}) exceeds grid limits.")
+            for offset, row in enumerate(values):
+                while len(self._rows) <= top + offset:
+                    self._rows.append([])
+                target = self._rows[top + offset]
+                target.extend([''] * (left + len(row) - len(target)))
+                target[left:left + len(row)] = [_cell(value) for value in row]
+                self._rows[top + offset] = _trim(target)
+        return {'updatedRange': f"'{self.title}'!{range_name}", 'updatedRows': len(values)}
+
+    def get_all_values(self):
+        self.backend.call('get_all_values')
+        rows = self._values()
+        width = max((len(row) for row in rows), default=0)
+        return [row + [''] * (width - len(row)) for row in rows]
+
+    def get_all_records(self, head=1, default_blank='', numericise_ignore=None):
+        """Rows below the header as dicts, with numbers converted like gspread does"""
+        from gspread.utils import numericise_all
+
+        self.backend.call('get_all_records')
+        rows = self._values()
+        if len(rows) < head:
+            return []
+        keys = rows[head - 1]
+        records = []
+        for row in rows[head:]:
+            row = row + [''] * (len(keys) - len(row))
+            values = numericise_all(row[:len(keys)], default_blank=default_blank, ignore=numericise_ignore or [])
+            records.append(dict(zip(keys, values)))
+        return records
+
+    def col_values(self, col):
+        self.backend.call('col_values')
+        return _trim(row[col - 1] if len(row) >= col else '' for row in self._values())
+
+    def batch_get(self, ranges):
+        """Values for each A1 range, with trailing empty cells and rows dropped like the API does"""
+        from gspread.utils import a1_range_to_grid_range
+
+        self.backend.call('batch_get')
+        rows = self._values()
+        results = []
+        for a1_range in ranges:
+            grid = a1_range_to_grid_range(a1_range)
+            first_row, end_row = grid.get('startRowIndex', 0), grid.get('endRowIndex', len(rows))
+            first_col, end_col = grid.get('startColumnIndex', 0), grid.get('endColumnIndex')
+            block = [_trim(row[first_col:end_col]) for row in rows[first_row:end_row]]
+            while block and not block[-1]:
+                block.pop()
+            results.append(block)
+        return results
@@ -0,0 +1,45 @@
+"""The 16 result fish: the art and display name for each MBTI type.
+
+Kept out of the app script so build steps (share_cards.py) can use them
+without starting Streamlit.
+"""
+
+# Result art for each type
+FISH_IMAGES = {
+    'ISTJ': 'images/Malabar_Red_Snapper.jpg',
+    'ISFJ': 'images/Anchovy.jpg',
+    'INFJ': 'images/Brownbanded_Bamboo_Shark.jpg',
+    'INTJ': 'images/Diamond_Trevally.jpg',
+    'ISTP': 'images/Unicorn_Leatherjacket.jpg',
+    'ISFP': 'images/Barramundi.jpg',
+    'INFP': 'images/Bombay_Duck.jpg',
+    'INTP': 'images/Whitespotted_Whipray.jpg',
+    'ESTP': 'images/Narrow_Based Spanish Mackerel.jpg',
+    'ESFP': 'images/Black_Promfret.jpg',
+    'ENFP': 'images/Yellowtail_Fusilier.jpg',
+    'ENTP': 'images/Indian_Mackerel.jpg',
+    'ESTJ': 'images/Wolf_Herring.jpg',
+    'ESFJ': 'images/Yellowtail_Croaker.jpg',
+    'ENFJ': 'images/Longtailed_Tuna.jpg',
+    'ENTJ': 'images/Giant_Grouper.jpg'
+}
+
+# Fish names - extracted from filenames
+FISH_NAMES = {
+    'ISTJ': 'Malabar Red Snapper',
+    'ISFJ': 'Anchovy',
+    'INFJ': 'Brownbanded Bamboo Shark',
+    'INTJ': 'Diamond Trevally',
+    'ISTP': 'Unicorn Leatherjacket',
+    'ISFP': 'Barramundi',
+    'INFP': 'Bombay Duck',
+    'INTP': 'Whitespotted Whipray',
+    'ESTP': 'Narrow-Based Spanish Mackerel',
+    'ESFP': 'Black Pomfret',
+    'ENFP': 'Yellowtail Fusilier',
+    'ENTP': 'Indian Mackerel',
+    'ESTJ': 'Wolf Herring',
+    'ESFJ': 'Yellowtail Croaker',
+    'ENFJ': 'Longtailed Tuna',
+    'ENTJ': 'Giant Grouper'
+}
@@ -0,0 +1,232 @@
+"""Timed spans for each script rerun, aggregated into histograms.
+
+Streamlit reruns the whole script for every click, so per-rerun latency is
+the sum of many small steps (CSS injection, image HTML, scoring, Sheets
+calls, each analytics chart). Page code marks those steps with
+``span(name)``; every span is recorded in a process-wide histogram, and the
+spans of the current rerun are also kept together so one rerun can be
+broken down step by step.
+
+Histograms can be exported in the Prometheus text format (written to a
+file for node_exporter's textfile collector, or scraped from the admin
+panel), and each rerun's breakdown can be logged:
+
+    metrics_textfile = "/var/lib/node_exporter/pasarfish.prom"
+    metrics_log = true          # one INFO line per rerun
+    metrics_panel = true        # timing panel in the sidebar
+
+Spans recorded outside a rerun (the background Sheets writers) go to the
+histograms only.
+"""
+
+import bisect
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond markdown calls to slow Sheets requests
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_NAME = 'pasarfish_span_seconds'
+
+# Span name for the whole rerun
+RERUN = 'rerun'
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum (not thread-safe - the registry locks)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate from the buckets, interpolating linearly within one (like histogram_quantile)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Registry:
+    """Process-wide span histograms and the in-progress rerun of each script thread"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.histograms = {}
+        self.textfile = None
+        self.log = False
+        self.export_interval = 15.0
+        self._last_export = 0.0
+
+    def configure(self, textfile=None, log=False, export_interval=15.0):
+        self.textfile = textfile
+        self.log = bool(log)
+        self.export_interval = float(export_interval)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.append((name, seconds))
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """Time the block under name (recorded even if it raises - st.rerun() does)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of span()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def laps(self, prefix=None):
+        """Callable that records the time since its previous call (or creation) as prefix.name.
+
+        For long straight-line sections like the dashboard, where wrapping
+        each chart in a with-block would re-indent the whole page.
+        """
+        last = [time.perf_counter()]
+
+        def lap(name):
+            now = time.perf_counter()
+            self.observe(f'{prefix}.{name}' if prefix else name, now - last[0])
+            last[0] = now
+        return lap
+
+    @contextlib.contextmanager
+    def fragment(self, name):
+        """Time an st.fragment body.
+
+        A fragment-only rerun skips the top and bottom of the script, so it is
+        recorded as a rerun of its own under name. When the fragment runs as
+        part of a full rerun this does nothing.
+        """
+        if getattr(self._local, 'trace', None) is not None:
+            yield
+            return
+        self.begin_rerun(name)
+        try:
+            yield
+        finally:
+            self.end_rerun()
+
+    def begin_rerun(self, name=RERUN):
+        """Start collecting this thread's spans as one rerun"""
+        self._local.trace = []
+        self._local.name = name
+        self._local.started = time.perf_counter()
+
+    def end_rerun(self):
+        """Finish the rerun: record its total, log/export if configured, return its [(span, seconds)]"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return []
+        self._local.trace = None
+        total = time.perf_counter() - self._local.started
+        self.observe(self._local.name, total)
+        trace.append((self._local.name, total))
+
+        if self.log:
+            logger.info("%s %.1fms: %s", self._local.name, total * 1000,
+                        ' '.join(f'{name}={seconds * 1000:.1f}ms' for name, seconds in trace[:-1]))
+        if self.textfile and time.monotonic() - self._last_export >= self.export_interval:
+            self._last_export = time.monotonic()
+            try:
+                self.write_textfile(self.textfile)
+            except OSError as e:
+                logger.warning("Could not write metrics to %s: %s", self.textfile, e)
+        return trace
+
+    def summary(self):
+        """{span: {count, mean_ms, p50_ms, p95_ms, p99_ms}} sorted by total time spent"""
+        with self._lock:
+            items = sorted(self.histograms.items(), key=lambda item: -item[1].sum)
+            return {
+                name: {
+                    'count': histogram.count,
+                    'mean_ms': round(histogram.sum / histogram.count * 1000, 2),
+                    **{f'p{q}_ms': round(histogram.quantile(q / 100) * 1000, 2) for q in (50, 95, 99)},
+                }
+                for name, histogram in items if histogram.count
+            }
+
+    def prometheus_text(self):
+        """All span histograms in the Prometheus text exposition format"""
+        lines = [f'# HELP {METRIC_NAME} Time spent in each instrumented step of the app.',
+                 f'# TYPE {METRIC_NAME} histogram']
+        with self._lock:
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, count in zip(self.buckets + (None,), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound is None else repr(bound)
+                    lines.append(f'{METRIC_NAME}_bucket{{span="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_sum{{span="{label}"}} {histogram.sum:.6f}')
+                lines.append(f'{METRIC_NAME}_count{{span="{label}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Atomically replace path with the current histograms"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+_registry = Registry()
+
+
+def registry():
+    """The process-wide registry"""
+    return _registry
+
+
+def span(name):
+    return _registry.span(name)
+
+
+def timed(name):
+    return _registry.timed(name)
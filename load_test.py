@@ -0,0 +1,276 @@
+"""Concurrent-session load test against an in-memory Sheets backend.
+
+Replays quiz takers through the real app with Streamlit's AppTest driver:
+demographics -> 12 questions -> results, pausing between steps for a
+sampled think time. All sessions share one process, so they share the
+app's cached resources (scoring table, outbox writer, aggregates) the way
+sessions on one Streamlit replica do. Google Sheets is replaced by
+fake_gspread with configurable latency and error rate, so no network or
+credentials are needed.
+
+AppTest installs process-global runtime state for each script run, so
+reruns from concurrent sessions are executed one at a time - much like
+one replica's script threads contending for the GIL. Background work (the
+outbox writer's Sheets calls) still runs in parallel. The report gives both
+the time spent running the script and the latency a user would see,
+which includes waiting for other sessions' reruns, and the app's own
+per-step timings (see instrumentation.py).
+
+    python load_test.py --sessions 40 --concurrency 20
+    python load_test.py --think lognormal:4:0.6 --think-scale 0.25 --latency 0.2 --error-rate 0.02
+    python load_test.py --json load_report.json
+
+Think-time distributions (seconds): fixed:S, uniform:A:B, exp:MEAN and
+lognormal:MEDIAN:SIGMA. --think-scale multiplies every sample, to compress
+a realistic session into a shorter run.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pasar_Fish_App.py')
+
+# AppTest swaps process-global runtime state per run, so only one script run at a time
+_RUN_LOCK = threading.Lock()
+
+
+def think_sampler(spec, rng):
+    """Callable returning think times for a 'name:param:...' spec"""
+    name, *params = spec.split(':')
+    params = [float(p) for p in params]
+    if name == 'fixed':
+        return lambda: params[0]
+    if name == 'uniform':
+        return lambda: rng.uniform(params[0], params[1])
+    if name == 'exp':
+        return lambda: rng.expovariate(1.0 / params[0])
+    if name == 'lognormal':
+        return lambda: rng.lognormvariate(math.log(params[0]), params[1])
+    raise ValueError(f"Unknown think-time distribution: {spec}")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def rss_bytes():
+    """Current resident set size (Linux), falling back to peak RSS elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class SessionDriver:
+    """One simulated quiz taker"""
+
+    def __init__(self, secrets, think, think_scale, rng, timeout):
+        self.secrets = secrets      # what secrets.toml would hold
+        self.think = think
+        self.think_scale = think_scale
+        self.rng = rng
+        self.timeout = timeout
+        self.latencies = []         # submit -> page rendered, including queueing
+        self.run_times = []         # script execution only
+        self.state_bytes = None     # quiz state held by the finished session
+
+    def _timed(self, step):
+        start = time.perf_counter()
+        with _RUN_LOCK:
+            run_start = time.perf_counter()
+            at = step()
+        end = time.perf_counter()
+        self.latencies.append(end - start)
+        self.run_times.append(end - run_start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return at
+
+    def _pause(self):
+        time.sleep(max(0.0, self.think() * self.think_scale))
+
+    def _click(self, at, label):
+        button = next(b for b in at.button if label in b.label)
+        return self._timed(lambda: button.click().run(timeout=self.timeout))
+
+    def run(self):
+        from streamlit.testing.v1 import AppTest
+
+        from response_schema import AGE_OPTIONS, GENDER_OPTIONS, OCCUPATION_OPTIONS, REFERRAL_OPTIONS
+
+        at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        at.secrets.update(self.secrets)
+        at = self._timed(lambda: at.run())
+
+        self._pause()
+        at.selectbox(key='age_select').select(self.rng.choice(AGE_OPTIONS))
+        at.selectbox(key='gender_select').select(self.rng.choice(GENDER_OPTIONS))
+        at.selectbox(key='occupation_select').select(self.rng.choice(OCCUPATION_OPTIONS))
+        at.selectbox(key='referral_select').select(self.rng.choice(REFERRAL_OPTIONS))
+        at.checkbox(key='pdpa_consent').check()
+        at = self._click(at, 'Start')
+
+        for number in range(1, 13):
+            self._pause()
+            radio = at.radio(key=f'radio_Q{number}')
+            radio.set_value(self.rng.choice(radio.options))
+            at = self._click(at, 'Get Results' if number == 12 else 'Next')
+
+        result = at.session_state.quiz.result if 'quiz' in at.session_state else None
+        if result is None:
+            raise RuntimeError("Session finished without a result")
+        self.state_bytes = at.session_state.quiz.footprint()
+        return result['type']
+
+
+def run_load_test(sessions, concurrency, think='lognormal:3:0.5', think_scale=0.1, latency=0.1,
+                  error_rate=0.0, write_quota=0, seed=0, timeout=60, drain_timeout=60):
+    """Run the sessions and return a report dict"""
+    import fake_gspread
+    import instrumentation
+    import sheets_io
+    from response_schema import RESPONSE_COLUMNS
+
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    os.chdir(os.path.dirname(APP_PATH))
+
+    state_dir = tempfile.mkdtemp(prefix='pasarfish-load-')
+    secrets = {
+        'sheets_backend': 'fake',
+        'fake_sheets': {'seed': seed, 'latency': latency, 'error_rate': error_rate, 'write_quota': write_quota},
+        'sheet_name': 'Load_Test_Responses',
+        'outbox_path': os.path.join(state_dir, 'outbox.sqlite3'),
+        'aggregates_path': os.path.join(state_dir, 'aggregates.json'),
+        'snapshot_path': os.path.join(state_dir, 'snapshot'),
+    }
+
+    # Responses sheet with its header row already in place, as in production
+    backend = fake_gspread.server()
+    backend.configure(latency=0, error_rate=0, write_quota=0)
+    backend.reset()
+    fake_gspread.FakeClient(backend).create(secrets['sheet_name'])._worksheets[0].append_row(RESPONSE_COLUMNS)
+    backend.configure(**secrets['fake_sheets'])
+
+    seeds = random.Random(seed)
+    drivers = []
+    for _ in range(sessions + 1):
+        rng = random.Random(seeds.random())
+        drivers.append(SessionDriver(secrets, think_sampler(think, rng), think_scale, rng, timeout))
+    # One untimed session first, so imports and cached resources aren't counted against the run
+    warmup, drivers = drivers[0], drivers[1:]
+
+    failures = []
+    failures_lock = threading.Lock()
+
+    def run_one(driver):
+        try:
+            driver.run()
+            return True
+        except Exception as e:
+            with failures_lock:
+                failures.append(f"{type(e).__name__}: {e}")
+            return False
+
+    sheet = backend.spreadsheets[secrets['sheet_name']]._worksheets[0]
+
+    def wait_for_rows(count):
+        """Wait until the background outbox writer has delivered count data rows"""
+        deadline = time.perf_counter() + drain_timeout
+        while len(sheet._rows) - 1 < count and time.perf_counter() < deadline:
+            time.sleep(0.2)
+
+    warmed_up = run_one(warmup)
+    wait_for_rows(int(warmed_up))
+    rows_before = len(sheet._rows)
+    backend.calls.clear()
+    backend.errors.clear()
+    instrumentation.registry().reset()
+    failures.clear()
+
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        completed = sum(pool.map(run_one, drivers))
+    elapsed = time.perf_counter() - started
+    rss_after = rss_bytes()
+
+    # Completed sessions' rows reach the (fake) sheet via the background outbox writer
+    wait_for_rows(rows_before - 1 + completed)
+
+    latencies = [latency for driver in drivers for latency in driver.latencies]
+    run_times = [run_time for driver in drivers for run_time in driver.run_times]
+
+    def summary(values):
+        summary = {name: round(percentile(values, q) * 1000, 1) if values else None
+                   for name, q in [('p50', 50), ('p95', 95), ('p99', 99)]}
+        summary['max'] = round(max(values) * 1000, 1) if values else None
+        return summary
+
+    return {
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'completed': completed,
+        'failed': sessions - completed,
+        'failures': failures[:10],
+        'elapsed_s': round(elapsed, 3),
+        'sessions_per_s': round(completed / elapsed, 3) if elapsed else None,
+        'reruns': len(latencies),
+        'reruns_per_s': round(len(latencies) / elapsed, 3) if elapsed else None,
+        'rerun_latency_ms': summary(latencies),
+        'script_run_ms': summary(run_times),
+        'rss_growth_mb': round((rss_after - rss_before) / 2**20, 1),
+        'memory_per_session_kb': round((rss_after - rss_before) / 1024 / max(completed, 1), 1),
+        'quiz_state_bytes': max((d.state_bytes for d in drivers if d.state_bytes), default=None),
+        'rows_written': len(sheet._rows) - rows_before,
+        'sheets_calls': dict(backend.calls),
+        'sheets_errors': {str(code): count for code, count in backend.errors.items()},
+        # Retries after 429/5xx and calls that gave up waiting for quota (whole process, warm-up included)
+        'sheets_limiter': sheets_io.rate_limiter().stats(),
+        # Where rerun time went, from the app's own instrumentation (slowest steps first)
+        'spans_ms': instrumentation.registry().summary(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay concurrent quiz sessions against a fake Sheets backend")
+    parser.add_argument('--sessions', type=int, default=20, help="total sessions to run")
+    parser.add_argument('--concurrency', type=int, default=10, help="sessions in flight at once")
+    parser.add_argument('--think', default='lognormal:3:0.5', help="think-time distribution between steps")
+    parser.add_argument('--think-scale', type=float, default=0.1, help="multiplier applied to think times")
+    parser.add_argument('--latency', type=float, default=0.1, help="mean fake Sheets API latency, seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="chance a fake Sheets call fails")
+    parser.add_argument('--write-quota', type=int, default=0,
+                        help="fake Sheets write requests per minute before 429s (0 = unlimited)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60, help="per-rerun timeout, seconds")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        args.sessions, args.concurrency, think=args.think, think_scale=args.think_scale,
+        latency=args.latency, error_rate=args.error_rate, write_quota=args.write_quota, seed=args.seed, timeout=args.timeout,
+    )
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Answer-to-fish scoring engine for the 12-question quiz.
+
+Every combination of the 12 two-option answers maps to exactly one MBTI type,
+so the answers are packed into a 12-bit index and the type is read straight
+out of a 4,096-entry table instead of scanning the combinations workbook.
+
+The table is compiled into a small binary artifact so the app can start
+without importing openpyxl or parsing the workbook:
+
+    python question_bank.py            # rebuild if the workbook changed
+    python question_bank.py --check    # exit 1 if the artifact is stale
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+QUESTION_IDS = [f'Q{i}' for i in range(1, 13)]
+
+# Workbook column for each MBTI letter, and the key used in survey_data
+DIMENSION_COLUMNS = ['E/I', 'S/N', 'T/F', 'J/P']
+DIMENSION_KEYS = ['E_I', 'S_N', 'T_F', 'J_P']
+
+# Type code bits (high to low): E/I, S/N, T/F, J/P - so the list index is the code
+MBTI_TYPES = [ei + sn + tf + jp for ei in 'EI' for sn in 'SN' for tf in 'TF' for jp in 'JP']
+
+TABLE_SIZE = 1 << len(QUESTION_IDS)
+
+DEFAULT_WORKBOOK = 'Updated_combinations.xlsx'
+DEFAULT_ARTIFACT = 'Updated_combinations.qbank'
+
+# Artifact layout: magic, version, workbook sha256, 12 option pairs, table, sha256 of all before it
+ARTIFACT_MAGIC = b'PFQB'
+ARTIFACT_VERSION = 1
+DIGEST_SIZE = 32
+ARTIFACT_SIZE = len(ARTIFACT_MAGIC) + 1 + DIGEST_SIZE + 2 * len(QUESTION_IDS) + TABLE_SIZE + DIGEST_SIZE
+
+
+class ScoringEngine:
+    """O(1) lookup of MBTI type and dimension letters from 12 answers"""
+
+    def __init__(self, options, table):
+        # options: one (first, second) letter pair per question, in QUESTION_IDS order
+        # table: TABLE_SIZE type codes, one per packed answer index
+        if len(options) != len(QUESTION_IDS):
+            raise ValueError(f"Expected {len(QUESTION_IDS)} option pairs, got {len(options)}")
+        if len(table) != TABLE_SIZE:
+            raise ValueError(f"Expected {TABLE_SIZE} table entries, got {len(table)}")
+        if any(code >= len(MBTI_TYPES) for code in table):
+            raise ValueError("Scoring table contains an unknown type code")
+
+        self.options = tuple(tuple(pair) for pair in options)
+        self.table = bytes(table)
+
+        # Per-question answer -> bit value, so packing is a dict lookup per answer
+        self._bits = [
+            {first: 0, second: 1 << (len(QUESTION_IDS) - 1 - i)}
+            for i, (first, second) in enumerate(self.options)
+        ]
+        # Pre-split results so a lookup returns shared, ready-made values
+        self._results = [
+            (mbti_type, dict(zip(DIMENSION_KEYS, mbti_type)))
+            for mbti_type in MBTI_TYPES
+        ]
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the engine from the combinations workbook and check it row by row"""
+        missing = [col for col in QUESTION_IDS + DIMENSION_COLUMNS + ['MBTI Type'] if col not in df.columns]
+        if missing:
+            raise ValueError(f"Combinations workbook is missing columns: {missing}")
+
+        options = []
+        for q_id in QUESTION_IDS:
+            letters = sorted(df[q_id].dropna().unique())
+            if len(letters) != 2:
+                raise ValueError(f"{q_id} must have exactly two answer letters, found {letters}")
+            options.append(tuple(letters))
+
+        engine_bits = [
+            {first: 0, second: 1 << (len(QUESTION_IDS) - 1 - i)}
+            for i, (first, second) in enumerate(options)
+        ]
+        type_codes = {mbti_type: code for code, mbti_type in enumerate(MBTI_TYPES)}
+
+        table = bytearray(TABLE_SIZE)
+        seen = bytearray(TABLE_SIZE)
+        rows = df[QUESTION_IDS + DIMENSION_COLUMNS + ['MBTI Type']].itertuples(index=False, name=None)
+        for row in rows:
+            answers = row[:len(QUESTION_IDS)]
+            letters = row[len(QUESTION_IDS):-1]
+            mbti_type = row[-1]
+
+            if mbti_type not in type_codes:
+                raise ValueError(f"Unknown MBTI type in workbook: {mbti_type!r}")
+            if ''.join(letters) != mbti_type:
+                raise ValueError(f"Dimension letters {letters} do not spell {mbti_type} for answers {answers}")
+
+            index = 0
+            for bits, answer in zip(engine_bits, answers):
+                index |= bits[answer]
+            if seen[index]:
+                raise ValueError(f"Duplicate answer combination in workbook: {answers}")
+            seen[index] = 1
+            table[index] = type_codes[mbti_type]
+
+        if not all(seen):
+            raise ValueError(f"Workbook covers {sum(seen)} of {TABLE_SIZE} answer combinations")
+
+        return cls(options, table)
+
+    def to_bytes(self, workbook_digest):
+        """Serialize the engine, tagged with the sha256 of the workbook it came from"""
+        if len(workbook_digest) != DIGEST_SIZE:
+            raise ValueError("workbook_digest must be a raw sha256 digest")
+        body = (
+            ARTIFACT_MAGIC
+            + bytes([ARTIFACT_VERSION])
+            + workbook_digest
+            + ''.join(first + second for first, second in self.options).encode('ascii')
+            + self.table
+        )
+        return body + hashlib.sha256(body).digest()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Parse an artifact, returning (engine, workbook_digest)"""
+        if len(data) != ARTIFACT_SIZE:
+            raise ValueError(f"Question bank artifact should be {ARTIFACT_SIZE} bytes, got {len(data)}")
+        body, checksum = data[:-DIGEST_SIZE], data[-DIGEST_SIZE:]
+        if hashlib.sha256(body).digest() != checksum:
+            raise ValueError("Question bank artifact checksum mismatch")
+        if body[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC or body[len(ARTIFACT_MAGIC)] != ARTIFACT_VERSION:
+            raise ValueError("Not a question bank artifact, or an unsupported version")
+
+        offset = len(ARTIFACT_MAGIC) + 1
+        workbook_digest = body[offset:offset + DIGEST_SIZE]
+        offset += DIGEST_SIZE
+        letters = body[offset:offset + 2 * len(QUESTION_IDS)].decode('ascii')
+        offset += 2 * len(QUESTION_IDS)
+        options = [(letters[i], letters[i + 1]) for i in range(0, len(letters), 2)]
+        return cls(options, body[offset:]), workbook_digest
+
+    def pack(self, answers):
+        """Pack a {'Q1': letter, ...} dict into the 12-bit table index"""
+        index = 0
+        for q_id, bits in zip(QUESTION_IDS, self._bits):
+            index |= bits[answers[q_id]]
+        return index
+
+    def lookup(self, answers):
+        """Return (mbti_type, dimensions) for a full answer set, or None if incomplete"""
+        try:
+            index = self.pack(answers)
+        except KeyError:
+            return None
+        return self._results[self.table[index]]
+
+
+def workbook_digest(workbook_path):
+    """sha256 of the workbook bytes, used to tell whether the artifact is stale"""
+    with open(workbook_path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compile_workbook(workbook_path=DEFAULT_WORKBOOK):
+    """Parse the workbook and build a checked engine (imports pandas/openpyxl)"""
+    import pandas as pd
+    return ScoringEngine.from_frame(pd.read_excel(workbook_path))
+
+
+def write_artifact(engine, digest, artifact_path=DEFAULT_ARTIFACT):
+    """Atomically write the compiled artifact next to the workbook"""
+    tmp_path = f"{artifact_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(engine.to_bytes(digest))
+    os.replace(tmp_path, artifact_path)
+
+
+def read_artifact(artifact_path=DEFAULT_ARTIFACT):
+    """Return (engine, workbook_digest) from an artifact, or None if missing or corrupt"""
+    try:
+        with open(artifact_path, 'rb') as f:
+            return ScoringEngine.from_bytes(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def load_engine(workbook_path=DEFAULT_WORKBOOK, artifact_path=DEFAULT_ARTIFACT):
+    """Load the compiled artifact, recompiling only when the workbook hash changed"""
+    compiled = read_artifact(artifact_path)
+
+    if not os.path.exists(workbook_path):
+        # Deployed without the workbook - the artifact is the source of truth
+        if compiled is None:
+            raise FileNotFoundError(workbook_path)
+        return compiled[0]
+
+    digest = workbook_digest(workbook_path)
+    if compiled is not None and compiled[1] == digest:
+        return compiled[0]
+
+    engine = compile_workbook(workbook_path)
+    try:
+        write_artifact(engine, digest, artifact_path)
+    except OSError:
+        # Read-only deploy - keep the freshly compiled engine in memory
+        pass
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the combinations workbook into a lookup artifact")
+    parser.add_argument('--workbook', default=DEFAULT_WORKBOOK)
+    parser.add_argument('--output', default=DEFAULT_ARTIFACT)
+    parser.add_argument('--check', action='store_true', help="only report whether the artifact is up to date")
+    parser.add_argument('--force', action='store_true', help="recompile even if the artifact is up to date")
+    args = parser.parse_args(argv)
+
+    digest = workbook_digest(args.workbook)
+    compiled = read_artifact(args.output)
+    up_to_date = compiled is not None and compiled[1] == digest
+
+    if args.check:
+        print(f"{args.output}: {'up to date' if up_to_date else 'stale or missing'}")
+        return 0 if up_to_date else 1
+
+    if up_to_date and not args.force:
+        print(f"{args.output} is up to date")
+        return 0
+
+    engine = compile_workbook(args.workbook)
+    write_artifact(engine, digest, args.output)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes, workbook sha256 {digest.hex()[:12]})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Compact per-session quiz state.
+
+Streamlit keeps st.session_state in memory for every open browser tab, so
+whatever one quiz taker carries is multiplied by the number of concurrent
+sessions on a replica. QuizState keeps the whole quiz flow in a few
+fixed-size fields instead of datetimes and string dicts:
+
+- answers as a 12-bit integer (bit set = the question's second option, Q1
+  in the high bit) plus a 12-bit mask of the questions answered so far
+- step start times and durations as float32 arrays of time.monotonic()
+  offsets from the start of the session (NaN = not yet)
+- demographics as small codes into the option lists in response_schema
+- the result as an index into MBTI_TYPES
+
+Page code goes through the accessors, which hand back the same letters,
+rounded seconds and dicts the flat session keys used to hold.
+footprint() is the number of bytes one session holds.
+"""
+
+import math
+import sys
+import time
+from array import array
+
+from question_bank import DIMENSION_KEYS, MBTI_TYPES, QUESTION_IDS
+from response_schema import AGE_OPTIONS, COUNTRY_OPTIONS, GENDER_OPTIONS, OCCUPATION_OPTIONS, REFERRAL_OPTIONS
+
+# Steps with their own clock: the demographics form, then each question
+TIMERS = ['demographics'] + QUESTION_IDS
+
+# Demographics dict key and the options its code indexes, in code order
+DEMOGRAPHIC_FIELDS = [
+    ('age', AGE_OPTIONS),
+    ('gender', GENDER_OPTIONS),
+    ('country', COUNTRY_OPTIONS),
+    ('occupation', OCCUPATION_OPTIONS),
+    ('referral_source', REFERRAL_OPTIONS),
+]
+
+# Steps: 0 = demographics, 1-12 = questions, 13 = results
+RESULTS_STEP = len(QUESTION_IDS) + 1
+
+NOT_SPECIFIED = "Not specified"
+
+_TIMER_INDEX = {name: i for i, name in enumerate(TIMERS)}
+_QUESTION_BITS = {q_id: 1 << (len(QUESTION_IDS) - 1 - i) for i, q_id in enumerate(QUESTION_IDS)}
+_TOTAL = len(TIMERS)            # slot of the whole survey's duration
+_NAN = float('nan')
+
+
+class QuizState:
+    """One quiz taker's progress, answers, timings, demographics and result"""
+
+    __slots__ = ('options', 'step', 'answer_bits', 'answered', 'result_code', 'saved',
+                 '_origin', '_starts', '_durations', '_demographics')
+
+    def __init__(self, options):
+        # options: one (first, second) answer letter pair per question, in QUESTION_IDS order.
+        # Shared by every session, so it costs each one a pointer.
+        if len(options) != len(QUESTION_IDS):
+            raise ValueError(f"Expected {len(QUESTION_IDS)} option pairs, got {len(options)}")
+        self.options = options
+        self.reset()
+
+    def reset(self):
+        """Back to the demographics form with a fresh clock (Retake Quiz)"""
+        self.step = 0
+        self.answer_bits = 0
+        self.answered = 0
+        self.result_code = -1
+        self.saved = False
+        self._origin = time.monotonic()
+        self._starts = array('f', [_NAN] * len(TIMERS))
+        self._durations = array('f', [_NAN] * (len(TIMERS) + 1))
+        self._demographics = None   # array('H') of DEMOGRAPHIC_FIELDS codes once the form is submitted
+
+    # --- Answers ---
+
+    def answer(self, q_id):
+        """Answer letter for q_id, or None if it hasn't been answered"""
+        bit = _QUESTION_BITS[q_id]
+        if not self.answered & bit:
+            return None
+        return self.options[QUESTION_IDS.index(q_id)][1 if self.answer_bits & bit else 0]
+
+    def set_answer(self, q_id, letter):
+        bit = _QUESTION_BITS[q_id]
+        first, second = self.options[QUESTION_IDS.index(q_id)]
+        if letter == second:
+            self.answer_bits |= bit
+        elif letter == first:
+            self.answer_bits &= ~bit
+        else:
+            raise ValueError(f"{letter!r} is not an answer to {q_id}")
+        self.answered |= bit
+
+    def answers(self):
+        """{q_id: letter} for the questions answered so far"""
+        return {q_id: self.answer(q_id) for q_id in QUESTION_IDS if self.answered & _QUESTION_BITS[q_id]}
+
+    # --- Timing ---
+
+    def elapsed(self):
+        """Seconds since the session (or the last retake) started"""
+        return time.monotonic() - self._origin
+
+    def start_clock(self, name):
+        """(Re)start the clock on a step in TIMERS"""
+        self._starts[_TIMER_INDEX[name]] = self.elapsed()
+
+    def clock_started(self, name):
+        return not math.isnan(self._starts[_TIMER_INDEX[name]])
+
+    def stop_clock(self, name, overwrite=True):
+        """Record the time since start_clock(name) as the step's duration.
+
+        With overwrite=False a duration that's already recorded is kept (going
+        back to a question doesn't replace the time first spent on it).
+        """
+        i = _TIMER_INDEX[name]
+        if math.isnan(self._starts[i]):
+            return
+        if not overwrite and not math.isnan(self._durations[i]):
+            return
+        self._durations[i] = self.elapsed() - self._starts[i]
+
+    def duration(self, name):
+        """Recorded seconds for a step, rounded to 0.01 (0 if never recorded)"""
+        seconds = self._durations[_TIMER_INDEX[name]]
+        return 0 if math.isnan(seconds) else round(seconds, 2)
+
+    def question_times(self):
+        """{'Q1_Time': seconds, ...} for every question"""
+        return {f'{q_id}_Time': self.duration(q_id) for q_id in QUESTION_IDS}
+
+    # --- Demographics ---
+
+    def set_demographics(self, age, gender, country, occupation, referral_source):
+        """Store the submitted form as codes (an unknown or blank country becomes not specified)"""
+        codes = [
+            AGE_OPTIONS.index(age),
+            GENDER_OPTIONS.index(gender),
+            COUNTRY_OPTIONS.index(country) if country in COUNTRY_OPTIONS else 0,
+            OCCUPATION_OPTIONS.index(occupation),
+            REFERRAL_OPTIONS.index(referral_source),
+        ]
+        self._demographics = array('H', codes)
+
+    @property
+    def demographics(self):
+        """The submitted form as {age, gender, country, occupation, referral_source, pdpa_consent,
+        demographics_time}, or {} before it's submitted"""
+        if self._demographics is None:
+            return {}
+        demographics = {key: options[code] for (key, options), code in zip(DEMOGRAPHIC_FIELDS, self._demographics)}
+        demographics['country'] = demographics['country'] or NOT_SPECIFIED
+        demographics['pdpa_consent'] = 'Yes'    # The form can't be submitted without it
+        demographics['demographics_time'] = self.duration('demographics')
+        return demographics
+
+    # --- Result ---
+
+    def set_result(self, mbti_type, saved, total_time):
+        """Record the scored type and move to the results step"""
+        self.result_code = MBTI_TYPES.index(mbti_type)
+        self.saved = bool(saved)
+        self._durations[_TOTAL] = total_time
+        self.step = RESULTS_STEP
+
+    @property
+    def result(self):
+        """{type, dimensions, saved, total_time, question_times}, or None before Get Results"""
+        if self.result_code < 0:
+            return None
+        mbti_type = MBTI_TYPES[self.result_code]
+        return {
+            'type': mbti_type,
+            'dimensions': dict(zip(DIMENSION_KEYS, mbti_type)),
+            'saved': self.saved,
+            'total_time': round(self._durations[_TOTAL], 2),
+            'question_times': self.question_times(),
+        }
+
+    def footprint(self):
+        """Bytes held by this session's state (small ints and the shared options aren't counted)"""
+        size = sys.getsizeof(self) + sys.getsizeof(self._starts) + sys.getsizeof(self._durations)
+        size += sys.getsizeof(self._origin) + sys.getsizeof(self.answer_bits) + sys.getsizeof(self.answered)
+        if self._demographics is not None:
+            size += sys.getsizeof(self._demographics)
+        return size
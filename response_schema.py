@@ -0,0 +1,108 @@
+"""Typed schema for the responses sheet.
+
+Rows come out of Google Sheets as strings and loosely numericised values.
+normalize_responses() runs once per loaded batch: it parses Timestamp into
+datetime64, turns the demographic, answer and MBTI letter columns into
+Categorical columns with fixed category lists, and downcasts the timing
+columns to float32. Grouping on category codes is much faster than on
+object strings, and the frame takes a fraction of the memory.
+"""
+
+from question_bank import DIMENSION_KEYS, MBTI_TYPES, QUESTION_IDS
+
+# How Timestamp is written to the sheet (and parsed back)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Demographic choices offered on the survey form, in display order
+AGE_OPTIONS = ["Under 18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+GENDER_OPTIONS = ["Male", "Female", "Non-binary", "Other", "Prefer not to say"]
+OCCUPATION_OPTIONS = ["Student", "Professional", "Self-employed", "Retired", "Unemployed", "Other"]
+REFERRAL_OPTIONS = ["Social Media", "Friend/Family", "Search Engine", "Website/Blog", "Other"]
+
+# Country is optional - "" (first) means not answered
+COUNTRY_OPTIONS = [
+    "", "Afghanistan", "Albania", "Algeria", "Andorra", "Angola", "Antigua and Barbuda", "Argentina",
+    "Armenia", "Australia", "Austria", "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados",
+    "Belarus", "Belgium", "Belize", "Benin", "Bhutan", "Bolivia", "Bosnia and Herzegovina", "Botswana",
+    "Brazil", "Brunei", "Bulgaria", "Burkina Faso", "Burundi", "Cabo Verde", "Cambodia", "Cameroon",
+    "Canada", "Central African Republic", "Chad", "Chile", "China", "Colombia", "Comoros", "Congo",
+    "Costa Rica", "Croatia", "Cuba", "Cyprus", "Czech Republic", "Denmark", "Djibouti", "Dominica",
+    "Dominican Republic", "East Timor", "Ecuador", "Egypt", "El Salvador", "Equatorial Guinea", "Eritrea",
+    "Estonia", "Eswatini", "Ethiopia", "Fiji", "Finland", "France", "Gabon", "Gambia", "Georgia",
+    "Germany", "Ghana", "Greece", "Grenada", "Guatemala", "Guinea", "Guinea-Bissau", "Guyana", "Haiti",
+    "Honduras", "Hungary", "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel", "Italy",
+    "Jamaica", "Japan", "Jordan", "Kazakhstan", "Kenya", "Kiribati", "Korea North", "Korea South", "Kosovo",
+    "Kuwait", "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Lesotho", "Liberia", "Libya", "Liechtenstein",
+    "Lithuania", "Luxembourg", "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali", "Malta",
+    "Marshall Islands", "Mauritania", "Mauritius", "Mexico", "Micronesia", "Moldova", "Monaco", "Mongolia",
+    "Montenegro", "Morocco", "Mozambique", "Myanmar", "Namibia", "Nauru", "Nepal", "Netherlands",
+    "New Zealand", "Nicaragua", "Niger", "Nigeria", "North Macedonia", "Norway", "Oman", "Pakistan",
+    "Palau", "Palestine", "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines", "Poland",
+    "Portugal", "Qatar", "Romania", "Russia", "Rwanda", "Saint Kitts and Nevis", "Saint Lucia",
+    "Saint Vincent and the Grenadines", "Samoa", "San Marino", "Sao Tome and Principe", "Saudi Arabia",
+    "Senegal", "Serbia", "Seychelles", "Sierra Leone", "Singapore", "Slovakia", "Slovenia",
+    "Solomon Islands", "Somalia", "South Africa", "South Sudan", "Spain", "Sri Lanka", "Sudan", "Suriname",
+    "Sweden", "Switzerland", "Syria", "Taiwan", "Tajikistan", "Tanzania", "Thailand", "Togo", "Tonga",
+    "Trinidad and Tobago", "Tunisia", "Turkey", "Turkmenistan", "Tuvalu", "Uganda", "Ukraine",
+    "United Arab Emirates", "United Kingdom", "United States", "Uruguay", "Uzbekistan", "Vanuatu",
+    "Vatican City", "Venezuela", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
+]
+
+TIMING_COLUMNS = ['Demographics_Time'] + [f'{q_id}_Time' for q_id in QUESTION_IDS] + ['Total_Survey_Time']
+
+# Column order of the responses sheet (the order survey_data is built in)
+RESPONSE_COLUMNS = (
+    ['Timestamp', 'Age', 'Gender', 'Country', 'Occupation', 'Referral_Source', 'Demographics_Time']
+    + QUESTION_IDS + [f'{q_id}_Time' for q_id in QUESTION_IDS]
+    + ['Total_Survey_Time'] + DIMENSION_KEYS + ['MBTI_Type', 'Response_ID']
+)
+
+
+def categories_for(options):
+    """{column: fixed category list} for every categorical response column"""
+    categories = {
+        'Age': AGE_OPTIONS,
+        'Gender': GENDER_OPTIONS,
+        'Occupation': OCCUPATION_OPTIONS,
+        'Referral_Source': REFERRAL_OPTIONS,
+        # Free-ish text (long country list, "Not specified") - categories come from the data
+        'Country': [],
+        'MBTI_Type': MBTI_TYPES,
+    }
+    for position, key in enumerate(DIMENSION_KEYS):
+        categories[key] = sorted({mbti_type[position] for mbti_type in MBTI_TYPES})
+    for q_id, pair in zip(QUESTION_IDS, options):
+        categories[q_id] = list(pair)
+    return categories
+
+
+def _categorical(series, fixed):
+    """Categorical with the fixed categories first, then any other values seen (blanks become missing)"""
+    import numpy as np
+    import pandas as pd
+
+    # Stringify only the unique values, not every row
+    raw_codes, uniques = pd.factorize(series)
+    labels = [str(value) for value in uniques]
+    known = set(fixed)
+    categories = list(fixed) + sorted({label for label in labels if label and label not in known})
+    positions = {category: code for code, category in enumerate(categories)}
+    remap = np.array([positions.get(label, -1) for label in labels] + [-1], dtype=np.int64)
+    return pd.Categorical.from_codes(remap[raw_codes], categories=categories)
+
+
+def normalize_responses(df, options):
+    """Return a typed copy of a raw responses frame (columns it doesn't know are left as they are)"""
+    import pandas as pd
+    from pandas.api.types import is_datetime64_any_dtype
+
+    df = df.copy()
+    if 'Timestamp' in df.columns and not is_datetime64_any_dtype(df['Timestamp']):
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'].astype(object), format=TIMESTAMP_FORMAT, errors='coerce')
+    for column, fixed in categories_for(options).items():
+        if column in df.columns:
+            df[column] = _categorical(df[column], fixed)
+    for column in TIMING_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+    return df
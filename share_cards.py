@@ -0,0 +1,235 @@
+"""Open Graph share cards for the 16 result fish.
+
+Shared result links used to point straight at the app, so every link
+preview (WhatsApp, LinkedIn, Telegram, X) had to load the whole Streamlit
+app only to find its generic title. Each fish type now gets:
+
+- a 1200x630 JPEG card: the fish's result art beside its name
+- a small landing page carrying Open Graph / Twitter card tags for that
+  card, which sends people on to the quiz
+
+Both are built into static/share/ (served by Streamlit's static file
+serving) and committed, so an unfurl costs a crawler a few kilobytes of
+static content and the app never draws a card itself - it only shares the
+landing pages that exist. Cards are named by a hash of their art, name and
+layout, so a build only redraws the fish that changed:
+
+    python share_cards.py            # draw missing cards, rewrite changed pages
+    python share_cards.py --check    # exit 1 if any card or page is stale
+"""
+
+import argparse
+import glob
+import hashlib
+import html
+import os
+import sys
+
+from assets import STATIC_DIR, STATIC_URL, file_digest, slug
+from fish_types import FISH_IMAGES, FISH_NAMES
+
+# Where the app is deployed - landing pages send people on to it
+APP_URL = "https://pasarfishapp-eu7kqgndtsmiy9pwfz9zrr.streamlit.app/"
+
+CARD_DIR = 'share'
+CARD_SIZE = (1200, 630)
+
+# Part of every card's hash - bump when the layout below changes so all cards are redrawn
+CARD_VERSION = 1
+
+TITLE = "Which Local Fish Are You?"
+DESCRIPTION = "Take the Pasarfish quiz today to find out which local fish matches your personality!"
+
+# Colours picked from the result art
+BACKGROUND = (159, 180, 199)
+PANEL = (214, 228, 240)
+INK = (31, 59, 87)
+
+MARGIN = 40
+JPEG_OPTIONS = {'quality': 82, 'optimize': True, 'progressive': True}
+
+
+def _font(size, bold=False):
+    """A scalable font: DejaVu if the system has it, else Pillow's bundled default"""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype('DejaVuSans-Bold.ttf' if bold else 'DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _fit_text(draw, text, max_width, size, bold=False, min_size=24):
+    """Largest font (from size down to min_size) that fits text in max_width"""
+    while True:
+        font = _font(size, bold)
+        if size <= min_size or draw.textlength(text, font=font) <= max_width:
+            return font
+        size -= 4
+
+
+def render_card(image_path, fish_name, target):
+    """Draw one card: the portrait result art on the left, the fish's name on a panel to the right"""
+    from PIL import Image, ImageDraw, ImageOps
+
+    width, height = CARD_SIZE
+    card = Image.new('RGB', CARD_SIZE, BACKGROUND)
+    with Image.open(image_path) as art:
+        art = ImageOps.contain(art.convert('RGB'), (width // 2 - MARGIN, height - 2 * MARGIN), Image.LANCZOS)
+    card.paste(art, (MARGIN, (height - art.height) // 2))
+
+    draw = ImageDraw.Draw(card)
+    left = MARGIN * 2 + art.width
+    panel = (left, MARGIN, width - MARGIN, height - MARGIN)
+    draw.rounded_rectangle(panel, radius=32, fill=PANEL)
+
+    text_width = panel[2] - panel[0] - 2 * MARGIN
+    center = (panel[0] + panel[2]) // 2
+    lines = [
+        ("I'm a", _font(36)),
+        (fish_name, _fit_text(draw, fish_name, text_width, 72, bold=True)),
+        (TITLE, _fit_text(draw, TITLE, text_width, 36, bold=True)),
+        ("Take the quiz at Pasarfish", _font(28)),
+    ]
+    gaps = [16, 56, 20]
+    heights = [font.getbbox(text)[3] for text, font in lines]
+    y = (height - sum(heights) - sum(gaps)) // 2
+    for (text, font), line_height, gap in zip(lines, heights, gaps + [0]):
+        draw.text((center, y), text, font=font, fill=INK, anchor='mt')
+        y += line_height + gap
+
+    tmp_path = f'{target}.tmp'
+    card.save(tmp_path, format='JPEG', **JPEG_OPTIONS)
+    os.replace(tmp_path, target)
+
+
+def landing_html(fish_name, card_url, page_url, app_url):
+    """Landing page for one fish: Open Graph tags for crawlers, a redirect to the quiz for people"""
+    title = html.escape(f"I'm a {fish_name}! 🐟 {TITLE}")
+    description = html.escape(DESCRIPTION)
+    app_url = html.escape(app_url)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<meta name="description" content="{description}">
+<meta property="og:type" content="website">
+<meta property="og:site_name" content="Pasarfish">
+<meta property="og:title" content="{title}">
+<meta property="og:description" content="{description}">
+<meta property="og:url" content="{html.escape(page_url)}">
+<meta property="og:image" content="{html.escape(card_url)}">
+<meta property="og:image:width" content="{CARD_SIZE[0]}">
+<meta property="og:image:height" content="{CARD_SIZE[1]}">
+<meta name="twitter:card" content="summary_large_image">
+<meta name="twitter:title" content="{title}">
+<meta name="twitter:description" content="{description}">
+<meta name="twitter:image" content="{html.escape(card_url)}">
+<meta http-equiv="refresh" content="0; url={app_url}">
+</head>
+<body>
+<p><a href="{app_url}">{html.escape(TITLE)} Take the quiz</a></p>
+</body>
+</html>
+"""
+
+
+def _base_url(app_url):
+    return app_url.rstrip('/') + '/' + STATIC_URL
+
+
+def page_path(mbti_type):
+    """Landing page path under static/ - stable per type, so links already shared keep working"""
+    return f'{CARD_DIR}/{mbti_type.lower()}.html'
+
+
+def planned_files(fish_images=FISH_IMAGES, fish_names=FISH_NAMES, app_url=APP_URL):
+    """{mbti_type: (image_path, card_path, landing page html)} for every type whose art exists"""
+    base_url = _base_url(app_url)
+    planned = {}
+    for mbti_type, image_path in sorted(fish_images.items()):
+        if not os.path.exists(image_path):
+            continue
+        fish_name = fish_names.get(mbti_type, mbti_type)
+        digest = hashlib.sha256(f'{CARD_VERSION}\0{fish_name}\0{file_digest(image_path)}'.encode()).hexdigest()
+        card_path = f'{CARD_DIR}/{slug(image_path)}.{digest[:10]}.jpg'
+        page = landing_html(fish_name, base_url + card_path, base_url + page_path(mbti_type), app_url)
+        planned[mbti_type] = (image_path, card_path, page)
+    return planned
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_if_changed(target, content):
+    if _read(target) == content:
+        return False
+    tmp_path = f'{target}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, target)
+    return True
+
+
+def build(force=False, fish_images=FISH_IMAGES, fish_names=FISH_NAMES, app_url=APP_URL):
+    """Draw missing (or, with force, all) cards, rewrite changed pages and prune unreferenced files"""
+    os.makedirs(os.path.join(STATIC_DIR, CARD_DIR), exist_ok=True)
+    planned = planned_files(fish_images, fish_names, app_url)
+    for mbti_type, (image_path, card_path, page) in planned.items():
+        if force or not os.path.exists(os.path.join(STATIC_DIR, card_path)):
+            render_card(image_path, fish_names.get(mbti_type, mbti_type), os.path.join(STATIC_DIR, card_path))
+            print(f"drew {card_path}")
+        if _write_if_changed(os.path.join(STATIC_DIR, page_path(mbti_type)), page):
+            print(f"wrote {page_path(mbti_type)}")
+
+    referenced = {card_path for _, card_path, _ in planned.values()} | {page_path(mbti_type) for mbti_type in planned}
+    for path in glob.glob(os.path.join(STATIC_DIR, CARD_DIR, '*')):
+        if os.path.relpath(path, STATIC_DIR).replace(os.sep, '/') not in referenced:
+            os.remove(path)
+    return planned
+
+
+def is_stale(fish_images=FISH_IMAGES, fish_names=FISH_NAMES, app_url=APP_URL):
+    return any(
+        not os.path.exists(os.path.join(STATIC_DIR, card_path))
+        or _read(os.path.join(STATIC_DIR, page_path(mbti_type))) != page
+        for mbti_type, (_, card_path, page) in planned_files(fish_images, fish_names, app_url).items()
+    )
+
+
+def published_pages(mbti_types=FISH_IMAGES, app_url=APP_URL):
+    """{mbti_type: absolute landing page URL} for the types whose page has been built.
+
+    Only checks that the files exist - the app never draws cards, so types
+    without a page (or a checkout without static/share/) just share app_url.
+    """
+    base_url = _base_url(app_url)
+    return {mbti_type: base_url + page_path(mbti_type) for mbti_type in mbti_types
+            if os.path.exists(os.path.join(STATIC_DIR, page_path(mbti_type)))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Open Graph share cards and landing pages into static/share/")
+    parser.add_argument('--check', action='store_true', help="only report whether the cards are up to date")
+    parser.add_argument('--force', action='store_true', help="redraw every card")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        stale = is_stale()
+        print(f"{os.path.join(STATIC_DIR, CARD_DIR)}: {'stale or missing' if stale else 'up to date'}")
+        return 1 if stale else 0
+
+    planned = build(force=args.force)
+    total = sum(os.path.getsize(os.path.join(STATIC_DIR, card_path)) for _, card_path, _ in planned.values())
+    print(f"{len(planned)} share cards, {total / 1024:.0f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
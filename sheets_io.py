@@ -0,0 +1,712 @@
+"""Google Sheets I/O helpers that run off the Streamlit request thread.
+
+Streamlit reruns the whole script for every click, so anything that waits on
+the Google API blocks the user's page. The helpers here take rows from the
+page code immediately and talk to Sheets from a background thread.
+"""
+
+import atexit
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Google Sheets API quotas: 300 read and 300 write requests per minute per
+# project, but only 60 of each per minute per user - and the app is one user
+SHEETS_READS_PER_MINUTE = 60
+SHEETS_WRITES_PER_MINUTE = 60
+
+# Who waits for a token first when a bucket is empty (lower goes first)
+PRIORITY_RESPONSES = 0
+PRIORITY_ANALYTICS = 1
+
+# Per priority: (seconds a call may spend waiting for tokens and retrying, retries).
+# Responses are written from a background thread that retries again later;
+# analytics reads block a page, which falls back to the local snapshot.
+PRIORITY_BUDGETS = {
+    PRIORITY_RESPONSES: (120.0, 6),
+    PRIORITY_ANALYTICS: (5.0, 1),
+}
+
+# How far past the last confirmed append a retry looks for rows its unconfirmed attempt wrote
+DEDUPE_WINDOW_ROWS = 1000
+
+
+def connect_client(backend='google', credentials=None, fake_options=None):
+    """gspread client for settings already read from secrets.toml.
+
+    backend "fake" gives the in-memory stand-in (configured with fake_options);
+    otherwise credentials is the service account info. Makes no Streamlit
+    calls, so any thread can connect; raises if it can't.
+    """
+    if backend == 'fake':
+        import fake_gspread
+        fake_gspread.server().configure(**(fake_options or {}))
+        return fake_gspread.FakeClient()
+    if not credentials:
+        raise RuntimeError("No gcp_service_account credentials in secrets.toml")
+    # Imported on first Sheets access rather than at startup, so the quiz pages draw sooner
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    return gspread.authorize(Credentials.from_service_account_info(dict(credentials), scopes=GOOGLE_SCOPES))
+
+
+def is_stale_handle_error(exc):
+    """True for errors that mean a cached spreadsheet/worksheet handle is no longer valid"""
+    from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+
+    if isinstance(exc, (SpreadsheetNotFound, WorksheetNotFound)):
+        return True
+    if isinstance(exc, APIError):
+        return getattr(exc.response, 'status_code', None) in (401, 403, 404)
+    return type(exc).__name__ == 'RefreshError'
+
+
+def is_retryable_error(exc):
+    """True for quota (429) and server-side (5xx) errors, which are worth retrying after a pause"""
+    from gspread.exceptions import APIError
+
+    if isinstance(exc, APIError):
+        status = getattr(exc.response, 'status_code', None)
+        return status == 429 or (status is not None and status >= 500)
+    return False
+
+
+def is_quota_error(exc):
+    from gspread.exceptions import APIError
+    return isinstance(exc, APIError) and getattr(exc.response, 'status_code', None) == 429
+
+
+def ensure_header(worksheet, columns):
+    """Make row 1 name every column, appending the names of columns added since the sheet was set up.
+
+    An empty sheet gets the whole header, and the grid is widened first if
+    the new names don't fit. Returns True if row 1 was written;
+    a header that isn't a prefix of columns is left alone and logged.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    columns = list(columns)
+    header = (worksheet.batch_get(['1:1'])[0] or [[]])[0]
+    if header == columns:
+        return False
+    if header != columns[:len(header)]:
+        logger.warning("Sheet header doesn't match the expected columns, leaving it as is: %s", header)
+        return False
+    if worksheet.col_count < len(columns):
+        worksheet.add_cols(len(columns) - worksheet.col_count)
+    worksheet.update(range_name=rowcol_to_a1(1, len(header) + 1), values=[columns[len(header):]])
+    logger.info("Added %s to the sheet header", ", ".join(columns[len(header):]))
+    return True
+
+
+def appended_row(response):
+    """Last sheet row an append_rows() response says it wrote, or None"""
+    try:
+        updated_range = response['updates']['updatedRange']
+    except (KeyError, TypeError):
+        return None
+    match = re.search(r'(\d+)$', updated_range)
+    return int(match.group(1)) if match else None
+
+
+def column_values_after(worksheet, col, after_row=None, window=DEDUPE_WINDOW_ROWS):
+    """Values in column col of the (at most window) rows below after_row.
+
+    Reads the whole column only if after_row is unknown.
+    """
+    if after_row is None:
+        return worksheet.col_values(col)
+    from gspread.utils import rowcol_to_a1
+
+    letter = re.sub(r'\d', '', rowcol_to_a1(1, col))
+    block = worksheet.batch_get([f'{letter}{after_row + 1}:{letter}{after_row + window}'])[0]
+    return [row[0] for row in block if row]
+
+
+class RateLimitTimeout(RuntimeError):
+    """A Sheets call couldn't get a token (or finish retrying) within its priority's time budget"""
+
+
+def _positive_rate(rate):
+    # A zero rate would never refill (and divide by zero while waiting)
+    if not rate > 0:
+        raise ValueError(f"Token bucket rate must be positive, got {rate!r}")
+    return rate
+
+
+class TokenBucket:
+    """``rate`` tokens a second, holding at most ``capacity``.
+
+    When the bucket runs dry, waiters are served strictly in (priority,
+    arrival) order, so a queued response write goes before an earlier
+    analytics read. penalize() pushes the balance below zero to pause
+    everyone after the API reports the quota exhausted. ``clock`` can be
+    swapped for a fake so refills don't depend on wall time.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = _positive_rate(rate)
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._cond = threading.Condition()
+        self._waiters = []          # heap of (priority, arrival) tickets
+        self._arrivals = itertools.count()
+
+    def configure(self, rate, capacity):
+        with self._cond:
+            self._refill()
+            self.rate = _positive_rate(rate)
+            self.capacity = max(1, capacity)
+            self._tokens = min(self._tokens, self.capacity)
+            self._cond.notify_all()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=0, timeout=None):
+        """Take one token, waiting behind higher-priority and earlier callers; False on timeout"""
+        deadline = None if timeout is None else self.clock() + timeout
+        ticket = (priority, next(self._arrivals))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    first = self._waiters[0] == ticket
+                    if first and self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    # The first in line sleeps until its token is due; the rest until it's taken
+                    wait = (1 - self._tokens) / self.rate if first else None
+                    if deadline is not None:
+                        remaining = deadline - self.clock()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def penalize(self, seconds):
+        """Hand out no tokens for the next seconds"""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class SheetsRateLimiter:
+    """Process-wide read and write token buckets in front of every Sheets call.
+
+    call() waits for a token of the call's kind at its priority, then retries
+    429 and 5xx errors with exponential backoff and full jitter. A 429 also
+    pauses the whole bucket, so every caller slows down together instead of
+    each finding out on its own. Under sustained load, analytics reads run out
+    of their short budget and raise RateLimitTimeout before the background
+    writers lose anything. ``clock`` and ``sleep`` can be swapped for fakes,
+    as in fake_gspread.FakeServer.
+    """
+
+    def __init__(self, read_per_minute=SHEETS_READS_PER_MINUTE, write_per_minute=SHEETS_WRITES_PER_MINUTE,
+                 burst=10, base_delay=1.0, max_delay=32.0, budgets=None, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets = {'read': TokenBucket(read_per_minute / 60.0, burst, clock),
+                        'write': TokenBucket(write_per_minute / 60.0, burst, clock)}
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budgets = dict(PRIORITY_BUDGETS if budgets is None else budgets)
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.timeouts = 0
+
+    def configure(self, read_per_minute=SHEETS_READS_PER_MINUTE, write_per_minute=SHEETS_WRITES_PER_MINUTE, burst=10):
+        self.buckets['read'].configure(float(read_per_minute) / 60.0, int(burst))
+        self.buckets['write'].configure(float(write_per_minute) / 60.0, int(burst))
+
+    def backoff(self, attempt):
+        """Full jitter: uniform between 0 and base_delay * 2**attempt (capped at max_delay)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, kind, priority, func):
+        """func() once a kind ('read'/'write') token is free, retrying 429/5xx within the priority's budget"""
+        bucket = self.buckets[kind]
+        budget, max_retries = self.budgets[priority]
+        deadline = self.clock() + budget
+        attempt = 0
+        while True:
+            if not bucket.acquire(priority, timeout=max(0.0, deadline - self.clock())):
+                with self._lock:
+                    self.timeouts += 1
+                raise RateLimitTimeout(f"No Sheets {kind} quota free within {budget:.0f}s")
+            try:
+                return func()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                if self.clock() + delay >= deadline:
+                    raise
+                if is_quota_error(e):
+                    bucket.penalize(delay)
+                with self._lock:
+                    self.retries += 1
+                logger.info("Sheets %s failed (%s), retry %d in %.1fs", kind, e, attempt + 1, delay)
+                self.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        return {'retries': self.retries, 'timeouts': self.timeouts}
+
+
+_rate_limiter = SheetsRateLimiter()
+
+
+def rate_limiter():
+    """The process-wide Sheets rate limiter"""
+    return _rate_limiter
+
+
+class WorksheetCache:
+    """Spreadsheet and worksheet handles cached by (sheet name, tab) with a TTL.
+
+    ``client.open()`` is a Drive search plus a metadata fetch, and ``worksheet()``
+    and ``sheet1`` fetch metadata again. Caching the handles means a save or
+    load costs only the one API call that actually reads or writes cells.
+
+    ``get_client()`` is called (from whichever thread needs it first) to
+    connect, and the client is kept until ``invalidate()`` drops everything.
+    """
+
+    def __init__(self, get_client, ttl=600.0, limiter=None):
+        self._get_client = get_client
+        self.ttl = ttl
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._client = None
+        self._spreadsheets = {}     # sheet_name -> (spreadsheet, expires_at)
+        self._worksheets = {}       # (sheet_name, tab) -> (worksheet, expires_at)
+
+    def _spreadsheet(self, sheet_name):
+        cached = self._spreadsheets.get(sheet_name)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        if self._client is None:
+            self._client = self._get_client()
+            if self._client is None:
+                raise RuntimeError("Google Sheets client unavailable")
+        spreadsheet = self._client.open(sheet_name)
+        self._spreadsheets[sheet_name] = (spreadsheet, time.monotonic() + self.ttl)
+        return spreadsheet
+
+    def get(self, sheet_name, tab=None, create=None):
+        """Return the worksheet for tab (None = first sheet).
+
+        create is an optional (rows, cols, header) used to add the tab the first
+        time it turns out to be missing.
+        """
+        key = (sheet_name, tab)
+        cached = self._worksheets.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        with self._lock:
+            cached = self._worksheets.get(key)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+            spreadsheet = self._spreadsheet(sheet_name)
+            if tab is None:
+                worksheet = spreadsheet.sheet1
+            else:
+                from gspread.exceptions import WorksheetNotFound
+                try:
+                    worksheet = spreadsheet.worksheet(tab)
+                except WorksheetNotFound:
+                    if create is None:
+                        raise
+                    rows, cols, header = create
+                    worksheet = spreadsheet.add_worksheet(title=tab, rows=rows, cols=cols)
+                    worksheet.append_row(header)
+
+            self._worksheets[key] = (worksheet, time.monotonic() + self.ttl)
+            return worksheet
+
+    def invalidate(self, sheet_name=None):
+        """Drop cached handles for one spreadsheet, or all of them and the client"""
+        with self._lock:
+            if sheet_name is None:
+                self._client = None
+                self._spreadsheets.clear()
+                self._worksheets.clear()
+                return
+            self._spreadsheets.pop(sheet_name, None)
+            for key in [key for key in self._worksheets if key[0] == sheet_name]:
+                del self._worksheets[key]
+
+    def is_cached(self, sheet_name, tab=None):
+        cached = self._worksheets.get((sheet_name, tab))
+        return bool(cached) and cached[1] > time.monotonic()
+
+    def run(self, sheet_name, tab, operation, create=None, kind='read', priority=PRIORITY_ANALYTICS):
+        """Call operation(worksheet), dropping the cached handles if they went stale.
+
+        With a limiter, operation is one kind ('read'/'write') request made at
+        priority; looking up handles that aren't cached counts as a read.
+        """
+        if self.limiter is None:
+            return self._run(sheet_name, tab, operation, create)
+        if not self.is_cached(sheet_name, tab):
+            self.limiter.call('read', priority, lambda: self.get(sheet_name, tab, create))
+        return self.limiter.call(kind, priority, lambda: self._run(sheet_name, tab, operation, create))
+
+    def _run(self, sheet_name, tab, operation, create):
+        worksheet = self.get(sheet_name, tab, create)
+        try:
+            return operation(worksheet)
+        except Exception as e:
+            if is_stale_handle_error(e):
+                self.invalidate(sheet_name)
+            raise
+
+
+class ResponseOutbox:
+    """Append-only SQLite (WAL) log of rows waiting to be written to Sheets.
+
+    Every submission is committed here before anything else happens, so a
+    Sheets outage or a restart never loses a response. Rows are marked
+    delivered once Sheets accepts them and purged after ``keep_days``
+    (by ``clock``, wall time unless a test swaps it).
+    """
+
+    def __init__(self, path, keep_days=7, clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.keep_days = keep_days
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                response_id TEXT NOT NULL UNIQUE,
+                row TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                delivered_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_undelivered ON outbox (delivered_at, id)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def add(self, response_id, row):
+        """Durably record a row; adding the same response_id twice is a no-op"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (response_id, row, created_at) VALUES (?, ?, ?)",
+                (response_id, json.dumps(row), self.clock())
+            )
+
+    def undelivered(self, limit):
+        """Oldest undelivered rows as (id, response_id, row, attempts, created_at)"""
+        with self._lock:
+            records = self._conn.execute(
+                "SELECT id, response_id, row, attempts, created_at FROM outbox "
+                "WHERE delivered_at IS NULL ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(oid, response_id, json.loads(row), attempts, created_at)
+                for oid, response_id, row, attempts, created_at in records]
+
+    def undelivered_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL").fetchone()[0]
+
+    def mark_attempted(self, ids):
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+
+    def last_sheet_row(self):
+        """Sheet row the last confirmed append ended at, or None if none has been confirmed"""
+        with self._lock:
+            record = self._conn.execute("SELECT value FROM meta WHERE key = 'last_sheet_row'").fetchone()
+        return int(record[0]) if record else None
+
+    def mark_delivered(self, ids, sheet_row=None):
+        now = self.clock()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE outbox SET delivered_at = ? WHERE id = ?", [(now, i) for i in ids])
+            if sheet_row is not None:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sheet_row', ?)",
+                                   (str(sheet_row),))
+            self._conn.execute("DELETE FROM outbox WHERE delivered_at < ?", (now - self.keep_days * 86400,))
+            self._conn.execute("COMMIT")
+
+
+class OutboxWriter:
+    """Process-wide writer that appends rows from a durable ResponseOutbox to Sheets in batches.
+
+    Rows are committed to the outbox first and batched from it rather than
+    from memory, so anything left undelivered by an outage or a restart is
+    replayed automatically. A batch goes out with a single ``append_rows``
+    call once ``batch_size`` rows are waiting or the oldest has waited
+    ``flush_interval`` seconds, and never more often than once per
+    ``flush_interval``, which keeps a busy replica well under the Sheets
+    per-minute write quota.
+
+    ``write_rows(rows, maybe_written, after_row)`` is called from the worker
+    thread and returns the sheet row the append ended at (None if unknown),
+    which the outbox keeps. A batch that was sent before without
+    confirmation has maybe_written=True, and after_row is where the last
+    confirmed append ended, so the writer only has to look below it for rows
+    that already reached the sheet.
+
+    ``prepare()``, if given, runs once before the first batch (and is retried
+    with it), e.g. to check the sheet's header.
+    """
+
+    def __init__(self, write_rows, outbox, prepare=None, batch_size=50, flush_interval=5.0,
+                 retry_delay=2.0, max_retry_delay=60.0, name="sheets-writer"):
+        self._write_rows = write_rows
+        self.outbox = outbox
+        self._prepare = prepare
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._pending = []          # outbox records taken for the next write
+        self._outstanding = outbox.undelivered_count()    # rows accepted but not yet written
+        self._sheet_row = None
+        self._arrived = threading.Event()
+        self._done = threading.Condition()
+        self._stopping = threading.Event()
+        self._last_flush = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row, response_id=None):
+        """Commit one row to the outbox; returns False only if the local write failed"""
+        try:
+            self.outbox.add(response_id or str(uuid.uuid4()), list(row))
+        except sqlite3.Error as e:
+            logger.error("Could not write response to the local outbox: %s", e)
+            return False
+        with self._done:
+            self._outstanding += 1
+        self._arrived.set()
+        return True
+
+    def pending_count(self):
+        """Rows accepted but not yet written"""
+        return self._outstanding
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far has been written; False on timeout"""
+        with self._done:
+            return self._done.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self, timeout=10.0):
+        """Flush what we can and stop the worker - registered with atexit"""
+        self._stopping.set()
+        self._arrived.set()
+        self._thread.join(timeout)
+
+    def _collect(self):
+        """Load the oldest undelivered rows once enough are waiting or the oldest is due"""
+        self._arrived.clear()
+        records = self.outbox.undelivered(self.batch_size)
+        if records and not self._stopping.is_set() and len(records) < self.batch_size:
+            due = records[0][4] + self.flush_interval - self.outbox.clock()
+            if due > 0:
+                self._arrived.wait(min(due, 0.5))
+                return
+        if not records:
+            self._arrived.wait(0.5)
+        self._pending = records
+
+    def _write_batch(self, failed_before):
+        if self._prepare is not None:
+            self._prepare()
+            self._prepare = None
+        maybe_written = failed_before or any(attempts for _, _, _, attempts, _ in self._pending)
+        self.outbox.mark_attempted([oid for oid, *_ in self._pending])
+        self._sheet_row = self._write_rows([row for _, _, row, _, _ in self._pending],
+                                           maybe_written=maybe_written, after_row=self.outbox.last_sheet_row())
+
+    def _run(self):
+        delay = self.retry_delay
+        failed_before = False
+        while True:
+            if not self._pending:
+                self._collect()
+            if not self._pending:
+                if self._stopping.is_set() and self.outbox.undelivered_count() == 0:
+                    return
+                continue
+
+            # Respect the minimum gap between API writes unless we're shutting down
+            gap = self._last_flush + self.flush_interval - time.monotonic()
+            if gap > 0 and not self._stopping.is_set():
+                self._stopping.wait(gap)
+
+            try:
+                self._write_batch(failed_before)
+            except Exception as e:
+                logger.warning("Batch append of %d rows failed, retrying in %.0fs: %s",
+                               len(self._pending), delay, e)
+                if self._stopping.is_set():
+                    logger.error("Shutting down with %d unwritten rows", self.pending_count())
+                    return
+                failed_before = True
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+
+            self.outbox.mark_delivered([oid for oid, *_ in self._pending], sheet_row=self._sheet_row)
+            self._last_flush = time.monotonic()
+            with self._done:
+                self._outstanding -= len(self._pending)
+                self._done.notify_all()
+            self._pending = []
+            delay = self.retry_delay
+            failed_before = False
+
+
+def concat_frames(frame, new_frame):
+    """Append new_frame to frame, keeping Categorical columns categorical.
+
+    pd.concat falls back to object dtype when two Categoricals have different
+    category lists, so both sides are first given the union of the two.
+    """
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    frame, new_frame = frame.copy(), new_frame.copy()
+    for column in frame.columns.intersection(new_frame.columns):
+        old, new = frame[column], new_frame[column]
+        if isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype):
+            categories = union_categoricals([old.array, new.array], ignore_order=True).categories
+            frame[column] = old.cat.set_categories(categories)
+            new_frame[column] = new.cat.set_categories(categories)
+    return pd.concat([frame, new_frame], ignore_index=True)
+
+
+class IncrementalSheetLoader:
+    """Cached DataFrame of a worksheet that only fetches rows past a cursor.
+
+    Each refresh is one ``batch_get`` for the header row plus everything from
+    the last row already loaded onwards. If the header changed or that last
+    row no longer matches, the sheet was rewritten and the whole thing is
+    reloaded; otherwise only the new rows are parsed and appended.
+
+    ``normalize`` (frame -> frame) is applied to each batch of parsed rows as
+    it's loaded, so every row is typed exactly once.
+    """
+
+    def __init__(self, normalize=None):
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self.header = None
+        self.frame = None
+        self.cursor = 0             # data rows loaded (sheet row cursor + 1 is the last one)
+        self._last_row = None
+        self.full_reloads = 0
+
+    def refresh(self, worksheet):
+        """Bring the cached frame up to date and return a copy of it"""
+        with self._lock:
+            self._sync(worksheet)
+            return self.frame.copy()
+
+    def _sync(self, worksheet):
+        if self.header is None:
+            self._reload(worksheet)
+        else:
+            self._fetch_new_rows(worksheet)
+
+    def _replace_rows(self, frame):
+        """Called after a full reload with every row (cursor and header already updated)"""
+        self.frame = frame
+
+    def _append_rows(self, frame):
+        """Called with just the new rows (cursor already advanced past them)"""
+        self.frame = concat_frames(self.frame, frame)
+
+    def _fit(self, row):
+        """Trim or pad a row to the header width"""
+        row = list(row[:len(self.header)])
+        return row + [''] * (len(self.header) - len(row))
+
+    def _records(self, rows):
+        from gspread.utils import numericise_all
+        return [dict(zip(self.header, numericise_all(row))) for row in rows]
+
+    def _frame(self, rows):
+        import pandas as pd
+
+        frame = pd.DataFrame(self._records(rows), columns=self.header)
+        return self.normalize(frame) if self.normalize else frame
+
+    def _reload(self, worksheet):
+        values = worksheet.get_all_values()
+        header = values[0] if values else []
+        while header and header[-1] == '':
+            header = header[:-1]
+        self.header = header
+        rows = [self._fit(row) for row in values[1:]]
+        frame = self._frame(rows)
+        self.cursor = len(rows)
+        self._last_row = rows[-1] if rows else list(header)
+        self.full_reloads += 1
+        self._replace_rows(frame)
+
+    def _fetch_new_rows(self, worksheet):
+        from gspread.utils import rowcol_to_a1
+
+        if not self.header:
+            return self._reload(worksheet)
+
+        last_column = rowcol_to_a1(1, len(self.header)).rstrip('0123456789')
+        header_range, tail_range = worksheet.batch_get(['1:1', f'A{self.cursor + 1}:{last_column}'])
+
+        header = list(header_range[0]) if header_range else []
+        while header and header[-1] == '':
+            header = header[:-1]
+        tail = [self._fit(row) for row in tail_range]
+        if header != self.header or not tail or tail[0] != self._last_row:
+            return self._reload(worksheet)
+
+        new_rows = tail[1:]
+        if new_rows:
+            frame = self._frame(new_rows)
+            self.cursor += len(new_rows)
+            self._last_row = new_rows[-1]
+            self._append_rows(frame)
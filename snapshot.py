@@ -0,0 +1,274 @@
+"""Local columnar snapshot of the responses sheet.
+
+Responses are kept on disk as Parquet, partitioned by month, so analytics
+and exports read only the columns and date range they need instead of
+pulling the whole sheet through the Sheets API. New sheet rows are appended
+as small part files; once a month has piled up enough of them they are
+merged in the background.
+
+Layout under the snapshot directory:
+
+    state.json                                    sheet header, cursor, live parts
+    g3/month=2026-09/part-000000000-000000412.parquet
+
+A part's name is the range of sheet rows it holds. Data files are written
+before state.json, so a crash leaves at worst an unreferenced part that the
+next compaction removes. A full reload from the sheet is written as a new
+generation (g4/...) and the old one is deleted once state.json points at it.
+"""
+
+import glob
+import json
+import os
+import shutil
+import threading
+
+from sheets_io import IncrementalSheetLoader
+
+STATE_VERSION = 1
+STATE_FILE = 'state.json'
+
+# Partition for rows whose Timestamp couldn't be parsed
+NO_MONTH = 'none'
+
+# Sheet row index, stored so a load can return rows in sheet order
+ROW_COLUMN = '_sheet_row'
+
+
+def _month_of(timestamps):
+    """'YYYY-MM' partition per row, NO_MONTH where the Timestamp is missing"""
+    import numpy as np
+    import pandas as pd
+
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, errors='coerce')
+    codes, uniques = pd.factorize(timestamps.dt.year * 100 + timestamps.dt.month)
+    labels = [f'{int(value) // 100:04d}-{int(value) % 100:02d}' for value in uniques]
+    return np.array(labels + [NO_MONTH], dtype=object)[codes]
+
+
+def _to_table(frame, start):
+    """Arrow table with a stable schema: timestamps and floats as they are, everything else as strings"""
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    arrays, fields = [], []
+    for column in frame.columns:
+        series = frame[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            array = pa.array(series.astype('datetime64[us]'), type=pa.timestamp('us'))
+        elif pd.api.types.is_float_dtype(series):
+            array = pa.array(series, from_pandas=True)
+        else:
+            # Stringify each distinct value once; blanks and missing values become nulls
+            codes, uniques = pd.factorize(series)
+            labels = np.array([str(value) or None for value in uniques] + [None], dtype=object)
+            array = pa.array(labels[codes], type=pa.string(), from_pandas=True)
+        arrays.append(array)
+        fields.append(pa.field(column, array.type))
+    arrays.append(pa.array(np.arange(start, start + len(frame), dtype=np.int64)))
+    fields.append(pa.field(ROW_COLUMN, pa.int64()))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def _part_range(part):
+    """(first, last + 1) sheet rows held by a part file"""
+    _, first, end = os.path.splitext(os.path.basename(part))[0].split('-')
+    return int(first), int(end)
+
+
+class ResponseSnapshot:
+    """Month-partitioned Parquet copy of the responses sheet"""
+
+    def __init__(self, path, compact_after=8):
+        self.path = path
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._compactor = None
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(os.path.join(self.path, STATE_FILE)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get('version') == STATE_VERSION else None
+
+    def _write_state(self, state):
+        os.makedirs(self.path, exist_ok=True)
+        state_path = os.path.join(self.path, STATE_FILE)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+        self.state = state
+
+    def _generation_dir(self, generation):
+        return os.path.join(self.path, f'g{generation}')
+
+    def _write_parts(self, generation, frame, start):
+        """Write one part file per month present in frame, returning their paths relative to the generation"""
+        import pyarrow.parquet as pq
+
+        if len(frame) == 0:
+            return []
+        table = _to_table(frame, start)
+        months = _month_of(frame['Timestamp']) if 'Timestamp' in frame.columns else None
+        name = f'part-{start:09d}-{start + len(frame):09d}.parquet'
+        parts = []
+        for month in (sorted(set(months)) if months is not None else [NO_MONTH]):
+            rows = table if months is None else table.filter(months == month)
+            part = f'month={month}/{name}'
+            target = os.path.join(self._generation_dir(generation), part)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            pq.write_table(rows, target)
+            parts.append(part)
+        return parts
+
+    def _sheet_state(self, header, cursor, last_row, generation, parts):
+        return {'version': STATE_VERSION, 'header': header, 'cursor': cursor, 'last_row': last_row,
+                'generation': generation, 'parts': parts}
+
+    def replace(self, frame, header, cursor, last_row):
+        """Swap in a new generation holding every row of the sheet"""
+        with self._lock:
+            previous = self.state['generation'] if self.state else 0
+            generation = previous + 1
+            shutil.rmtree(self._generation_dir(generation), ignore_errors=True)
+            parts = self._write_parts(generation, frame, 0)
+            self._write_state(self._sheet_state(header, cursor, last_row, generation, parts))
+            for old in glob.glob(os.path.join(self.path, 'g*')):
+                if os.path.basename(old) != f'g{generation}':
+                    shutil.rmtree(old, ignore_errors=True)
+
+    def append(self, frame, header, cursor, last_row):
+        """Add the rows just before ``cursor`` as new part files"""
+        with self._lock:
+            generation = self.state['generation']
+            parts = self._write_parts(generation, frame, cursor - len(frame))
+            self._write_state(self._sheet_state(header, cursor, last_row, generation, self.state['parts'] + parts))
+            crowded = self._crowded_months()
+        if crowded and (self._compactor is None or not self._compactor.is_alive()):
+            self._compactor = threading.Thread(target=self.compact, daemon=True, name="snapshot-compactor")
+            self._compactor.start()
+
+    def _crowded_months(self):
+        counts = {}
+        for part in self.state['parts']:
+            month = os.path.dirname(part)
+            counts[month] = counts.get(month, 0) + 1
+        return [month for month, count in counts.items() if count > self.compact_after]
+
+    def compact(self):
+        """Merge each month's part files into one and delete anything state.json doesn't reference"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            if not self.state:
+                return
+            base = self._generation_dir(self.state['generation'])
+            by_month = {}
+            for part in self.state['parts']:
+                by_month.setdefault(os.path.dirname(part), []).append(part)
+
+            parts = []
+            for month, month_parts in sorted(by_month.items()):
+                if len(month_parts) == 1:
+                    parts.extend(month_parts)
+                    continue
+                table = pa.concat_tables(
+                    [pq.read_table(os.path.join(base, part)) for part in month_parts], promote_options='default'
+                )
+                ranges = [_part_range(part) for part in month_parts]
+                merged = f'{month}/part-{min(r[0] for r in ranges):09d}-{max(r[1] for r in ranges):09d}.parquet'
+                tmp_path = os.path.join(base, f'{merged}.tmp')
+                pq.write_table(table.sort_by(ROW_COLUMN), tmp_path)
+                os.replace(tmp_path, os.path.join(base, merged))
+                parts.append(merged)
+            self._write_state({**self.state, 'parts': parts})
+
+            live = {os.path.normpath(os.path.join(base, part)) for part in parts}
+            for path in glob.glob(os.path.join(base, '*', '*')):
+                if os.path.normpath(path) not in live:
+                    os.remove(path)
+
+    def load(self, columns=None, start=None, end=None, normalize=None):
+        """Rows with start <= Timestamp < end, only the given columns, in sheet order (None if empty).
+
+        Months outside the range are skipped without opening their files,
+        and columns that aren't in the snapshot are ignored.
+        """
+        import pandas as pd
+        import pyarrow.dataset as ds
+
+        with self._lock:
+            state = self.state
+            if not state or not state['parts']:
+                return None
+            base = self._generation_dir(state['generation'])
+            dataset = ds.dataset(
+                [os.path.join(base, part) for part in state['parts']], format='parquet',
+                partitioning=ds.partitioning(flavor='hive'), partition_base_dir=base,
+            )
+            names = [name for name in dataset.schema.names if name not in ('month', ROW_COLUMN)]
+            wanted = names if columns is None else [name for name in names if name in columns]
+
+            condition = None
+            for bound, month_test, time_test in [
+                (start, lambda m: ds.field('month') >= m, lambda t: ds.field('Timestamp') >= t),
+                (end, lambda m: ds.field('month') <= m, lambda t: ds.field('Timestamp') < t),
+            ]:
+                if bound is None:
+                    continue
+                bound = pd.Timestamp(bound)
+                test = month_test(bound.strftime('%Y-%m')) & time_test(bound.to_datetime64())
+                condition = test if condition is None else condition & test
+            table = dataset.to_table(columns=wanted + [ROW_COLUMN], filter=condition)
+
+        frame = table.sort_by(ROW_COLUMN).drop_columns([ROW_COLUMN]).to_pandas()
+        if len(frame) == 0:
+            return None
+        return normalize(frame) if normalize else frame
+
+
+class SnapshotSheetLoader(IncrementalSheetLoader):
+    """IncrementalSheetLoader that keeps the rows in a ResponseSnapshot rather than in memory.
+
+    The sheet cursor is persisted with the snapshot, so after a restart only
+    rows added since the last sync are fetched from the sheet.
+    """
+
+    def __init__(self, snapshot, normalize=None):
+        super().__init__(normalize)
+        self.snapshot = snapshot
+        self._restore()
+
+    def _restore(self):
+        state = self.snapshot.state
+        if state is None:
+            self.header, self.cursor, self._last_row = None, 0, None
+        else:
+            self.header, self.cursor, self._last_row = state['header'], state['cursor'], state['last_row']
+
+    def sync(self, worksheet):
+        """Append any new sheet rows to the snapshot"""
+        with self._lock:
+            try:
+                self._sync(worksheet)
+            except Exception:
+                # Don't let the in-memory cursor run ahead of what was written
+                self._restore()
+                raise
+
+    def refresh(self, worksheet):
+        self.sync(worksheet)
+        return self.snapshot.load(normalize=self.normalize)
+
+    def _replace_rows(self, frame):
+        self.snapshot.replace(frame, self.header, self.cursor, self._last_row)
+
+    def _append_rows(self, frame):
+        self.snapshot.append(frame, self.header, self.cursor, self._last_row)
@@ -0,0 +1,33 @@
+"""Shared test fixtures. The app's modules live at the repository root."""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class FakeClock:
+    """A clock that only moves when told to: sleep() advances it instead of waiting.
+
+    With step, every reading also advances it a little, so code that polls
+    the clock while waiting makes progress.
+    """
+
+    def __init__(self, start=1000.0, step=0.0):
+        self.now = start
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
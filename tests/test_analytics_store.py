@@ -0,0 +1,93 @@
+import pytest
+
+from analytics_store import TIME_BIN, AggregateStore, aggregate_frame, quantile_from_bins
+
+pytest.importorskip('pandas')
+
+ROW = {
+    'Timestamp': '2026-03-02 14:05:00', 'MBTI_Type': 'ENTP', 'E_I': 'E', 'S_N': 'N', 'T_F': 'T', 'J_P': 'P',
+    'Age': '25-34', 'Gender': 'Female', 'Country': 'Singapore', 'Occupation': 'Student',
+    'Referral_Source': 'Friend/Family', 'Total_Survey_Time': 125.0, 'Q1': 'E',
+}
+
+
+@pytest.fixture(scope='module')
+def engine():
+    from conftest import ROOT
+    from question_bank import read_artifact
+    return read_artifact(f'{ROOT}/Updated_combinations.qbank')[0]
+
+
+def test_add_counts_and_derived_fields():
+    store = AggregateStore(None)
+    store.add(ROW)
+    store.add({**ROW, 'Age': '', 'Total_Survey_Time': 'n/a'})
+    assert store.rows == 2
+    assert store.counts('MBTI_Type') == {'ENTP': 2}
+    assert store.counts('Age') == {'25-34': 1}
+    assert store.counts('DayOfWeek') == {'Monday': 2}
+    assert store.counts('Hour') == {'14': 2}
+    assert store.crosstab('Age', 'MBTI_Type') == {'25-34': {'ENTP': 1}}
+    stats = store.time_stats()
+    assert stats['count'] == 1 and stats['bins'] == {120: 1}
+    assert store.mean_time_by_source() == {'Friend/Family': 125.0}
+
+
+def test_aggregates_persist(tmp_path):
+    path = str(tmp_path / 'aggregates.json')
+    store = AggregateStore(path, save_interval=3600)
+    store.add(ROW)
+    store.add(ROW)
+    store.flush()
+    assert AggregateStore(path).counts('Gender') == {'Female': 2}
+
+
+def test_vectorized_rebuild_matches_per_row(engine):
+    from bench import synthetic_responses
+    from response_schema import normalize_responses
+
+    raw = synthetic_responses(500, engine, seed=1)
+    raw.loc[3, 'Q5'] = ''             # incomplete rows take the per-row fallback
+    raw.loc[7, 'MBTI_Type'] = 'XXXX'
+    per_row = AggregateStore(None)
+    per_row.rebuild(raw.to_dict('records'))
+    vectorized = AggregateStore(None)
+    vectorized.rebuild_from_frame(normalize_responses(raw, engine.options), engine.options)
+
+    for field in ['MBTI_Type', 'E_I', 'Q5', 'Age', 'Country', 'Date', 'Hour', 'DayOfWeek']:
+        assert vectorized.counts(field) == per_row.counts(field), field
+    assert vectorized.crosstab('Referral_Source', 'MBTI_Type') == per_row.crosstab('Referral_Source', 'MBTI_Type')
+    assert vectorized.time_stats()['bins'] == per_row.time_stats()['bins']
+    assert vectorized.time_stats()['count'] == per_row.time_stats()['count']
+
+
+def test_in_sync_tracks_source_and_rows(engine):
+    from bench import synthetic_responses
+
+    store = AggregateStore(None)
+    store.rebuild_from_frame(synthetic_responses(20, engine), engine.options, source=3, extra_rows=[ROW])
+    assert store.rows == 21
+    assert store.in_sync(3, 21)
+    assert not store.in_sync(3, 20)
+    assert not store.in_sync(4, 21)
+    empty = aggregate_frame(synthetic_responses(0, engine), engine.options, store._add)
+    assert empty['rows'] == 0
+
+
+def test_due_for_check_throttles_to_the_interval(monkeypatch, clock):
+    monkeypatch.setattr('analytics_store.time.monotonic', clock)
+    store = AggregateStore(None)
+    assert store.due_for_check(60)
+    assert not store.due_for_check(60)
+    clock.sleep(59)
+    assert not store.due_for_check(60)
+    clock.sleep(1)
+    assert store.due_for_check(60)
+
+
+def test_quantile_from_bins():
+    assert quantile_from_bins({}, 0.5) is None
+    bins = {0: 2, TIME_BIN: 2}
+    assert quantile_from_bins(bins, 0.5) == TIME_BIN
+    assert quantile_from_bins(bins, 0.25) == TIME_BIN / 2
+    assert quantile_from_bins(bins, 1.0) == 2 * TIME_BIN
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+
+import question_bank
+from conftest import ROOT
+from question_bank import QUESTION_IDS, ScoringEngine, load_engine, read_artifact, workbook_digest
+
+WORKBOOK = os.path.join(ROOT, question_bank.DEFAULT_WORKBOOK)
+ARTIFACT = os.path.join(ROOT, question_bank.DEFAULT_ARTIFACT)
+
+
+def test_committed_artifact_matches_the_workbook():
+    engine, digest = read_artifact(ARTIFACT)
+    assert digest == workbook_digest(WORKBOOK)
+    assert question_bank.main(['--workbook', WORKBOOK, '--output', ARTIFACT, '--check']) == 0
+
+
+def test_artifact_round_trip_and_lookup():
+    engine, digest = read_artifact(ARTIFACT)
+    parsed, parsed_digest = ScoringEngine.from_bytes(engine.to_bytes(digest))
+    assert parsed.options == engine.options and parsed.table == engine.table
+    assert parsed_digest == digest
+
+    answers = {q_id: first for q_id, (first, _) in zip(QUESTION_IDS, engine.options)}
+    assert engine.pack(answers) == 0
+    mbti_type, dimensions = engine.lookup(answers)
+    assert ''.join(dimensions.values()) == mbti_type
+    del answers['Q12']
+    assert engine.lookup(answers) is None
+
+
+def test_compiled_table_matches_the_artifact():
+    pytest.importorskip('openpyxl')
+    engine = question_bank.compile_workbook(WORKBOOK)
+    compiled, _ = read_artifact(ARTIFACT)
+    assert engine.options == compiled.options and engine.table == compiled.table
+
+
+def test_corrupt_artifact_reads_as_missing(tmp_path):
+    data = bytearray(open(ARTIFACT, 'rb').read())
+    data[100] ^= 0xFF
+    path = tmp_path / 'corrupt.qbank'
+    path.write_bytes(bytes(data))
+    assert read_artifact(str(path)) is None
+    assert read_artifact(str(tmp_path / 'missing.qbank')) is None
+
+
+def test_load_engine_recompiles_a_stale_artifact(tmp_path):
+    pytest.importorskip('openpyxl')
+    workbook = str(tmp_path / 'combinations.xlsx')
+    artifact = str(tmp_path / 'combinations.qbank')
+    shutil.copy(WORKBOOK, workbook)
+    engine, _ = read_artifact(ARTIFACT)
+    question_bank.write_artifact(engine, b'\0' * question_bank.DIGEST_SIZE, artifact)
+
+    assert question_bank.main(['--workbook', workbook, '--output', artifact, '--check']) == 1
+    load_engine(workbook, artifact)
+    assert read_artifact(artifact)[1] == workbook_digest(workbook)
+
+
+def test_load_engine_without_the_workbook(tmp_path):
+    artifact = str(tmp_path / 'combinations.qbank')
+    shutil.copy(ARTIFACT, artifact)
+    missing = str(tmp_path / 'missing.xlsx')
+    assert load_engine(missing, artifact).table == read_artifact(ARTIFACT)[0].table
+    with pytest.raises(FileNotFoundError):
+        load_engine(missing, str(tmp_path / 'missing.qbank'))
@@ -0,0 +1,82 @@
+import pytest
+
+from question_bank import QUESTION_IDS
+from quiz_state import NOT_SPECIFIED, RESULTS_STEP, QuizState
+
+OPTIONS = [('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P')] * 3
+
+
+def test_answers_pack_q1_into_the_high_bit():
+    state = QuizState(OPTIONS)
+    state.set_answer('Q1', 'I')
+    state.set_answer('Q12', 'J')
+    assert state.answer_bits == 1 << (len(QUESTION_IDS) - 1)
+    assert state.answered == (1 << (len(QUESTION_IDS) - 1)) | 1
+    assert state.answers() == {'Q1': 'I', 'Q12': 'J'}
+    assert state.answer('Q2') is None
+
+
+def test_changing_an_answer_clears_its_bit():
+    state = QuizState(OPTIONS)
+    state.set_answer('Q3', 'F')
+    state.set_answer('Q3', 'T')
+    assert state.answer_bits == 0
+    assert state.answer('Q3') == 'T'
+
+
+def test_rejects_bad_options_and_letters():
+    with pytest.raises(ValueError):
+        QuizState(OPTIONS[:-1])
+    with pytest.raises(ValueError):
+        QuizState(OPTIONS).set_answer('Q1', 'S')
+
+
+def test_stop_clock_keeps_the_first_duration_unless_overwriting(monkeypatch, clock):
+    monkeypatch.setattr('quiz_state.time.monotonic', clock)
+    state = QuizState(OPTIONS)
+    state.stop_clock('Q1')
+    assert not state.clock_started('Q1') and state.duration('Q1') == 0
+
+    state.start_clock('Q1')
+    clock.sleep(4.5)
+    state.stop_clock('Q1')
+    state.start_clock('Q1')
+    clock.sleep(1)
+    state.stop_clock('Q1', overwrite=False)
+    assert state.duration('Q1') == 4.5
+    state.stop_clock('Q1')
+    assert state.duration('Q1') == 1
+    assert state.question_times()['Q2_Time'] == 0
+
+
+def test_demographics_round_trip_through_codes():
+    state = QuizState(OPTIONS)
+    assert state.demographics == {}
+    state.set_demographics('25-34', 'Female', 'Atlantis', 'Student', 'Friend/Family')
+    demographics = state.demographics
+    assert demographics['age'] == '25-34'
+    assert demographics['gender'] == 'Female'
+    assert demographics['country'] == NOT_SPECIFIED
+    assert demographics['referral_source'] == 'Friend/Family'
+    assert demographics['pdpa_consent'] == 'Yes'
+
+
+def test_result_and_reset():
+    state = QuizState(OPTIONS)
+    assert state.result is None
+    state.set_answer('Q1', 'E')
+    state.set_result('ENTP', saved=True, total_time=184.25)
+    assert state.step == RESULTS_STEP
+    result = state.result
+    assert result['type'] == 'ENTP'
+    assert result['dimensions'] == {'E_I': 'E', 'S_N': 'N', 'T_F': 'T', 'J_P': 'P'}
+    assert result['saved'] is True and result['total_time'] == 184.25
+
+    state.reset()
+    assert state.step == 0 and state.result is None and state.answers() == {}
+
+
+def test_footprint_stays_small():
+    state = QuizState(OPTIONS)
+    state.set_demographics('18-24', 'Male', 'Singapore', 'Student', 'Other')
+    assert state.footprint() < 1024
@@ -0,0 +1,240 @@
+import threading
+import time
+
+import pytest
+
+import fake_gspread
+from conftest import FakeClock
+from sheets_io import (
+    IncrementalSheetLoader, OutboxWriter, RateLimitTimeout, ResponseOutbox, SheetsRateLimiter, TokenBucket,
+    appended_row, column_values_after, ensure_header
+)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.005)
+
+
+def test_token_bucket_serves_waiters_by_priority_then_arrival(clock):
+    bucket = TokenBucket(rate=10.0, capacity=1, clock=clock)
+    assert bucket.acquire()
+
+    order = []
+    threads = []
+    for name, priority in [('analytics-1', 1), ('analytics-2', 1), ('response', 0)]:
+        thread = threading.Thread(target=lambda n=name, p=priority: bucket.acquire(p) and order.append(n))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: len(bucket._waiters) == len(threads))
+
+    # One token per tenth of a (fake) second
+    for served in range(1, 4):
+        clock.sleep(0.1)
+        wait_until(lambda: len(order) == served)
+    for thread in threads:
+        thread.join()
+    assert order == ['response', 'analytics-1', 'analytics-2']
+
+
+def test_token_bucket_penalize_withholds_tokens(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+    bucket.penalize(3)
+    assert not bucket.acquire(timeout=0)
+    clock.sleep(3.5)
+    assert not bucket.acquire(timeout=0)
+    clock.sleep(0.5)
+    assert bucket.acquire(timeout=0)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+    clock.sleep(60)
+    assert bucket.acquire(timeout=0)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0)
+
+
+def test_zero_rate_is_rejected(clock):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1, clock=clock)
+    limiter = SheetsRateLimiter(clock=clock, sleep=clock.sleep)
+    with pytest.raises(ValueError):
+        limiter.configure(read_per_minute=0)
+    assert limiter.buckets['read'].rate == 1.0
+
+
+def test_limiter_retries_quota_errors_and_pauses_the_bucket():
+    clock = FakeClock(step=0.001)
+    backend = fake_gspread.FakeServer(read_quota=2, clock=clock, sleep=clock.sleep)
+    worksheet = fake_gspread.FakeClient(backend).create('Responses')._worksheets[0]
+    limiter = SheetsRateLimiter(read_per_minute=6000, budgets={0: (300.0, 3)}, clock=clock, sleep=clock.sleep)
+    limiter.backoff = lambda attempt: 61.0      # past the fake server's one-minute quota window
+
+    for _ in range(3):
+        assert limiter.call('read', 0, worksheet.get_all_values) == []
+
+    assert backend.errors[429] == 1
+    assert limiter.stats() == {'retries': 1, 'timeouts': 0}
+    assert backend.calls['get_all_values'] == 4
+
+
+def test_limiter_gives_up_when_the_budget_runs_out():
+    clock = FakeClock(step=0.001)
+    backend = fake_gspread.FakeServer(read_quota=1, clock=clock, sleep=clock.sleep)
+    worksheet = fake_gspread.FakeClient(backend).create('Responses')._worksheets[0]
+    limiter = SheetsRateLimiter(read_per_minute=6000, budgets={1: (5.0, 1)}, clock=clock, sleep=clock.sleep)
+    limiter.backoff = lambda attempt: 10.0      # longer than the whole budget
+
+    limiter.call('read', 1, worksheet.get_all_values)
+    with pytest.raises(Exception) as raised:
+        limiter.call('read', 1, worksheet.get_all_values)
+    assert getattr(raised.value, 'code', None) == 429
+    assert not isinstance(raised.value, RateLimitTimeout)
+    assert limiter.stats()['retries'] == 0
+
+
+# --- Outbox ---
+
+def outbox_ids(outbox):
+    return [response_id for _, response_id, _, _, _ in outbox.undelivered(100)]
+
+
+def test_outbox_keeps_rows_until_delivered_then_purges_them(tmp_path, clock):
+    path = str(tmp_path / 'outbox.sqlite3')
+    outbox = ResponseOutbox(path, keep_days=7, clock=clock)
+    for response_id in ['a', 'b', 'c']:
+        outbox.add(response_id, [response_id, 1])
+        clock.sleep(1)
+    outbox.add('a', ['a', 2])       # a retried submit is a no-op
+    assert outbox_ids(outbox) == ['a', 'b', 'c']
+
+    records = outbox.undelivered(2)
+    assert [row for _, _, row, _, _ in records] == [['a', 1], ['b', 1]]
+    outbox.mark_attempted([oid for oid, *_ in records])
+    outbox.mark_delivered([oid for oid, *_ in records], sheet_row=3)
+    assert outbox_ids(outbox) == ['c']
+    assert outbox.undelivered(1)[0][3] == 0     # c was never attempted
+
+    # Survives a restart, delivered rows included until they age out
+    reopened = ResponseOutbox(path, keep_days=7, clock=clock)
+    assert reopened.undelivered_count() == 1
+    assert reopened.last_sheet_row() == 3
+    clock.sleep(8 * 86400)
+    reopened.mark_delivered([oid for oid, *_ in reopened.undelivered(1)], sheet_row=4)
+    assert reopened._conn.execute("SELECT response_id FROM outbox").fetchall() == [('c',)]
+    assert reopened.last_sheet_row() == 4
+
+
+def test_outbox_writer_retries_with_maybe_written_and_the_last_confirmed_row(tmp_path):
+    calls = []
+    sheet_rows = iter([10, None, 30])    # the second append's response is lost
+
+    def write_rows(rows, maybe_written=False, after_row=None):
+        calls.append((len(rows), maybe_written, after_row))
+        sheet_row = next(sheet_rows)
+        if sheet_row is None:
+            raise RuntimeError("connection reset")
+        return sheet_row
+
+    outbox = ResponseOutbox(str(tmp_path / 'outbox.sqlite3'))
+    writer = OutboxWriter(write_rows, outbox, prepare=lambda: calls.append('prepare'),
+                          batch_size=2, flush_interval=0.05, retry_delay=0.05)
+    try:
+        writer.submit(['a'], 'a')
+        writer.submit(['b'], 'b')
+        assert writer.flush(5)
+        writer.submit(['c'], 'c')
+        writer.submit(['d'], 'd')
+        assert writer.flush(5)
+    finally:
+        writer.close()
+    assert calls == ['prepare', (2, False, None), (2, False, 10), (2, True, 10)]
+    assert outbox.undelivered_count() == 0
+    assert outbox.last_sheet_row() == 30
+
+
+# --- Sheet helpers ---
+
+@pytest.fixture
+def worksheet():
+    backend = fake_gspread.FakeServer()
+    return fake_gspread.FakeClient(backend).create('Responses')._worksheets[0]
+
+
+def test_ensure_header_appends_new_columns_to_an_old_header(worksheet):
+    worksheet.col_count = 2
+    worksheet.append_rows([['Timestamp', 'Type'], ['2026-10-01 10:00:00', 'INTJ']])
+    assert ensure_header(worksheet, ['Timestamp', 'Type', 'Response_ID'])
+    assert worksheet.col_count == 3
+    assert worksheet.get_all_values()[0] == ['Timestamp', 'Type', 'Response_ID']
+    assert not ensure_header(worksheet, ['Timestamp', 'Type', 'Response_ID'])
+
+
+def test_ensure_header_fills_an_empty_sheet_and_leaves_a_foreign_one(worksheet):
+    assert ensure_header(worksheet, ['Timestamp', 'Type'])
+    assert worksheet.get_all_values() == [['Timestamp', 'Type']]
+    assert not ensure_header(worksheet, ['Date', 'Type'])
+    assert worksheet.get_all_values() == [['Timestamp', 'Type']]
+
+
+def test_column_values_after_reads_only_the_window_below_a_row(worksheet):
+    response = worksheet.append_rows([['Response_ID']] + [[f'id{i}'] for i in range(10)])
+    assert appended_row(response) == 11
+    # Sheet row 2 holds id0
+    assert column_values_after(worksheet, 1, after_row=9) == ['id8', 'id9']
+    assert column_values_after(worksheet, 1, after_row=2, window=3) == ['id1', 'id2', 'id3']
+    assert column_values_after(worksheet, 1)[:2] == ['Response_ID', 'id0']
+    assert appended_row(None) is None
+
+
+# --- Incremental loading ---
+
+HEADER = ['Timestamp', 'Name', 'Total_Survey_Time']
+
+
+def rows(start, count, month='2026-09'):
+    return [[f'{month}-01 10:{i % 60:02d}:00', f'name{i}', i] for i in range(start, start + count)]
+
+
+def test_loader_fetches_only_new_rows(worksheet):
+    worksheet.append_rows([HEADER] + rows(0, 3))
+    loader = IncrementalSheetLoader()
+    assert list(loader.refresh(worksheet)['Name']) == ['name0', 'name1', 'name2']
+
+    worksheet.append_rows(rows(3, 2))
+    reads = worksheet.backend.calls['get_all_values']
+    frame = loader.refresh(worksheet)
+    assert list(frame['Name']) == [f'name{i}' for i in range(5)]
+    assert list(frame['Total_Survey_Time']) == list(range(5))
+    assert loader.cursor == 5
+    assert loader.full_reloads == 1
+    assert worksheet.backend.calls['get_all_values'] == reads
+
+
+def test_loader_reloads_when_the_header_changes(worksheet):
+    worksheet.append_rows([HEADER] + rows(0, 3))
+    loader = IncrementalSheetLoader()
+    loader.refresh(worksheet)
+    ensure_header(worksheet, HEADER + ['Response_ID'])
+    assert list(loader.refresh(worksheet).columns) == HEADER + ['Response_ID']
+    assert loader.full_reloads == 2
+    loader.refresh(worksheet)
+    assert loader.full_reloads == 2
+
+
+def test_loader_reloads_when_the_last_row_changes(worksheet):
+    worksheet.append_rows([HEADER] + rows(0, 3))
+    loader = IncrementalSheetLoader()
+    loader.refresh(worksheet)
+
+    worksheet._rows[-1][1] = 'edited'
+    assert list(loader.refresh(worksheet)['Name']) == ['name0', 'name1', 'edited']
+    assert loader.full_reloads == 2
+
+    del worksheet._rows[2:]
+    assert list(loader.refresh(worksheet)['Name']) == ['name0']
+    assert loader.full_reloads == 3
+    assert loader.cursor == 1
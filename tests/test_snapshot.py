@@ -0,0 +1,87 @@
+import glob
+import os
+
+import pytest
+
+import fake_gspread
+from snapshot import ResponseSnapshot, SnapshotSheetLoader
+
+pytest.importorskip('pyarrow')
+
+HEADER = ['Timestamp', 'Name', 'Total_Survey_Time']
+
+
+def rows(start, count, month):
+    return [[f'{month}-01 10:{i % 60:02d}:00', f'name{i}', i] for i in range(start, start + count)]
+
+
+@pytest.fixture
+def worksheet():
+    worksheet = fake_gspread.FakeClient(fake_gspread.FakeServer()).create('Responses')._worksheets[0]
+    worksheet.append_rows([HEADER])
+    return worksheet
+
+
+def parse_timestamps(frame):
+    import pandas as pd
+    return frame.assign(Timestamp=pd.to_datetime(frame['Timestamp']))
+
+
+def part_files(path):
+    return sorted(os.path.relpath(p, path) for p in glob.glob(os.path.join(path, 'g*', '*', '*')))
+
+
+def test_snapshot_sync_appends_parts_per_month_and_survives_a_restart(tmp_path, worksheet):
+    path = str(tmp_path / 'snapshot')
+    loader = SnapshotSheetLoader(ResponseSnapshot(path), normalize=parse_timestamps)
+    worksheet.append_rows(rows(0, 2, '2026-08') + rows(2, 2, '2026-09'))
+    loader.sync(worksheet)
+    worksheet.append_rows(rows(4, 1, '2026-09'))
+    loader.sync(worksheet)
+    assert part_files(path) == [
+        os.path.join('g1', 'month=2026-08', 'part-000000000-000000004.parquet'),
+        os.path.join('g1', 'month=2026-09', 'part-000000000-000000004.parquet'),
+        os.path.join('g1', 'month=2026-09', 'part-000000004-000000005.parquet'),
+    ]
+
+    restarted = SnapshotSheetLoader(ResponseSnapshot(path), normalize=parse_timestamps)
+    worksheet.append_rows(rows(5, 1, '2026-10'))
+    restarted.sync(worksheet)
+    assert restarted.full_reloads == 0
+    assert worksheet.backend.calls['get_all_values'] == 1
+    frame = restarted.snapshot.load()
+    assert list(frame['Name']) == [f'name{i}' for i in range(6)]
+    september = restarted.snapshot.load(columns=['Name'], start='2026-09-01', end='2026-10-01')
+    assert list(september.columns) == ['Name']
+    assert list(september['Name']) == ['name2', 'name3', 'name4']
+
+
+def test_snapshot_compacts_crowded_months_in_the_background(tmp_path, worksheet):
+    path = str(tmp_path / 'snapshot')
+    snapshot = ResponseSnapshot(path, compact_after=2)
+    loader = SnapshotSheetLoader(snapshot)
+    loader.sync(worksheet)
+    for i in range(3):
+        worksheet.append_rows(rows(i, 1, '2026-09'))
+        loader.sync(worksheet)
+        assert snapshot._compactor is None or i == 2
+    snapshot._compactor.join(10)
+
+    # The third part crowded the month, so its parts were merged and the originals deleted
+    assert snapshot.state['parts'] == ['month=2026-09/part-000000000-000000003.parquet']
+    assert part_files(path) == [os.path.join('g1', 'month=2026-09', 'part-000000000-000000003.parquet')]
+    worksheet.append_rows(rows(3, 1, '2026-09'))
+    loader.sync(worksheet)
+    assert list(snapshot.load()['Name']) == [f'name{i}' for i in range(4)]
+
+
+def test_snapshot_full_reload_starts_a_new_generation(tmp_path, worksheet):
+    path = str(tmp_path / 'snapshot')
+    loader = SnapshotSheetLoader(ResponseSnapshot(path))
+    worksheet.append_rows(rows(0, 3, '2026-09'))
+    loader.sync(worksheet)
+    worksheet._rows[-1][1] = 'edited'
+    loader.sync(worksheet)
+    assert loader.snapshot.state['generation'] == 2
+    assert not os.path.exists(os.path.join(path, 'g1'))
+    assert list(loader.snapshot.load()['Name']) == ['name0', 'name1', 'edited']